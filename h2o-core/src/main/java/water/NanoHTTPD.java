@@ -10,6 +10,7 @@ import java.nio.charset.StandardCharsets;
 import java.util.*;
 import java.util.regex.Matcher;
 import java.util.regex.Pattern;
+import java.util.zip.GZIPInputStream;
 
 import water.fvec.UploadFileVec;
 
@@ -339,6 +340,21 @@ public class NanoHTTPD
         is.reset();
         is.skip(splitbyte);
 
+        // A gzip-compressed body, as clients send large Rapids programs:
+        // inflate it, then read on as if it had been sent plain
+        String contentEncoding = header.getProperty("content-encoding");
+        if (contentEncoding != null && contentEncoding.trim().equalsIgnoreCase("gzip") && size < Integer.MAX_VALUE) {
+          byte[] zipped = new byte[(int)size];
+          new DataInputStream(is).readFully(zipped);
+          ByteArrayOutputStream body = new ByteArrayOutputStream();
+          try (GZIPInputStream gz = new GZIPInputStream(new ByteArrayInputStream(zipped))) {
+            byte[] b = new byte[8192];
+            for (int n; (n = gz.read(b)) > 0; ) body.write(b, 0, n);
+          }
+          is = new ByteArrayInputStream(body.toByteArray());
+          size = body.size();
+        }
+
         // While Firefox sends on the first read all the data fitting
         // our buffer, Chrome and Opera sends only the headers even if
         // there is data for the body. So we do some magic here to find
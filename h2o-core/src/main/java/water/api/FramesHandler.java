@@ -162,7 +162,7 @@ class FramesHandler<I extends FramesHandler.Frames, S extends FramesBase<I, S>>
     String[] names = { s.column };
     Frame new_frame = new Frame(names, vecs);
     s.frames = new FrameV2[1];
-    s.frames[0] = new FrameV2().fillFromImpl(new_frame);
+    s.frames[0] = new FrameV2(new_frame, s.offset, s.len);
     s.frames[0].clearBinsField();
     return s;
   }
@@ -196,7 +196,7 @@ class FramesHandler<I extends FramesHandler.Frames, S extends FramesBase<I, S>>
 
     Frame frame = getFromDKV("key", s.key.key()); // safe
     s.frames = new FrameV2[1];
-    s.frames[0] = new FrameV2().fillFromImpl(frame);
+    s.frames[0] = new FrameV2(frame, s.offset, s.len); // a page of rows: 1-based offset, len (0 for defaults)
 
     // Summary data is big, and not always there: null it out here.  You have to call columnSummary
     // to force computation of the summary data.
@@ -9,6 +9,8 @@ import water.util.Log;
 import water.parser.ValueString;
 import water.util.PrettyPrint;
 
+import java.util.ArrayList;
+
 class RapidsHandler extends Handler {
 
   @Override protected int min_ver() { return 1; }
@@ -59,7 +61,29 @@ class RapidsHandler extends Handler {
         }
       }
       if (rapids.ast == null || rapids.ast.equals("")) return rapids;
-      env = water.rapids.Exec.exec(rapids.ast);
+      // Describe the result of every statement of a multi-statement ast
+      final ArrayList<String> keys = new ArrayList<>();
+      final ArrayList<Long> rows = new ArrayList<>();
+      final ArrayList<Integer> cols = new ArrayList<>();
+      final ArrayList<Double> scalars = new ArrayList<>();
+      env = water.rapids.Exec.exec(rapids.ast, new water.rapids.Exec.StatementResult() {
+        @Override public void result(Env e) {
+          Frame fr = e.isAry() ? e.peekAry() : null;
+          keys.add(fr == null || fr._key == null ? null : fr._key.toString());
+          rows.add(fr == null ? 0 : fr.numRows());
+          cols.add(fr == null ? 0 : fr.numCols());
+          scalars.add(e.isNum() ? e.peekDbl() : Double.NaN);
+        }
+      });
+      rapids.stmnt_keys = keys.toArray(new String[keys.size()]);
+      rapids.stmnt_rows = new long[rows.size()];
+      rapids.stmnt_cols = new int[cols.size()];
+      rapids.stmnt_scalars = new double[scalars.size()];
+      for (int i = 0; i < keys.size(); ++i) {
+        rapids.stmnt_rows[i] = rows.get(i);
+        rapids.stmnt_cols[i] = cols.get(i);
+        rapids.stmnt_scalars[i] = scalars.get(i);
+      }
       StringBuilder sb = env._sb;
       if( sb.length()!=0 ) sb.append("\n");
       if (env.isAry()) {
@@ -23,4 +23,8 @@ public class RapidsV1 extends Schema<Iced, RapidsV1> {
   @API(help="Raft key"               , direction=API.Direction.OUTPUT) KeyV1  raft_key;
   @API(help="Was evaluated"          , direction=API.Direction.OUTPUT) boolean evaluated;
   @API(help="Head of a Frame result" , direction=API.Direction.OUTPUT) String[][] head;
+  @API(help="Result key of each statement, null if not a Frame"  , direction=API.Direction.OUTPUT) String[] stmnt_keys;
+  @API(help="Rows in each statement's Frame result"               , direction=API.Direction.OUTPUT) long[] stmnt_rows;
+  @API(help="Columns in each statement's Frame result"            , direction=API.Direction.OUTPUT) int[] stmnt_cols;
+  @API(help="Scalar result of each statement, NaN if not a number", direction=API.Direction.OUTPUT) double[] stmnt_scalars;
 }
\ No newline at end of file
@@ -3,6 +3,7 @@ package water.api;
 import water.DKV;
 import water.Keyed;
 import water.Lockable;
+import water.fvec.Frame;
 
 public class RemoveHandler extends Handler {
   @Override protected int min_ver() { return 1; }
@@ -12,6 +13,7 @@ public class RemoveHandler extends Handler {
   public RemoveV1 remove(int version, RemoveV1 u) {
     Keyed val = DKV.getGet(u.key.key());
     if (val != null) {
+      if (val instanceof Frame) u.byteSize = ((Frame) val).byteSize();
       if (val instanceof Lockable) ((Lockable) val).delete(); // Fails if object already locked
       else val.remove(); // Unconditional delete
     }
@@ -7,6 +7,10 @@ public class RemoveV1 extends Schema<Iced, RemoveV1> {
   //Input
   @API(help="Key to be removed.")
   KeySchema key;
+
+  //Output
+  @API(help="Bytes freed, if the key was a Frame.", direction=API.Direction.OUTPUT)
+  long byteSize;
   @Override public DocGen.HTML writeHTML_impl( DocGen.HTML ab ) {
     ab.p("Key "+key+" has been removed.");
     return ab;
@@ -51,7 +51,18 @@ public class Exec extends Iced {
     _env = env;
   }
 
-  public static Env exec( String str ) throws IllegalArgumentException {
+  public static Env exec( String str ) throws IllegalArgumentException { return exec(str, null); }
+
+  /** Called with the Env holding each statement's result, before the next statement runs. */
+  public interface StatementResult { void result(Env env); }
+
+  /**
+   * A program is one statement, or several separated by ";;" and ended by ";;;".
+   * Statements are parsed and run in turn in one Env, so later ones see the keys
+   * assigned by earlier ones; every result is shown to <code>each</code> (if not
+   * null), then all but the last are popped.
+   */
+  public static Env exec( String str, StatementResult each ) throws IllegalArgumentException {
     cluster_init();
     // Preload the global environment from existing Frames
     HashSet<Key> locked = new HashSet<>();
@@ -66,12 +77,16 @@ public class Exec extends Iced {
     try {
       Exec ex = new Exec(str, env);
 
-      // Parse
-      AST ast = ex.parse();
-      if (ex.skipWS().hasNext()) throwErr("Note that only a single statement can be processed at a time. Junk at the end of the statement: ",ex);
+      while (true) {
+        // Parse
+        AST ast = ex.parse();
 
-      // Execute
-      env = ast.treeWalk(env);
+        // Execute
+        env = ast.treeWalk(env);
+        if (each != null) each.result(env);
+        if (!ex.skipWS().hasNext()) break;
+        env.pop();  // Not the last statement: pop its result; assigned keys stay locked
+      }
 
       // Write back to DKV (if needed) and return
       env.postWrite();
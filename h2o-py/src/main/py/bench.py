@@ -0,0 +1,94 @@
+import json, sys, threading, time, requests
+import BaseHTTPServer, SocketServer
+import h2o
+from h2o import H2OConnection, Vec, Expr
+
+######################################################
+#
+# Client-side micro-benchmarks, run against a local stand-in for the cluster
+# REST API so only client and connection overhead is measured.
+#
+#   python bench.py [ncalls]
+
+# Canned JSON replies, by endpoint
+REPLIES = {
+  "Cloud":  {'cloud_name':'standin','cloud_size':1,'cloud_healthy':True,'consensus':True,
+             'nodes':[{'num_cpus':1,'max_mem':1<<30}]},
+  "Rapids": {'key':None,'num_rows':0,'num_cols':0,'scalar':2.0,'head':None},
+  "Remove": {},
+}
+
+class StandinHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+  protocol_version = "HTTP/1.1"  # Keep-alive, like the real cluster
+  wbufsize = 1<<16               # One write per reply; avoids Nagle stalls
+  def do_GET(self):
+    self.reply(self.path.split('?')[0].strip('/').split('.json')[0])
+  # Large calls POST their params as a form body; drain it
+  def do_POST(self):
+    self.rfile.read(int(self.headers.getheader('Content-Length',0)))
+    self.reply(self.path.strip('/').split('.json')[0])
+  def reply(self,endpoint):
+    body = json.dumps(REPLIES.get(endpoint,{'errmsg':'No stand-in for '+endpoint}))
+    self.send_response(200)
+    self.send_header("Content-Type","application/json")
+    self.send_header("Content-Length",str(len(body)))
+    self.end_headers()
+    self.wfile.write(body)
+  def log_message(self,*args): pass
+
+class StandinServer(SocketServer.ThreadingMixIn,BaseHTTPServer.HTTPServer):
+  daemon_threads = True
+
+# Start a stand-in cluster on a free local port; returns the server
+def standin():
+  server = StandinServer(("localhost",0),StandinHandler)
+  t = threading.Thread(target=server.serve_forever)
+  t.daemon = True
+  t.start()
+  return server
+
+def timeit(name,ncalls,fcn):
+  start = time.time()
+  for i in xrange(ncalls): fcn()
+  secs = time.time()-start
+  print "%-28s %6d calls %8.3f sec %8.1f usec/call" % (name,ncalls,secs,secs*1e6/ncalls)
+  return secs
+
+# Small Rapids calls: a fresh TCP connection per call vs the pooled session
+def bench_rapids(conn,ncalls):
+  url = conn.buildURL("Rapids",{"ast":"(+ #1 #1)"})
+  unpooled = timeit("rapids, connection per call",ncalls,lambda: requests.get(url).json())
+  pooled   = timeit("rapids, pooled session",ncalls,lambda: conn.Rapids("(+ #1 #1)"))
+  print "pooled speedup %.2fx" % (unpooled/pooled)
+
+# Local engines vs the cluster: time a small local pipeline, (2*v+v).mean(),
+# over growing row counts, against one remote round trip.  The stand-in
+# answers instantly, so the crossover printed is where local compute alone
+# costs more than the connection; a real cluster only moves it higher.
+def bench_crossover(conn):
+  reps = 200
+  remote = timeit("rapids round trip",reps,lambda: conn.Rapids("(+ #1 #1)"))/reps
+  engines = [h2o.PyEngine()] + ([h2o.NumPyEngine()] if h2o.np else [])
+  for engine in engines:
+    h2o.LOCAL_ENGINE = engine
+    crossover = None
+    for n in [10**k for k in range(1,7)]:
+      data = [float(i) for i in xrange(n)]
+      reps = max(1,10**5/n)
+      local = timeit("%s %d rows" % (type(engine).__name__,n),reps,
+                     lambda: (2*Vec("v",Expr(data))+Vec("w",Expr(data))).mean().eager())/reps
+      if crossover is None and local > remote: crossover = n
+    print "%s local/remote crossover: %s rows" % (type(engine).__name__,crossover or "> %d" % n)
+  h2o.LOCAL_ENGINE = engines[-1]
+
+if __name__ == '__main__':
+  ncalls = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+  server = standin()
+  conn = H2OConnection(port=server.server_address[1])
+  bench_rapids(conn,ncalls)
+  bench_crossover(conn)
+  for endpoint,st in sorted(conn.stats().items()):
+    print "%-10s %6d calls p50 %7.1f usec p99 %7.1f usec decode %6.3f sec" % \
+      (endpoint,st['calls'],st['p50_secs']*1e6,st['p99_secs']*1e6,st['decode_secs'])
+  conn.close()
+  server.shutdown()
@@ -1,4 +1,8 @@
-import csv, requests, urllib, uuid
+import array, atexit, collections, csv, fnmatch, gzip, hashlib, itertools, math, operator, os, re, requests, sys, threading, time, urllib, uuid, weakref, Queue, StringIO
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3.util.retry import Retry
+try:    import numpy as np     # Optional; faster local columns if available
+except ImportError: np = None
 
 ###############################################################################
 # Frame represents a 2-D array of data, uniform in each column.  The data may
@@ -10,22 +14,11 @@ class H2OFrame(object):
     # Read a CSV file
     if remoteFName:             # Read remotely into cluster
       if not H2OCONN: raise ValueError("No open h2o connection")
-      rawkey = H2OCONN.ImportFile(remoteFName)
-      setup  = H2OCONN.ParseSetup(rawkey)
-      parse  = H2OCONN.Parse(setup,py_tmp_key())
-      cols   = parse['columnNames']
-      rows   = parse['rows']
-      veckeys= parse['vecKeys']
-      self._vecs = [Vec(str(col),Expr(op=veckey['name'],length=rows))  for idx,(col,veckey) in enumerate(zip(cols,veckeys))]
-      print "Imported",remoteFName,"into cluster with",rows,"rows and",len(cols),"cols"
+      self._vecs = _parse_vecs(H2OCONN,H2OCONN.ImportFile(remoteFName))
+      print "Imported",remoteFName,"into cluster with",len(self._vecs[0]),"rows and",len(self._vecs),"cols"
     elif localFName:            # Read locally into python process
-      with open(localFName, 'rb') as csvfile:
-        self._vecs = []
-        for name in csvfile.readline().split(','): 
-          self._vecs.append(Vec(name.rstrip(), Expr([])))
-        for row in csv.reader(csvfile):
-          for i,data in enumerate(row):
-            self._vecs[i].append(data)
+      names,cols = _read_local_csv(localFName)
+      self._vecs = [Vec(name,Expr(col)) for name,col in zip(names,cols)]
       print "Imported",localFName,"into local python process"
     # Construct from an array of Vecs already passed in
     elif vecs is not None:
@@ -59,23 +52,68 @@ class H2OFrame(object):
   # Number of columns
   def __len__(self): return len(self._vecs)
 
+  # Row i across all columns, as a list
+  def row(self,i): return [v._expr[i] for v in self._vecs]
+
+  # Iterate over rows [start,stop) across all columns, as lists.  Pending
+  # columns are computed together first, then cluster data is read a page of
+  # rows at a time through the connection's page cache.
+  def rows(self,start=0,stop=None):
+    if not self._vecs: return
+    self.compute()
+    nrows = len(self._vecs[0])
+    stop = nrows if stop is None else min(stop,nrows)
+    step = H2OCONN._page_rows if H2OCONN else 1000
+    for lo in xrange(start,stop,step):
+      cols = [v._expr[lo:min(lo+step,stop)] for v in self._vecs]
+      for row in itertools.izip(*cols): yield list(row)
+
   # Addition
   def __add__(self,i):
     if len(self)==0: return self
     if isinstance(i,H2OFrame):
       if len(i) != len(self):
-        raise ValueError("Frame len()="+len(self)+" cannot be broadcast across len(i)="+len(i))
-      return H2OFrame(vecs=[x+y for x,y in zip(self._vecs,i._vecs)])
+        raise ValueError("Frame len()="+str(len(self))+" cannot be broadcast across len(i)="+str(len(i)))
+      return self._fused("+",i) or H2OFrame(vecs=[x+y for x,y in zip(self._vecs,i._vecs)])
     if isinstance(i,Vec):
       if len(i) != len(self._vecs[0]):
-        raise ValueError("Vec len()="+len(self._vecs[0])+" cannot be broadcast across len(i)="+len(i))
-      return H2OFrame(vecs=[x+i for x in self._vecs])
-    if isinstance(i,int):
+        raise ValueError("Vec len()="+str(len(self._vecs[0]))+" cannot be broadcast across len(i)="+str(len(i)))
       return H2OFrame(vecs=[x+i for x in self._vecs])
+    if isinstance(i,(int,float)):
+      return self._fused("+",i) or H2OFrame(vecs=[x+i for x in self._vecs])
     raise NotImplementedError
 
   def __radd__(self,i): return self+i  # Add is associative
 
+  # One frame-level op over whole frames of cluster data (or a frame and a
+  # scalar), instead of a Rapids op per column.  The result columns are lazy
+  # columns of the one result frame.  None if an operand has local or
+  # separately pending columns; those go column by column.
+  def _fused(self,op,i):
+    l = _frame_expr(self)
+    r = _frame_expr(i) if isinstance(i,H2OFrame) else Expr(i)
+    if l is None or r is None: return None
+    f = Expr(op,l,r,length=len(self._vecs[0]))
+    f._ncols = len(self)
+    f._name = "TMP_frame"
+    return H2OFrame(vecs=[Vec(v._name,Expr("col",f,Expr(c),length=len(f))) for c,v in enumerate(self._vecs)])
+
+  # Force evaluation of all pending columns here (and in any other frames,
+  # Vecs or Exprs passed in) in one batch, instead of a request per column
+  def compute(self,*exprs):
+    compute(self,*exprs)
+    return self
+
+  # compute() in the background; an H2OFuture resolving to this frame
+  def compute_async(self,*exprs):
+    return _async().compute(self,*exprs).then(lambda x: self)
+
+  # The frame as a NumPy structured array, a field per column; optionally
+  # just some columns (by name or index) and the first nrows rows
+  def to_numpy(self,cols=None,nrows=None):
+    vecs = self._vecs if cols is None else [self[c] for c in cols]
+    return _to_numpy(vecs,nrows)
+
 
 ##############################################################################
 # A single column of uniform data, possibly lazily computed
@@ -88,38 +126,57 @@ class Vec(object):
     self._expr = expr  # Always an expr
     expr._name = name  # Pass name along to expr
 
-  # Append a value during CSV read, convert to float
-  def append(self,data):
-    __x__ = data
-    try: __x__ = float(data)
-    except ValueError: pass
-    self._expr._data.append(__x__)
-    self._expr._len+=1
-
   # Print self
   def show(self): return self._name+" "+self._expr.show()
   # Comment out to help in debugging
   def __str__(self): return self.show()
 
-  # Basic indexed or sliced lookup
+  # The column as a 1-D NumPy array; optionally just the first nrows rows
+  def to_numpy(self,nrows=None):
+    a = _to_numpy([self],nrows)
+    return a[a.dtype.names[0]]
+
+  # Basic indexed or sliced lookup.  Slices, and any lookup on cluster data,
+  # are answered directly (cluster data through the page cache); local row
+  # lookups stay lazy.
   def __getitem__(self,i):
+    if isinstance(i,slice) or not self._expr.isLocal():
+      return self._expr[i]
     e = Expr(i)
     return Expr("[",self,e,length=len(e));
 
-  # Basic (broadening) addition
-  def __add__(self,i):
-    if isinstance(i,Vec):       # Vec+Vec
+  # Iterate over all rows, a page at a time
+  def __iter__(self):
+    step = H2OCONN._page_rows if H2OCONN else 1000
+    for lo in xrange(0,len(self),step):
+      for x in self._expr[lo:lo+step]: yield x
+
+  # Basic (broadening) arithmetic
+  def _binop(self,op,i):
+    if isinstance(i,Vec):       # Vec op Vec
       if len(i) != len(self):
-        raise ValueError("Vec len()="+len(self)+" cannot be broadcast across len(i)="+len(i))
-      return Vec(self._name+"+"+i._name,Expr("+",self,i))
-    if isinstance(i,(int,float)): # Vec+int
-      if i==0: return self        # Additive identity
-      return Vec(self._name+"+"+str(i),Expr("+",self,Expr(i)))
+        raise ValueError("Vec len()="+str(len(self))+" cannot be broadcast across len(i)="+str(len(i)))
+      return Vec(_vname(self._name,op,i._name),Expr(op,self,i))
+    if isinstance(i,(int,float)): # Vec op int
+      return Vec(_vname(self._name,op,str(i)),Expr(op,self,Expr(i)))
     raise NotImplementedError
 
+  def __add__(self,i):
+    if isinstance(i,(int,float)) and i==0: return self  # Additive identity
+    return self._binop("+",i)
   def __radd__(self,i): return self+i  # Add is associative
+  def __sub__(self,i): return self._binop("-",i)
+  def __mul__(self,i): return self._binop("*",i)
+  def __rmul__(self,i): return self*i  # Multiply is associative
+  def __div__(self,i): return self._binop("/",i)
 
-  def mean(self): return Expr("mean",self._expr,None,length=1)
+  # Reductions to a single (lazy) value
+  def mean(self): return self._reduce("mean")
+  def sum (self): return self._reduce("sum")
+  def min (self): return self._reduce("min")
+  def max (self): return self._reduce("max")
+  def sd  (self): return self._reduce("sd")
+  def _reduce(self,op): return Expr(op,self._expr,None,length=1)
 
   # Number of rows
   def __len__(self): return len(self._expr)
@@ -155,19 +212,32 @@ class Expr(object):
     self._rite = rite._expr if isinstance(rite,Vec) else rite
     assert self._left is None or isinstance(self._left,Expr) or isinstance(self._data,unicode), self.debug()
     assert self._rite is None or isinstance(self._rite,Expr) or isinstance(self._data,unicode), self.debug()
+    # Count of pending parents pointing at us; more than one means shared
+    self._nparents = 0
+    self._where = None          # Pending: 'local' or 'remote', once planned
+    self._other = None          # This data, uploaded to or pulled from the cluster
+    self._cform = None          # Canonical form, once known; () if uncacheable
+    self._ncols = 1             # Columns; more for frame-level ops
+    self._col = None            # Remote: column of the key, if a frame's
+    self._frame = None          # Remote column: the frame Expr owning the key
+    self._args = None           # cbind: the remote columns bound
+    self._vec = False           # Remote: a bare Vec key (parsed or uploaded), not a Frame
+    self._fkey = None           # Remote Vec: a temp Frame copy of it, for Frame-only endpoints
+    for x in (self._left,self._rite):
+      if x is not None: x._nparents += 1
     # Compute length eagerly
     if self.isRemote():
       assert length is not None
       self._len  = length
     elif self.isLocal():
-      self._len = len(self._data) if isinstance(self._data,list) else 1
+      self._len = len(self._data) if isinstance(self._data,_LOCAL_COLS) else 1
     else:
       self._len = length if length else len(self._left)
     assert self._len is not None
 
-  def isLocal   (self): return isinstance(self._data,(list,int,float))
+  def isLocal   (self): return isinstance(self._data,_LOCAL_COLS+(int,float))
   def isRemote  (self): return isinstance(self._data,unicode)
-  def isPending (self): return self._data==None
+  def isPending (self): return self._data is None
   def isComputed(self): return not self.isPending()
 
   # Length, generally withOUT triggering an eager evaluation
@@ -185,123 +255,893 @@ class Expr(object):
   def show(self):
     self.eager()
     if isinstance(self._data,unicode):
-      j = H2OCONN.Frame(self._data)
-      data = j['frames'][0]['columns'][0]['data']
+      j = H2OCONN.Frame(_frame_key(self))
+      data = j['frames'][0]['columns'][self._col or 0]['data']
       return str(data)
+    if isinstance(self._data,_LOCAL_COLS): return str(list(self._data))
     return self._data.__str__()
   # Comment out to help in debugging
   def __str__(self): return self.show()
 
-  # Basic indexed or sliced lookup
+  # Basic indexed or sliced lookup.  Big data is fetched a page of rows at a
+  # time through the connection's page cache; a single row of a bare Vec key
+  # is looked up by Rapids instead, as the Frames endpoint only takes Frames.
   def __getitem__(self,i): 
     x = self.eager()
-    if self.isLocal(): return x[i]
-    if not isinstance(i,int): raise NotImplementedError  # need a bigdata slice here
-    # ([ %vec #row #0)
-    #j = H2OCONN.Rapids("([ %"+str(self._data)+" #"+str(i)+" #0)")
-    #return j['scalar']
-    raise NotImplementedError
+    if not self.isRemote(): return x[i]
+    if isinstance(i,slice):
+      start,stop,step = i.indices(self._len)
+      if step < 0: return [self[r] for r in xrange(start,stop,step)]
+      return H2OCONN.rows(_frame_key(self),self._col or 0,start,stop)[::step]
+    if not isinstance(i,(int,long)): raise NotImplementedError
+    if i < 0: i += self._len
+    if not 0 <= i < self._len: raise IndexError("row "+str(i)+" out of range for "+str(self._len)+" rows")
+    if self._vec and self._fkey is None:
+      j = H2OCONN.Rapids("([ %"+str(x)+" #"+str(i)+" #0)")
+      return j['scalar'] if j.get('string') is None else j['string']
+    return H2OCONN.rows(_frame_key(self),self._col or 0,i,i+1)[0]
 
   # Small-data add; result of a (lazy but small) Expr vs a plain int/float
   def __add__ (self,i): return self.eager()+i
   def __radd__(self,i): return self+i  # Add is associative
 
+  # Never blocks on the cluster: the key is queued and removed in bulk later.
+  # Keys dying while a Rapids program is gathered may still be named by it,
+  # so are held back until the program has run.
   def __del__(self):
-    if self.isPending() or self.isLocal(): return  # Dead pending op or local data; nothing to delete
-    assert self.isRemote()
-    global _CMD;  
-    if _CMD is None:
-      H2OCONN.Remove(self._data)
-    else:
-      s = "DELE: "+self._name+" key="+self._rite+ "; "
-      _CMD += s  # Tell cluster to delete temp as part of larger expression
-      raise NotImplementedError
+    if self.isPending():        # Dead pending op; its inputs lose a parent
+      for x in (self._left,self._rite):
+        if x is not None: x._nparents -= 1
+      return
+    if not self.isRemote(): return  # Local data; nothing to delete
+    if not H2OCONN: return      # Connection gone; nothing to remove through
+    if self._fkey is not None: H2OCONN.RemoveLater(self._fkey)
+    if self._col is not None: return  # Key belongs to the frame Expr
+    if H2OCONN._results and H2OCONN._results.release(self._data): return  # Kept by the cache
+    if _CMD is None: H2OCONN.RemoveLater(self._data)
+    else: _DYING.append(self._data)
 
   # This forces a top-level execution, as needed, and produces a top-level
   # result LOCALLY.  Frames are returned and truncated to the standard head()
   # response - 200cols by 100rows.
   def eager(self):
-    if self.isComputed(): return self._data
-    # Gather the computation path for remote work, or doit locally for local work
-    global _CMD; assert not _CMD;  assert not self._name.startswith("TMP_")
-    _CMD = "";                  # Begin gathering rapids commands
-    self._doit();               # Execute the command
-    cmd = _CMD;  _CMD = None;   # Stop  gathering rapids commands
-    if self.isLocal():  return self._data # Local computation, all done
-    # Remote computation - ship Rapids over wire, assigning key to result
-    j = H2OCONN.Rapids(cmd)
-    if isinstance(self._data,unicode): pass  # Big Data Key is the result
-    # Small data result pulled locally
-    else: self._data = j['head'] if j['num_rows'] else j['scalar']
+    if self.isPending(): _eval([self])
+    _landed(self)
     return self._data
 
+  # Planning pass over the pending DAG, before any Rapids is emitted.
+  # Pending nodes computing the same op over the same inputs are merged into
+  # the first one seen, so each distinct subexpression appears once; a node
+  # left with several pending parents is then computed once into a temp key
+  # by _doit, and referenced by key everywhere else.  Bottom-up, each node is
+  # also placed in-process or on the cluster.  Iterative, so arbitrarily
+  # deep chains plan without recursion.
+  def _plan(self,seen,done):
+    todo = [(self,False)]
+    while todo:
+      e,kids_done = todo.pop()
+      if not kids_done:
+        if id(e) in done: continue
+        done.add(id(e))
+        if H2OCONN and H2OCONN._results and H2OCONN._results.lookup(e): continue
+        e._balance()
+        todo.append((e,True))
+        for x in (e._rite,e._left):
+          if x is not None and x.isPending(): todo.append((x,False))
+        continue
+      for side in ('_left','_rite'):
+        x = getattr(e,side)
+        if x is None or not x.isPending(): continue  # Computed, or answered by the result cache
+        y = seen.setdefault(x._skey(),x)
+        if y is not x: e._swap(side,y)  # Structural duplicate; share the first one
+      e._where = e._place()
+
+  # Rebalance a long chain of one associative op, e.g. the left-deep chain
+  # sum() builds over many columns, into a balanced tree.  Only unshared
+  # temps in the chain are regrouped; anything held elsewhere is an operand.
+  def _balance(self):
+    if self._op not in _ASSOC or self._name == "TMP_tree": return
+    leaves,todo = [],[self._rite,self._left]
+    while todo:
+      x = todo.pop()
+      if x.isPending() and x._op == self._op and x._nparents == 1 and \
+         x._name.startswith("TMP_") and x._ncols == self._ncols:
+        todo.append(x._rite)
+        todo.append(x._left)
+      else: leaves.append(x)
+    if len(leaves) <= _BALANCE_MIN: return
+    h = len(leaves)//2
+    l,r = _balanced(self._op,leaves[:h],self),_balanced(self._op,leaves[h:],self)
+    for x in (self._left,self._rite): x._nparents -= 1
+    for x in (l,r): x._nparents += 1
+    self._left,self._rite = l,r  # The old chain dies, releasing its operands
+
+  # Settle where a planned pending node computes.  An op mixing a local Vec
+  # with a remote one first moves one operand across: an already computed
+  # remote operand no bigger than PULL_ROWS is pulled into the python process
+  # when the measured link says that is cheaper than uploading; otherwise the
+  # local operand is uploaded to the cluster as a temp Vec.
+  def _place(self):
+    if self._op == "cbind": return 'remote'
+    wl,wr = _where(self._left),_where(self._rite)
+    if 'remote' not in (wl,wr): return 'local'
+    if 'local'  not in (wl,wr): return 'remote'
+    loc,rem = ('_left','_rite') if wl=='local' else ('_rite','_left')
+    l,r = getattr(self,loc),getattr(self,rem)
+    if r.isRemote() and len(r) <= PULL_ROWS and \
+       H2OCONN.transfer_secs(1,len(r)*_CSV_BYTES) <= H2OCONN.transfer_secs(3,len(l)*_CSV_BYTES):
+      self._swap(rem,_download(r))
+      return 'local'
+    if l.isPending(): l._doit() # Local subtree; compute it in-process now
+    self._swap(loc,_upload(l))
+    return 'remote'
+
+  # Point an operand at a different Expr computing the same thing
+  def _swap(self,side,x):
+    getattr(self,side)._nparents -= 1
+    x._nparents += 1
+    setattr(self,side,x)
+
+  # Structural identity of a planned pending node: its op over the identities
+  # of its (already merged) inputs
+  def _skey(self):
+    if self._op == "cbind": return (self._op,)+tuple(_skey(a) for a in self._args)
+    return (self._op,_skey(self._left),_skey(self._rite))
+
+  # Take a result from the cache instead of computing it
+  def _answer(self,data):
+    self._data = data
+    for x in (self._left,self._rite):
+      if x is not None: x._nparents -= 1
+    self._left = None
+    self._rite = None
+
+  # A pending column of a frame-level op, once the frame is computed, is just
+  # that column of the frame's key; no per-column copy is made
+  def _bind(self):
+    self._col = self._rite._data
+    self._frame = self._left
+    self._answer(self._left._data)
+
   # External API for eager; called by all top-level demanders (e.g. print)
-  # May trigger (recursive) big-data eval.
+  # May trigger (recursive) big-data eval.  Walks the pending DAG post-order
+  # with an explicit stack, appending Rapids text to the _CMD buffer, so deep
+  # chains neither overflow the stack nor cost quadratic string building.
   def _doit(self):
-    if self.isComputed(): return
-    left = self._left
-    rite = self._rite
-    global _CMD
-    # See if this is not a temp and not a scalar; if so it needs a name
-    py_tmp = not self._name.startswith("TMP_") and self._len > 1
+    todo = [(self,0)]
+    while todo:
+      e,step = todo.pop()
+      if step == 0:
+        if e.isComputed(): continue
+        e._open()
+      elif step == 1: e._middle()
+      else:
+        e._close()
+        continue
+      todo.append((e,step+1))
+      x = e._left if step == 0 else e._rite
+      if x is None: continue
+      if x.isPending(): todo.append((x,0))
+      else: _CMD.append(_leaf(x))
+
+  # Rapids text before the left operand
+  def _open(self):
+    # See if this is not a temp and not a scalar; if so it needs a name.
+    # Shared temps get one too, so they are computed once.  A cbind never
+    # does: its frame shares the Vecs of its columns' keys.
+    py_tmp = (not self._name.startswith("TMP_") or self._nparents > 1) and self._len > 1 and self._op != "cbind"
     if py_tmp:
       self._data = py_tmp_key() # Top-level key/name assignment
-      _CMD += "(= !"+self._data+" "
-    _CMD += "("+self._op+" "
-    if left: 
-      if left.isPending():  left._doit()
-      elif isinstance(left._data,(int,float)): _CMD += "#"+str(left._data)
-      elif isinstance(left._data,unicode):     _CMD += "%"+str(left._data)
-      else:                                    pass # Locally computed small data
-    _CMD += " "
-    if rite: 
-      if rite.isPending():  rite._doit()
-      elif isinstance(rite._data,(int,float)): _CMD += "#"+str(rite._data)
-      elif isinstance(rite._data,unicode):     _CMD += "%"+str(rite._data)
-      else:                                    pass # Locally computed small data
-
-    if self._op == "+":
-      if isinstance(left._data,(int,float)):
-        if isinstance(rite._data,(int,float)):    self._data = left+rite
-        elif rite.isLocal():                      self._data = [left+x for x in rite._data]
-        else:                                     pass
-      elif isinstance(rite._data,(int,float)):
-        if left.isLocal():                        self._data = [x+rite for x in left._data]
-        else:                                     pass
-      else:
-        if   left.isLocal () and rite.isLocal (): self._data = [x+y for x,y in zip(left._data,rite._data)]
-        elif (left.isRemote() or left._data is None) and \
-             (rite.isRemote() or rite._data is None): pass
-        else: raise NotImplementedError
+      _CMD.append("(= !"+self._data+" ")
+    _CMD.append("("+_RAPIDS_OPS.get(self._op,self._op)+" ")
+
+  # Rapids text between the operands
+  def _middle(self):
+    _CMD.append(" ")
+    if self._op == "col": _CMD.append('"null" ')  # All rows
+
+  # Compute locally, or finish the Rapids text, once both operands are done
+  def _close(self):
+    left = self._left
+    rite = self._rite
+    py_tmp = self._data is not None  # Given a key by _open
+    if self._op == "cbind":
+      _CMD.append(" ".join(_ref(a) for a in self._args))
+    elif self._op == "col": pass
+    elif self._op in _BINOPS:
+      if left.isLocal() and rite.isLocal():
+        self._data = LOCAL_ENGINE.binop(self._op,left._data,rite._data)
+      elif isinstance(left._data,_LOCAL_COLS) or isinstance(rite._data,_LOCAL_COLS):
+        raise NotImplementedError  # Local Vec mixed with a remote one
+      else: pass                # Remote (or scalar) operands, all in the Rapids
     elif self._op == "[":
       if left.isLocal(): self._data = left._data[rite._data]
-      else: _CMD += " #0"       # Rapids column zero lookup
-    elif self._op == "mean":
-      if left.isLocal(): self._data = sum(left._data)/len(left._data)
-      else: _CMD += " #0 %TRUE" # Rapids mean extra args (trim=0, rmNA=TRUE)
+      else: _CMD.append(" #0")  # Rapids column zero lookup
+    elif self._op in _REDUCERS:
+      if left.isLocal(): self._data = LOCAL_ENGINE.reduce(self._op,left._data)
+      else: _CMD.append(_REDUCERS[self._op])
     else:
       raise NotImplementedError
-    _CMD += ")"
+    _CMD.append(")")
     if py_tmp:
-      _CMD += ")"
-    self._left = None # Trigger GC/ref-cnt of temps
+      _CMD.append(")")
+      if self._where == 'remote' and _cform(self): _MADE.append(self)
+    # Inlined into the Rapids without a key, so its value is not kept: keep
+    # the inputs too, so it can be computed again (or by another program)
+    if self.isPending(): return
+    # Trigger GC/ref-cnt of temps
+    for x in (left,rite):
+      if x is not None: x._nparents -= 1
+    self._left = None
     self._rite = None
+
+# Compute a batch of pending root Exprs as ONE Rapids program.  Each root is
+# a statement of its own; the cluster runs them in order and replies with the
+# value of the last one, so only the last root may be a small-data (scalar)
+# result - all others must land in keys.  Common subexpressions are merged
+# across the whole batch.
+def _eval(roots):
+  # Columns of pending frame-level ops are computed by computing the frames
+  binds = [e for e in roots if e.isPending() and e._op == "col"]
+  if binds:
+    bound = set(id(e) for e in binds)
+    frames,seen = [],set()
+    for e in binds:
+      f = e._left
+      if f.isPending() and id(f) not in seen:
+        seen.add(id(f))
+        f._name = "frame"       # Wanted in its own right; give it a key
+        frames.append(f)
+    rest = [e for e in roots if id(e) not in bound]
+    if frames or rest: _eval(frames+rest)
+    with _LOCK:
+      for e in binds:
+        if e.isPending(): e._bind()
     return
+  # Programs are built one at a time, but several may be on the wire at once
+  # (see AsyncH2OConnection).  Keys a program assigns are in flight until it
+  # has run; a later program naming one waits for it before going out.
+  with _LOCK:
+    roots = [e for e in roots if e.isPending()]  # Others may have been computed meanwhile
+    if not roots: return
+    prog,made,reads = _build(roots)
+    if prog is None:            # Local computation, all done
+      _release_dying()
+      return
+    waits = set(_INFLIGHT[k] for k in _KEYREFS.findall(prog) if k in _INFLIGHT)
+    ran = threading.Event()
+    mine = _ASSIGNED.findall(prog)
+    for k in mine: _INFLIGHT[k] = ran
+  # Remote computation - ship Rapids over wire, assigning keys to results
+  try:
+    for w in waits: w.wait()
+    j = H2OCONN.Rapids(prog)
+  finally:
+    with _LOCK:
+      for k in mine: del _INFLIGHT[k]
+    ran.set()
+    _release_dying()
+  with _LOCK:
+    last = roots[-1]
+    if isinstance(last._data,unicode): pass  # Big Data Key is the result
+    # Small data result pulled locally
+    elif last.isPending():
+      last._answer(j['head'] if j['num_rows'] else j['scalar'])
+      if not j['num_rows'] and _cform(last): made.append((last,reads))
+    if H2OCONN._results:
+      for e,reads in made: H2OCONN._results.put(_cform(e),e._data,e._len*e._ncols,reads)
+
+# Plan and serialize pending roots into one Rapids program, computing local
+# work in-process.  Returns the program (None if all the work was local), the
+# made (Expr,reads) pairs to cache, and the last statement's reads.
+def _build(roots):
+  # Gather the computation path for remote work, or doit locally for local work
+  global _CMD; assert not _CMD
+  _CMD = [];                    # Planning may compute local subtrees
+  del _MADE[:]
+  try:
+    seen,done = {},set()
+    for e in roots:
+      assert not e._name.startswith("TMP_")
+      e._plan(seen,done)        # Merge common subexpressions
+    stmts,made,reads = [],[],None  # Keep made keys alive until they are cached
+    for e in roots:
+      # The cluster looks up a statement's keys as it parses it, so a shared
+      # temp cannot be assigned and read within one statement: each is
+      # computed by a statement of its own, ahead of the root's
+      for x in _shared(e)+[e]:
+        _CMD = [];              # Begin gathering rapids commands
+        x._doit();              # Execute the command
+        if (x.isPending() or x.isRemote()) and _CMD:
+          stmts.append("".join(_CMD))
+          reads = set(_KEYREFS.findall(stmts[-1]))
+          made += [(y,reads) for y in _MADE]
+        del _MADE[:]
+  finally:
+    _CMD = None;                # Stop  gathering rapids commands
+  return (_program(stmts) if stmts else None),made,reads
+
+# Planned pending nodes below e which _doit gives a temp key and which more
+# than one parent reads, innermost first
+def _shared(e):
+  out,todo,seen = [],[(e,False)],set()
+  while todo:                   # Post-order, without recursion
+    x,kids_done = todo.pop()
+    if kids_done:
+      if x is not e and x._nparents > 1 and x._where == 'remote' and len(x) > 1 and x._op != "cbind":
+        out.append(x)
+      continue
+    if id(x) in seen: continue
+    seen.add(id(x))
+    todo.append((x,True))
+    for y in (x._rite,x._left):
+      if y is not None and y.isPending(): todo.append((y,False))
+  return out
+
+# Wait until a computed Expr's key, if in flight, has been assigned
+def _landed(e):
+  ran = _INFLIGHT.get(e._data) if e.isRemote() else None
+  if ran: ran.wait()
+
+# Guards the Expr DAGs, _CMD and _INFLIGHT while programs are built/finished
+_LOCK = threading.RLock()
+# Keys assigned by programs on the wire -> Event set once that program has run
+_INFLIGHT = {}
+
+# Pending Exprs given keys by the Rapids being gathered; cached once it runs
+_MADE = []
+
+# Keys read by Rapids text
+_KEYREFS = re.compile(r"%([^ )]+)")
+
+# Keys which died while a Rapids program was gathered; queued for removal
+# once it has run, then the queue is flushed on the back of the program
+_DYING = []
+def _release_dying():
+  if not H2OCONN: return        # Local-only; no keys to remove
+  while _DYING: H2OCONN.RemoveLater(_DYING.pop())
+  H2OCONN.flush_removes(wait=False)
+
+# Join Rapids statements into one multi-statement program
+def _program(stmts): return stmts[0] if len(stmts)==1 else ";;".join(stmts)+";;;"
+
+# Force evaluation of many Exprs - or the Exprs behind Vecs and H2OFrames -
+# with as few round trips as possible.  Pending Vec-sized results are all
+# computed by a single Rapids program; since a program returns only one
+# small-data value, each further pending scalar costs one more program.
+def compute(*exprs):
+  todo = []
+  for x in exprs:
+    if   isinstance(x,H2OFrame): todo += [v._expr for v in x._vecs]
+    elif isinstance(x,Vec):      todo.append(x._expr)
+    elif isinstance(x,Expr):     todo.append(x)
+    else: raise ValueError("Can only compute H2OFrames, Vecs and Exprs, not "+str(type(x)))
+  seen,pending = set(),[]
+  for e in todo:
+    _landed(e)
+    if e.isPending() and id(e) not in seen:
+      seen.add(id(e))
+      pending.append(e)
+  scalars = [e for e in pending if len(e)==1]
+  bigs    = [e for e in pending if len(e) >1]
+  for prog in [bigs+scalars[:1]] + [[e] for e in scalars[1:]]:
+    if prog: _eval(prog)
+
+# Where an operand lives: 'remote', 'local' (a local Vec, or a pending
+# in-process computation of one), or None for local scalars, which fit into
+# any Rapids expression
+def _where(x):
+  if x is None: return None
+  w = x._where if x.isPending() else ('remote' if x.isRemote() else 'local')
+  return None if w=='local' and len(x)==1 else w
+
+# Copy a remote Vec into the python process; cached on the remote Expr.
+# DownloadDataset takes only Frames, so a bare Vec key goes by a temp frame.
+def _download(x):
+  if x._other is None:
+    names,cols = _read_csv(H2OCONN.DownloadCSV(_frame_key(x)).splitlines())
+    x._other = Expr(cols[x._col or 0])
+  return x._other
+
+# Copy a local Vec to the cluster as a temp Vec; cached on the local Expr, so
+# the temp is removed when the local data dies
+def _upload(x):
+  if x._other is None:
+    out = StringIO.StringIO()
+    csv.writer(out).writerows(('' if v!=v else repr(v),) if isinstance(v,float) else (v,) for v in x._data)
+    rawkey = H2OCONN.PostFile(out.getvalue(),py_tmp_key()+".csv")
+    parse  = H2OCONN.Parse(H2OCONN.ParseSetup(rawkey),py_tmp_key())
+    x._other = Expr(parse['vecKeys'][0]['name'],length=parse['rows'])
+    x._other._vec = True
+  return x._other
+
+# A Frame key holding a remote Expr's data, for the endpoints which take only
+# Frames (Frames, DownloadDataset).  A bare Vec key is copied once into a
+# temp frame by cbind; the temp is removed when the Expr dies.
+def _frame_key(x):
+  if not x._vec: return x._data
+  with _LOCK:
+    if x._fkey is None:
+      fkey = py_tmp_key()
+      H2OCONN.Rapids("(= !"+fkey+" (cbind %"+x._data+"))")
+      x._fkey = fkey
+  return x._fkey
+
+# Identity of an Expr input, for structural matching of pending nodes
+def _skey(x):
+  if x is None:        return None
+  if x.isPending():    return ('p',id(x))
+  if x.isRemote():     return ('%',x._data,x._col)
+  if isinstance(x._data,_LOCAL_COLS): return ('l',id(x._data))
+  return ('#',x._data)
+
+# Canonical form of an Expr's computation, for the result cache: a digest of
+# its op over the canonical forms of its inputs, naming cluster data by key
+# and scalars by value.  Digests keep forms flat however deep the DAG.
+# Computed results keep the form of the computation that made them.  Empty
+# if local columns are read; those are not cached.
+def _cform(x):
+  if x is None: return None
+  todo = [x]
+  while todo:                   # Post-order, without recursion
+    y = todo[-1]
+    if y._cform is not None: todo.pop(); continue
+    kids = y._args if y._op == "cbind" else (y._left,y._rite) if y.isPending() else ()
+    kids = [k for k in kids if k is not None]
+    more = [k for k in kids if k._cform is None]
+    if more:
+      todo += more
+      continue
+    todo.pop()
+    if   y.isRemote(): y._cform = "%"+y._data+"#"+str(y._col)
+    elif kids or y.isPending():
+      forms = [k._cform for k in kids]
+      y._cform = "" if "" in forms else hashlib.sha1(y._op+"("+" ".join(forms)+")").hexdigest()
+    elif isinstance(y._data,_LOCAL_COLS): y._cform = ""
+    else: y._cform = "#"+repr(y._data)
+  return x._cform
+
+# The frame-level op Expr a column Expr is from, and the column; else Nones
+def _column_of(e):
+  if e.isPending(): return (e._left,e._rite._data) if e._op == "col" else (None,None)
+  return e._frame,e._col
+
+# Name of a derived Vec.  Long names are elided in the middle, so chains of
+# ops (e.g. sum() over thousands of columns) do not build quadratic names.
+def _vname(l,op,r):
+  n = l+op+r
+  return n if len(n) <= 64 else n[:30]+"..."+n[-30:]
+
+# Balanced tree of op over operands, in order; new nodes are temps
+def _balanced(op,xs,like):
+  if len(xs) == 1: return xs[0]
+  h = len(xs)//2
+  e = Expr(op,_balanced(op,xs[:h],like),_balanced(op,xs[h:],like),length=like._len)
+  e._ncols = like._ncols
+  e._name = "TMP_tree"          # Balanced already
+  return e
+
+# Rapids text for a computed operand: a key, a scalar, or nothing for local
+# data computed in-process
+def _leaf(x):
+  if isinstance(x._data,(int,float)): return "#"+str(x._data)
+  if isinstance(x._data,unicode):     return _ref(x)
+  return ""
+
+# Rapids reference to computed cluster data: a key, or a column of one
+def _ref(x):
+  if x._col is None: return "%"+str(x._data)
+  return '([ %'+str(x._data)+' "null" #'+str(x._col)+')'
+
+# An Expr for a whole H2OFrame, for frame-level ops.  A frame which is all
+# the columns, in order, of one frame-level op is that op (fusing chains of
+# frame ops into one expression); a frame of computed cluster columns is
+# their cbind.  Otherwise None.
+def _frame_expr(fr):
+  es = [v._expr for v in fr._vecs]
+  f = _column_of(es[0])[0]
+  if f is not None and f._ncols == len(es) and \
+     all(_column_of(e) == (f,c) for c,e in enumerate(es)):
+    return f
+  if all(e.isRemote() for e in es):
+    cb = Expr("cbind",length=len(es[0]))
+    cb._args = es
+    cb._ncols = len(es)
+    cb._name = "TMP_cbind"
+    return cb
+  return None
+
+# Parse an imported raw key into cluster Vecs, one per column
+def _parse_vecs(conn,rawkey):
+  parse  = conn.Parse(conn.ParseSetup(rawkey),py_tmp_key())
+  rows   = parse['rows']
+  vecs = [Vec(str(col),Expr(op=veckey['name'],length=rows)) for col,veckey in zip(parse['columnNames'],parse['vecKeys'])]
+  for v in vecs: v._expr._vec = True
+  return vecs
 
 # Global list of pending expressions and deletes to ship to the cluster
 _CMD = None
 
 
+##############################################################################
+#
+# Concurrent import of many cluster-side files
+#
+
+# Import and parse many cluster-side files at once.  Takes a path, a glob
+# pattern, or a list of either; returns an H2OFuture per file, in order, each
+# resolving to an H2OFrame.  Up to 'workers' files are in flight at once:
+# each worker runs a file through ImportFiles, ParseSetup and Parse, so
+# imports and setups overlap other files' parses, and the cluster parses
+# several files together.  Use as_completed() to take frames as they finish.
+def import_files(paths,workers=8):
+  if not H2OCONN: raise ValueError("No open h2o connection")
+  conn = H2OCONN
+  if isinstance(paths,basestring): paths = [paths]
+  todo = Queue.Queue()
+  futures = []
+  for path in paths:
+    if _GLOB.search(path):      # One import of the directory, then filter
+      d,pat = path.rsplit('/',1) if '/' in path else ('.',path)
+      for f,key in conn.ImportFiles(d or '/'):
+        if fnmatch.fnmatch(os.path.basename(f),pat) and (d=='.' or os.path.dirname(f).endswith(os.path.normpath(d))):
+          futures.append(H2OFuture(f,key))
+        else: conn.RemoveLater(key)
+    else: futures.append(H2OFuture(path))
+  for fut in futures: todo.put(fut)
+  def work():
+    while True:
+      try:    fut = todo.get_nowait()
+      except Queue.Empty: return
+      fut._run(lambda: H2OFrame(vecs=_parse_vecs(conn,fut._rawkey or conn.ImportFile(fut.path))))
+  for i in range(min(workers,len(futures))):
+    t = threading.Thread(target=work)
+    t.daemon = True
+    t.start()
+  return futures
+
+# Glob metacharacters in a path
+_GLOB = re.compile(r"[*?[]")
+
+# Yield futures in the order they complete
+def as_completed(futures):
+  done = Queue.Queue()
+  for fut in futures: fut._notify(done)
+  for i in range(len(futures)): yield done.get()
+
+# The pending result of work running on another thread
+class H2OFuture(object):
+  def __init__(self,path=None,rawkey=None):
+    self.path = path            # Cluster-side file being imported, if an import
+    self._rawkey = rawkey       # Raw key, if already imported
+    self._result = None
+    self._exc = None
+    self._done = threading.Event()
+    self._lock = threading.Lock()
+    self._waiters = []          # Queues told on completion
+
+  def done(self): return self._done.is_set()
+
+  # Block until done; return the result or raise the failure
+  def result(self,timeout=None):
+    if not self._done.wait(timeout): raise RuntimeError("Timed out waiting for "+(self.path or "result"))
+    if self._exc: raise self._exc[0],self._exc[1],self._exc[2]
+    return self._result
+
+  def _run(self,fcn):
+    try:    self._result = fcn()
+    except Exception: self._exc = sys.exc_info()
+    with self._lock:
+      self._done.set()
+      for q in self._waiters: q.put(self)
+
+  def _notify(self,q):
+    with self._lock:
+      if self.done(): q.put(self)
+      else: self._waiters.append(q)
+
+  # A future for fcn applied to this one's result, once it is done
+  def then(self,fcn):
+    fut = H2OFuture(self.path)
+    q = Queue.Queue()
+    def wait():
+      q.get()
+      fut._run(lambda: fcn(self.result()))
+    t = threading.Thread(target=wait)
+    t.daemon = True
+    t.start()
+    self._notify(q)
+    return fut
+
+
+##############################################################################
+#
+# Local data: columnar storage and execution engines
+#
+
+# Binary ops shared by the cluster and the local engines; Rapids divides in
+# doubles, so '/' is true division here too
+_BINOPS = {'+':operator.add, '-':operator.sub, '*':operator.mul, '/':operator.truediv}
+
+# Reductions, and the extra Rapids args each takes on the cluster.  All
+# remove NAs (na.rm=TRUE); mean also takes a trim of zero.
+_REDUCERS = {'mean':" #0 %TRUE", 'sum':" %TRUE", 'min':" %TRUE", 'max':" %TRUE", 'sd':" %TRUE"}
+
+# Associative ops; long chains of one are rebalanced into trees of depth
+# log(n), so the cluster's recursive parser never sees a deep chain
+_ASSOC = set(['+','*'])
+_BALANCE_MIN = 8                # Shorter chains keep their exact grouping
+
+# Rapids spelling of ops named differently here: a column of a frame-level op
+# is a column slice over all rows
+_RAPIDS_OPS = {'col':"["}
+
+# Pure-python local engine.  Runs the cluster's binary ops and reductions
+# over local columns (or scalars), one boxed element at a time.
+class PyEngine(object):
+  def binop(self,op,l,r):
+    f = _div if op=='/' else _BINOPS[op]
+    if isinstance(l,_LOCAL_COLS):
+      if isinstance(r,_LOCAL_COLS): return [f(x,y) for x,y in itertools.izip(l,r)]
+      return [f(x,r) for x in l]
+    if isinstance(r,_LOCAL_COLS): return [f(l,y) for y in r]
+    return f(l,r)
+
+  def reduce(self,op,x):
+    xs = [v for v in x if v==v]  # Drop NAs
+    n = len(xs)
+    if op=='sum':  return float(sum(xs))
+    if op=='min':  return float(min(xs)) if n else float('inf')
+    if op=='max':  return float(max(xs)) if n else float('-inf')
+    if n==0: return float('nan')
+    mean = float(sum(xs))/n
+    if op=='mean': return mean
+    if op=='sd':   return math.sqrt(sum((v-mean)**2 for v in xs)/(n-1)) if n > 1 else float('nan')
+    raise NotImplementedError
+
+# Division as the cluster does it: in doubles, with no exception on zero
+def _div(x,y):
+  if y: return float(x)/y
+  return float('nan') if x==0 or x!=x else math.copysign(float('inf'),x)
+
+# NumPy local engine.  Same ops as PyEngine, vectorized over float64 arrays.
+class NumPyEngine(PyEngine):
+  _REDUCE = {'sum':np.sum, 'min':np.min, 'max':np.max, 'mean':np.mean} if np else {}
+
+  def binop(self,op,l,r):
+    if not (isinstance(l,_LOCAL_COLS) or isinstance(r,_LOCAL_COLS)):
+      return super(NumPyEngine,self).binop(op,l,r)
+    l,r = _f64(l),_f64(r)
+    if isinstance(l,np.ndarray) and isinstance(r,np.ndarray) and len(l) != len(r):
+      n = min(len(l),len(r))    # Cut to the shorter column, as PyEngine's izip
+      l,r = l[:n],r[:n]
+    with np.errstate(divide='ignore',invalid='ignore'):
+      return _BINOPS[op](l,r)
+
+  # NAs are dropped first.  Too few values left (none; one, for sd) reduce as
+  # in PyEngine - +-inf for min/max, as the cluster - and not by NumPy, which
+  # raises or warns on them.
+  def reduce(self,op,x):
+    x = _f64(x)
+    x = x[~np.isnan(x)]
+    if len(x) < 2: return super(NumPyEngine,self).reduce(op,x.tolist())
+    if op=='sd': return float(np.std(x,ddof=1))
+    return float(self._REDUCE[op](x))
+
+def _f64(x): return np.asarray(x,dtype=np.float64) if isinstance(x,_LOCAL_COLS) else x
+
+# The engine used for all local computation; swap in another engine (e.g.
+# PyEngine to compare against NumPyEngine) by assigning here
+LOCAL_ENGINE = NumPyEngine() if np else PyEngine()
+
+# Largest remote Vec (in rows) pulled into the python process to meet a local
+# one; bigger ones always have the local side uploaded instead
+PULL_ROWS = 100000
+_CSV_BYTES = 16                 # Rough CSV bytes per value moved either way
+
+
+# A dictionary-encoded column of strings: small-int codes into a domain of
+# the distinct strings seen
+class _EnumCol(object):
+  def __init__(self,codes,domain):
+    self._codes  = codes        # array of ints
+    self._domain = domain       # list of strings
+  def __len__(self): return len(self._codes)
+  def __iter__(self): return (self._domain[c] for c in self._codes)
+  def __getitem__(self,i):
+    if isinstance(i,slice): return _EnumCol(self._codes[i],self._domain)
+    return self._domain[self._codes[i]]
+
+  def to_numpy(self): return np.array(self._domain,dtype=object)[np.asarray(self._codes)]
+
+# Types which hold a whole local column of data
+_LOCAL_COLS = (list,array.array,_EnumCol) + ((np.ndarray,) if np else ())
+
+# Bulk-read a python-process-local CSV file into typed columns; returns the
+# list of column names and the list of columns.
+def _read_local_csv(fname):
+  with open(fname,'rb') as csvfile: return _read_csv(csvfile)
+
+# Bulk-read CSV lines, with a header, into typed columns.  Column types are inferred
+# from a leading sample of rows: a column is numeric if every non-empty
+# sampled value parses as a float, else it holds strings.  Rows are then
+# converted a block at a time, column-wise.  Numeric columns land in float64
+# storage (NumPy if available, else array('d')) with NaN for missing or
+# unparseable values, as the cluster's own parser does; string columns are
+# dictionary-encoded.
+def _read_csv(lines,sample=1000,block=65536):
+  rdr = csv.reader(lines)
+  names = [name.strip() for name in next(rdr)]
+  rdr = itertools.ifilter(None,rdr)       # Skip blank lines
+  ncols = len(names)
+  rows = list(itertools.islice(rdr,sample))
+  isnum = [True]*ncols
+  for col,vals in enumerate(_columns(rows,ncols)):
+    for v in vals:
+      if v and _float(v) is None: isnum[col] = False; break
+  num = [[] for n in isnum]     # Per numeric column: list of float64 blocks
+  enum= [{} for n in isnum]     # Per string   column: domain, string to code
+  codes=[array.array('i') for n in isnum]
+  while rows:
+    for col,vals in enumerate(_columns(rows,ncols)):
+      if isnum[col]: num[col].append(_floats(vals))
+      else:
+        dom = enum[col]
+        codes[col].extend([dom.setdefault(v,len(dom)) for v in vals])
+    rows = list(itertools.islice(rdr,block))
+  cols = []
+  for col in range(ncols):
+    if isnum[col]:
+      blocks = num[col]
+      if np: cols.append(np.concatenate([np.asarray(b,dtype=np.float64) for b in blocks]) if blocks else np.empty(0))
+      else:
+        data = array.array('d')
+        for b in blocks: data.extend(b)
+        cols.append(data)
+    else:
+      domain = [None]*len(enum[col])
+      for v,c in enum[col].items(): domain[c] = v
+      cols.append(_EnumCol(codes[col],domain))
+  return names,cols
+
+# Transpose a block of CSV rows into exactly ncols columns; short rows are
+# padded with missing values, extra trailing values are dropped
+def _columns(rows,ncols):
+  cols = list(itertools.izip_longest(*rows,fillvalue=''))[:ncols]
+  return cols + [('',)*len(rows)]*(ncols-len(cols))
+
+# Convert one column block of strings to float64 storage
+def _floats(vals):
+  try:
+    return np.array(vals,dtype=np.float64) if np else array.array('d',map(float,vals))
+  except ValueError:            # Missing or junk values; NA them one by one
+    nan = float('nan')
+    return array.array('d',[nan if f is None else f for f in map(_float,vals)])
+
+# A string as a float, or None if it is not a number
+def _float(s):
+  try:    return float(s)
+  except ValueError: return None
+
+
+# Columns of Vecs, computed first, as one NumPy structured array with a field
+# per Vec: float64 for numeric columns (NaN for missing), object for enum and
+# string ones.  The result is allocated up front.  The wanted cluster columns
+# are bound into one temp frame (Frames and DownloadDataset take only Frame
+# keys), whose CSV is read into the result a block of rows at a time; the
+# download is dropped once nrows rows are in.
+def _to_numpy(vecs,nrows=None,block=65536):
+  if np is None: raise ImportError("to_numpy needs numpy")
+  compute(*vecs)
+  n = len(vecs[0]) if nrows is None else min(nrows,len(vecs[0]))
+  remote = [f for f,v in enumerate(vecs) if v._expr.isRemote()]  # Fields, in temp frame column order
+  types = [object if isinstance(v._expr._data,_EnumCol) else np.float64 for v in vecs]
+  key = None
+  if remote:
+    key = py_tmp_key()
+    H2OCONN.Rapids("(= !"+key+" (cbind "+" ".join(_ref(vecs[f]._expr) for f in remote)+"))")
+  try:
+    if key:                     # Column types, from one row
+      cj = H2OCONN.Frame(key,1,1)['frames'][0]['columns']
+      for c,f in enumerate(remote):
+        if cj[c]['type'] in ('enum','string','uuid'): types[f] = object
+    names = _field_names([v._name for v in vecs])
+    out = np.empty(n,dtype=zip(names,types))
+    for f,v in enumerate(vecs):
+      e = v._expr
+      if e.isRemote(): continue
+      data = e._data[:n] if isinstance(e._data,_LOCAL_COLS) else [e._data]*n
+      out[names[f]] = data.to_numpy() if isinstance(data,_EnumCol) else np.asarray(data)
+    if key:
+      lines = H2OCONN.DownloadLines(key)
+      rdr = itertools.ifilter(None,csv.reader(lines))  # Skip blank lines
+      next(rdr)                 # Header
+      lo = 0
+      while lo < n:
+        rows = list(itertools.islice(rdr,min(block,n-lo)))
+        if not rows: break
+        cols = _columns(rows,len(remote))
+        for c,f in enumerate(remote):
+          out[names[f]][lo:lo+len(rows)] = _floats(cols[c]) if types[f] is np.float64 else cols[c]
+        lo += len(rows)
+      lines.close()             # Drops the rest of the download
+  finally:
+    if key: H2OCONN.RemoveLater(key)
+  return out
+
+# Distinct str field names for a structured array, from column names
+def _field_names(names):
+  seen,out = set(),[]
+  for name in names:
+    base,i = str(name),1
+    name = base
+    while name in seen: name,i = base+"_"+str(i),i+1
+    seen.add(name)
+    out.append(name)
+  return out
+
+
 ##############################################################################
 #
 # Cluster connection
 #
 H2OCONN = None # Default connection
+
+# Connections not yet closed, drained of dead keys at exit.  Held weakly, as
+# are the connections by their reaper threads, so a dropped connection is
+# collected and its reaper ends.
+_OPEN = weakref.WeakSet()
+def _close_all():
+  for conn in list(_OPEN): conn.close()
+atexit.register(_close_all)
+
+# Background removal of a connection's dead keys: when woken, once enough are
+# queued, or on a timer.  Polls the queue size since __del__ cannot safely
+# wake it.  Ends once the connection is closed or collected.
+def _reaper_loop(ref,reap):
+  last = time.time()
+  while True:
+    reap.wait(0.1)
+    conn = ref()
+    if conn is None or conn._closed: return
+    if reap.is_set() or len(conn._dead) >= conn._remove_batch or time.time()-last >= conn._remove_secs:
+      reap.clear()
+      conn._remove_dead()
+      last = time.time()
+    del conn                    # Hold it weakly while waiting
+
 class H2OConnection(object):
-  def __init__(self,ip="localhost",port=54321):
+  def __init__(self,ip="localhost",port=54321,pool_size=10,timeout=None,retries=3,page_rows=1000,page_cache=1024,
+               remove_batch=100,remove_secs=1.0,cache_results=0,cache_bytes=1<<30,hook=None,post_min=2048,gzip_min=1<<16):
     assert isinstance(port,int) and 0 <= port <= 65535
+    assert isinstance(pool_size,int) and pool_size > 0
     self._ip = ip
     self._port = port
+    self._timeout = timeout     # Per-request seconds, or (connect,read); None waits forever
+    self._latency = 0.01        # Link estimates, in seconds and bytes/sec;
+    self._bandwidth = 10e6      # refined from observed traffic
+    self._session = self._make_session(pool_size,retries)
+    self._stats = {}            # Endpoint -> _EndpointStats
+    self._stats_lock = threading.Lock()
+    self.hook = hook            # Optional hook(endpoint,secs,nsent,nrecv,status) per request
+    self._multi = None          # Takes multi-statement Rapids; None till known
+    self._post_min = post_min   # Params at least this long go in a POST body,
+    self._gzip_min = gzip_min   # gzipped from this long; None disables either
+    self._page_rows = page_rows # Rows per page of remote data fetched
+    self._pages = _PageCache(page_cache)
+    self._dead = collections.deque()  # Keys of dead temps, awaiting Remove
+    self._remove_batch = remove_batch # Remove when this many are queued,
+    self._remove_secs = remove_secs   # or at least this often
+    self._reap = threading.Event()    # Wakes the reaper early
+    # Opt-in memo of Rapids results by canonical computation, holding at most
+    # cache_results entries and cache_bytes of cluster data
+    self._results = _ResultCache(cache_results,cache_bytes,self.RemoveLater) if cache_results else None
+    self._asyncs = weakref.WeakSet()  # AsyncH2OConnections over this one
+    self._closed = False
+    self._reaper = threading.Thread(target=_reaper_loop,args=(weakref.ref(self),self._reap))
+    self._reaper.daemon = True
+    self._reaper.start()
+    _OPEN.add(self)                   # Drain the queue at exit, unless closed first
     cld = self.connect()
     ncpus=0;  mmax=0
     for n in cld['nodes']:
@@ -311,6 +1151,51 @@ class H2OConnection(object):
     global H2OCONN
     H2OCONN = self              # Default connection is last openned
 
+  # One keep-alive session per connection, so the chatty lazy-eval path
+  # (eager, __del__) reuses pooled sockets instead of paying a TCP setup per
+  # call.  Only failed connects are retried: many GETs are not idempotent -
+  # Rapids assignments, Parse deleting its source - so a request which may
+  # have reached the cluster is never sent again.  The pool drops sockets the
+  # cluster has closed before reusing them.
+  @staticmethod
+  def _make_session(pool_size,retries):
+    s = requests.Session()
+    retry = Retry(total=retries,connect=retries,read=0,backoff_factor=0.05)
+    s.mount("http://",HTTPAdapter(pool_connections=1,pool_maxsize=pool_size,max_retries=retry))
+    return s
+
+  # Finish the calls queued on async front ends, remove any queued dead keys,
+  # then release the pooled sockets
+  def close(self):
+    _OPEN.discard(self)
+    for a in list(self._asyncs): a.shutdown()
+    self._stop_reaper()
+    self.flush_removes()
+    self._session.close()
+
+  # Queue a dead key for removal by the reaper thread.  Called from __del__,
+  # so must not block or take locks: a deque append is atomic.
+  def RemoveLater(self,key):
+    self._dead.append(key)
+
+  # Remove all queued dead keys now, or just wake the reaper to do so
+  def flush_removes(self,wait=True):
+    if wait: self._remove_dead()
+    elif self._dead: self._reap.set()
+
+  def _remove_dead(self):
+    while True:
+      try:    key = self._dead.popleft()
+      except IndexError: return
+      try:    self.Remove(key)
+      except Exception: pass    # Best effort; cluster may already be gone
+
+  # Stop the reaper before close, and before interpreter exit tears down its globals
+  def _stop_reaper(self):
+    self._closed = True
+    self._reap.set()
+    if self._reaper.is_alive() and self._reaper is not threading.current_thread(): self._reaper.join()
+
   # Dumb url prefix
   def url(self):  return "http://"+self._ip+":"+str(self._port)+"/"
 
@@ -328,20 +1213,25 @@ class H2OConnection(object):
   # Import a single file; very basic error checking
   # Returns h2o Key
   def ImportFile(self,path):
+    return self.ImportFiles(path)[0][1]
+
+  # Import a file, or all files under a directory; list of (file,rawkey)
+  def ImportFiles(self,path):
     j = self.doSafeGet(self.buildURL("ImportFiles",{'path':path}))
-    if j['fails']:  raise ValueError("ImportFiles of "+path+" failed on "+j['fails'])
-    return j['keys'][0]
+    if j['fails']:  raise ValueError("ImportFiles of "+path+" failed on "+str(j['fails']))
+    return zip(j['files'],j['keys'])
 
   # Return basic parse setup object
   def ParseSetup(self,rawkey):
     # Unable to use 'requests.params=' syntax because it flattens array
     # parameters, but ParseSetup really expects a real array of Keys.
-    j = self.doSafeGet(self.buildURL("ParseSetup",{'srcs':[rawkey]}))
+    j = self.doSafePost("ParseSetup",{'srcs':[rawkey]})
     if not j['isValid']: raise ValueError("ParseSetup not Valid",j)
     return j
 
   # Trigger a parse; blocking; removeFrame just keep the Vec keys
   def Parse(self,setup,hexname):
+    self._invalidate(hexname)
     # Some initial parameters
     p = {'delete_on_done':True,'blocking':True,'removeFrame':True,'hex':hexname}
     # Copy selected keys
@@ -350,37 +1240,174 @@ class H2OConnection(object):
     # Extract only 'name' from each src in the array of srcs
     p['srcs'] = [src['name'] for src in setup['srcs']]
     # Request blocking parse
-    # TODO: POST vs GET
-    j = self.doSafeGet(self.buildURL("Parse",p))
+    j = self.doSafePost("Parse",p)
     if j['job']['status'] != 'DONE': raise ValueError("Parse status expected to be DONE, instead is "+j['job']['status'])
     if j['job']['progress'] != 1.0: raise ValueError("Parse progress expected to be 1.0, instead is "+j['job']['progress'])
     return j
 
+  # Upload data (a string) into a raw key, ready for ParseSetup and Parse
+  def PostFile(self,data,key):
+    r = self._send(self._session.post,self.url()+"PostFile.json",len(data),params={'key':key},files={'file':(key,data)})
+    j = self._json(r)
+    if 'errmsg' in j: raise ValueError(j['errmsg'])
+    return j['destination_key']
+
+  # Download a Frame as CSV text, header row first
+  def DownloadCSV(self,key):
+    r = self._send(self._session.get,self.url()+"DownloadDataset",0,params={'key':key})
+    if r.status_code != 200: raise ValueError("DownloadDataset of "+key+" failed: "+r.text)
+    return r.text
+
+  # Stream a Frame as CSV lines, header row first, reading chunk bytes at a
+  # time; closing the generator early drops the rest of the download
+  def DownloadLines(self,key,chunk=1<<20):
+    url = self.url()+"DownloadDataset"
+    start = time.time()
+    r = self._session.get(url,params={'key':key},stream=True,timeout=self._timeout)
+    if r.status_code != 200: raise ValueError("DownloadDataset of "+key+" failed: "+r.text)
+    nrecv = 0
+    try:
+      for line in r.iter_lines(chunk_size=chunk):
+        nrecv += len(line)+1
+        yield line
+    finally:
+      r.close()
+      self._account(url,time.time()-start,len(url),nrecv,r.status_code)
+
   # Remove a Key (probably just a Vec)
   def Remove(self,key):
+    self._invalidate(key)
     return self.doSafeGet(self.buildURL("Remove",{"key":key}))
 
   # Fire off a Rapids expression
+  # Run Rapids text: one statement, or a multi-statement program.  A cluster
+  # which predates multi-statement programs rejects one before running any
+  # of it; such a cluster is then sent each statement in turn.
   def Rapids(self,expr):
-    return self.doSafeGet(self.buildURL("Rapids",{"ast":urllib.quote(expr)}))
+    for key in _ASSIGNED.findall(expr): self._invalidate(key)
+    if not expr.endswith(";;;") or self._multi: return self._rapids(expr)
+    if self._multi is None:     # Not known yet; try it
+      try:
+        j = self._rapids(expr)
+        self._multi = True
+        return j
+      except ValueError,ex:
+        if "single statement" not in str(ex): raise
+        self._multi = False
+    for stmt in expr[:-3].split(";;"): j = self._rapids(stmt)
+    return j
+
+  def _rapids(self,expr): return self.doSafePost("Rapids",{"ast":urllib.quote(expr)})
+
+  # Forget cached rows of, and cached results computed from, a rewritten key
+  def _invalidate(self,key):
+    self._pages.invalidate(key)
+    if self._results: self._results.invalidate(key)
 
-  def Frame(self,key):
-    return self.doSafeGet(self.buildURL("3/Frames/"+str(key),{}))
+  # Inspect a Frame, optionally just 'length' rows from 'offset'.  Rows are
+  # numbered from 1 here, as FrameV2 does; an offset or length of 0 takes the
+  # server default (from row 1, 100 rows).
+  def Frame(self,key,offset=None,length=None):
+    p = {}
+    if offset is not None: p['offset'] = offset
+    if length is not None: p['len'] = length
+    return self.doSafeGet(self.buildURL("3/Frames/"+str(key),p))
+
+  # Rows [start,stop) of one column of a Frame, as a list.  Data is fetched
+  # in fixed pages of rows, all columns of a page at once, and kept in an LRU
+  # cache until evicted or the key is rewritten.
+  def rows(self,key,col,start,stop):
+    out = []
+    for page in xrange(start//self._page_rows,(stop-1)//self._page_rows+1):
+      data = self._pages.get((key,col,page))
+      if data is None:
+        j = self.Frame(key,page*self._page_rows+1,self._page_rows)
+        for c,cj in enumerate(j['frames'][0]['columns']):
+          self._pages.put((key,c,page),_coldata(cj))
+        data = self._pages.get((key,col,page))
+      base = page*self._page_rows
+      out.extend(data[max(start-base,0):stop-base])
+    return out
 
   # "Safe" REST calls.  Check for errors in a common way
   def doSafeGet(self,url):
-    r = requests.get(url)
+    return self._safe(self._send(self._session.get,url,len(url)))
+
+  # Call an endpoint which also takes POST.  Small calls stay plain GETs;
+  # params past post_min bytes, e.g. big Rapids programs, go in a form body
+  # instead of the size-limited URL, gzipped past gzip_min bytes.
+  def doSafePost(self,base,params):
+    query = self._query(params)
+    if self._post_min is None or len(query) < self._post_min:
+      return self.doSafeGet(self.buildURL(base,params))
+    headers = {'Content-Type':'application/x-www-form-urlencoded'}
+    if self._gzip_min is not None and len(query) >= self._gzip_min:
+      query = _gzip(query)
+      headers['Content-Encoding'] = 'gzip'
+    return self._safe(self._send(self._session.post,self.url()+base+".json",len(query),data=query,headers=headers))
+
+  def _safe(self,r):
     # Missing a non-json response check, e.g. 404 check here
-    j = r.json()
+    j = self._json(r)
     if 'errmsg' in j: raise ValueError(j['errmsg'])
     return j
 
+  # Issue one request on the pooled session, feeding its timing into the
+  # link estimates: small exchanges measure latency, big ones bandwidth
+  def _send(self,method,url,nsent,**kwargs):
+    start = time.time()
+    r = method(url,timeout=self._timeout,**kwargs)
+    self._account(url,time.time()-start,nsent,len(r.content),r.status_code)
+    return r
+
+  # Charge a finished request to the link estimates and its endpoint's stats
+  def _account(self,url,secs,nsent,nrecv,status):
+    nbytes = nsent+nrecv
+    if nbytes < 65536: self._latency += 0.2*(secs-self._latency)
+    else: self._bandwidth += 0.2*(nbytes/max(secs-self._latency,1e-6)-self._bandwidth)
+    endpoint = _endpoint(url)
+    self._endpoint_stats(endpoint).record(secs,nsent,nrecv)
+    if self.hook: self.hook(endpoint,secs,nsent,nrecv,status)
+
+  # Decode a JSON reply, charging the time to its endpoint
+  def _json(self,r):
+    start = time.time()
+    j = r.json()
+    self._endpoint_stats(_endpoint(r.request.url)).decoded(time.time()-start)
+    return j
+
+  def _endpoint_stats(self,endpoint):
+    with self._stats_lock:
+      st = self._stats.get(endpoint)
+      if st is None: st = self._stats[endpoint] = _EndpointStats()
+      return st
+
+  # Per-endpoint request counters: calls; total, min, max, p50 and p99
+  # latency seconds; bytes sent and received; JSON decode seconds.  Tells
+  # apart time spent on the cluster and network (latency) from time spent
+  # decoding in the client.  Optionally resets the counters.
+  def stats(self,reset=False):
+    with self._stats_lock:
+      out = dict((endpoint,st.summary()) for endpoint,st in self._stats.items())
+      if reset: self._stats = {}
+    return out
+
+  # Estimated seconds to make 'trips' round trips moving 'nbytes' in all
+  def transfer_secs(self,trips,nbytes): return trips*self._latency + nbytes/self._bandwidth
+
   # function to build a URL from a base and a dictionary of params.  'request'
   # has such a thing but it flattens lists and we need the actual list
   # complete with '[]'
   def buildURL(self,base,params):
     s = self.url()+base+".json"
-    sep = '?'
+    query = self._query(params)
+    return s+'?'+query if query else s
+
+  # The params as a query string, also used as a form-encoded POST body
+  @staticmethod
+  def _query(params):
+    s = ""
+    sep = ''
     for k,v in params.items():
       s += sep + k + "="
       if isinstance(v,list):
@@ -395,6 +1422,237 @@ class H2OConnection(object):
     return s
 
 
+# Concurrent front end to an H2OConnection.  Each call is queued and returns
+# an H2OFuture at once; at most max_concurrent calls run at a time, on worker
+# threads sharing the connection's pooled session.  Independent evaluations -
+# a dashboard's dozens of summaries, several parses - overlap on the wire and
+# on the cluster instead of running strictly one after another.  Python 2 has
+# no asyncio, so futures stand in for coroutines: f.result() is the await.
+H2OASYNC = None # Default async connection
+class AsyncH2OConnection(object):
+  def __init__(self,conn=None,max_concurrent=8):
+    self._conn = conn or H2OCONN
+    if not self._conn: raise ValueError("No open h2o connection")
+    self._todo = Queue.Queue()
+    self._lock = threading.Lock()
+    self._shut = False
+    self._workers = [threading.Thread(target=self._work) for i in range(max_concurrent)]
+    for t in self._workers:
+      t.daemon = True
+      t.start()
+    self._conn._asyncs.add(self)  # Shut down when the connection closes
+    global H2OASYNC
+    H2OASYNC = self             # Default async connection is last openned
+
+  # Run fcn(*args) on a worker; an H2OFuture of its result
+  def submit(self,fcn,*args):
+    fut = H2OFuture()
+    with self._lock:
+      if self._shut: raise ValueError("AsyncH2OConnection is shut down")
+      self._todo.put((fut,fcn,args))
+    return fut
+
+  # Take no more calls; the workers end once the queued ones have run.
+  # Optionally waits for that.
+  def shutdown(self,wait=True):
+    with self._lock:
+      if not self._shut:
+        self._shut = True
+        for t in self._workers: self._todo.put(None)
+    if wait:
+      for t in self._workers:
+        if t is not threading.current_thread(): t.join()
+
+  def _work(self):
+    while True:
+      job = self._todo.get()
+      if job is None: return
+      fut,fcn,args = job
+      fut._run(lambda: fcn(*args))
+
+  def ImportFile(self,path):        return self.submit(self._conn.ImportFile,path)
+  def ParseSetup(self,rawkey):      return self.submit(self._conn.ParseSetup,rawkey)
+  def Parse(self,setup,hexname):    return self.submit(self._conn.Parse,setup,hexname)
+  def Rapids(self,expr):            return self.submit(self._conn.Rapids,expr)
+  def Frame(self,key,offset=None,length=None): return self.submit(self._conn.Frame,key,offset,length)
+  def Remove(self,key):             return self.submit(self._conn.Remove,key)
+
+  # Evaluate Frames, Vecs and Exprs, as compute() does; several compute()s
+  # in flight at once build their programs in turn and run them together
+  def compute(self,*exprs):         return self.submit(compute,*exprs)
+
+# The default async connection, made over H2OCONN on first use.  One over an
+# older connection is shut down as it is replaced.
+def _async():
+  if H2OASYNC and H2OASYNC._conn is H2OCONN and not H2OASYNC._shut: return H2OASYNC
+  if H2OASYNC: H2OASYNC.shutdown(wait=False)
+  return AsyncH2OConnection()
+
+
+# Keys assigned by a Rapids program
+_ASSIGNED = re.compile(r"\(= !([^ )]+)")
+
+# A column's row data from the Frames JSON, with enums decoded to strings
+def _coldata(cj):
+  if cj['data'] is None: return cj['str_data']
+  dom = cj.get('domain')
+  if not dom: return cj['data']
+  return [None if d!=d else dom[int(d)] for d in cj['data']]
+
+# LRU cache of fetched pages of remote rows, keyed by (frame key, column,
+# page); all of a key's pages are dropped when the key is rewritten
+class _PageCache(object):
+  def __init__(self,maxpages):
+    self._maxpages = maxpages
+    self._pages = collections.OrderedDict()  # Least recently used first
+    self._lock = threading.Lock()  # Dead keys are invalidated by the reaper
+  def get(self,ck):
+    with self._lock:
+      data = self._pages.pop(ck,None)
+      if data is not None: self._pages[ck] = data
+      return data
+  def put(self,ck,data):
+    with self._lock:
+      self._pages.pop(ck,None)
+      self._pages[ck] = data
+      while len(self._pages) > self._maxpages: self._pages.popitem(last=False)
+  def invalidate(self,key):
+    with self._lock:
+      for ck in [ck for ck in self._pages if ck[0]==key]: del self._pages[ck]
+
+
+# Memo of Rapids results - a key or a scalar - by the canonical form of the
+# computation that made them.  Entries are dropped when a key they read is
+# rewritten or removed, and least recently used first past maxentries or
+# maxbytes of cluster data.  Result keys are owned by the cache while cached:
+# Exprs holding one are counted, and the key is removed (via remove) once
+# it is neither cached nor held.
+class _ResultCache(object):
+  def __init__(self,maxentries,maxbytes,remove):
+    self._maxentries = maxentries
+    self._maxbytes = maxbytes
+    self._remove = remove
+    self._entries = collections.OrderedDict()  # cform -> (result,reads,nbytes); LRU first
+    self._readers = {}          # Input key -> cforms of entries reading it
+    self._keys = {}             # Result key -> its cform
+    self._held = {}             # Result key -> count of live Exprs holding it
+    self._nbytes = 0
+    self._lock = threading.RLock()  # Released from __del__ and the reaper
+    self.hits = self.misses = 0
+
+  # Answer a pending Expr from the cache; True on a hit
+  def lookup(self,e):
+    cf = _cform(e)
+    if not cf: return False
+    with self._lock:
+      ent = self._entries.pop(cf,None)
+      if ent is None:
+        self.misses += 1
+        return False
+      self._entries[cf] = ent   # Most recently used
+      self.hits += 1
+      if isinstance(ent[0],unicode): self._held[ent[0]] = self._held.get(ent[0],0)+1
+    e._answer(ent[0])
+    return True
+
+  # Remember a result just computed, held by the Expr which computed it
+  def put(self,cf,result,length,reads):
+    key = isinstance(result,unicode)
+    nbytes = length*8 if key else 0
+    with self._lock:
+      if cf in self._entries: return
+      if key: self._held[result] = self._held.get(result,0)+1
+      self._entries[cf] = (result,reads,nbytes)
+      for k in reads: self._readers.setdefault(k,set()).add(cf)
+      if key: self._keys[result] = cf
+      self._nbytes += nbytes
+      while len(self._entries) > self._maxentries or (self._nbytes > self._maxbytes and len(self._entries) > 1):
+        self._drop(next(iter(self._entries)))
+
+  # An Expr holding a result key died; True if the key is still wanted
+  def release(self,key):
+    with self._lock:
+      n = self._held.get(key)
+      if n is None: return False  # Not a cached result
+      if n > 1:
+        self._held[key] = n-1
+        return True
+      del self._held[key]
+      return key in self._keys
+
+  # A key was rewritten or removed: drop what was computed from it, or as it
+  def invalidate(self,key):
+    with self._lock:
+      for cf in list(self._readers.get(key,())): self._drop(cf)
+      cf = self._keys.get(key)
+      if cf is not None: self._drop(cf)
+
+  def _drop(self,cf):
+    result,reads,nbytes = self._entries.pop(cf)
+    self._nbytes -= nbytes
+    for k in reads:
+      cfs = self._readers[k]
+      cfs.discard(cf)
+      if not cfs: del self._readers[k]
+    if isinstance(result,unicode):
+      del self._keys[result]
+      if result not in self._held: self._remove(result)
+
+
+# Endpoint of a REST URL, for stats: its path less any key, query or .json
+def _endpoint(url):
+  path = url.split('?',1)[0].split('/',3)[-1]
+  parts = path.split('/')
+  return ('/'.join(parts[:2]) if parts[0].isdigit() else parts[0]).replace(".json","")
+
+# Gzip a request body
+def _gzip(s):
+  buf = StringIO.StringIO()
+  with gzip.GzipFile(fileobj=buf,mode='wb') as f: f.write(s)
+  return buf.getvalue()
+
+# Counters and a latency histogram for one endpoint.  Latencies fall in
+# buckets a quarter-power of two wide, so percentiles are within ~19%.
+class _EndpointStats(object):
+  def __init__(self):
+    self.calls = 0
+    self.secs = 0.0
+    self.min = None
+    self.max = 0.0
+    self.sent = 0
+    self.recvd = 0
+    self.decode_secs = 0.0
+    self.buckets = collections.Counter()
+    self._lock = threading.Lock()  # Requests come from worker and reaper threads too
+
+  def record(self,secs,nsent,nrecv):
+    with self._lock:
+      self.calls += 1
+      self.secs += secs
+      self.min = secs if self.min is None else min(self.min,secs)
+      self.max = max(self.max,secs)
+      self.sent += nsent
+      self.recvd += nrecv
+      self.buckets[int(math.floor(4*math.log(max(secs,1e-6),2)))] += 1
+
+  def decoded(self,secs):
+    with self._lock: self.decode_secs += secs
+
+  # Latency under which fraction p of calls fell: its bucket's upper edge
+  def percentile(self,p):
+    n = 0
+    for b in sorted(self.buckets):
+      n += self.buckets[b]
+      if n >= p*self.calls: return min(2**((b+1)/4.0),self.max)
+    return self.max
+
+  def summary(self):
+    with self._lock:
+      return {'calls':self.calls, 'total_secs':self.secs, 'min_secs':self.min, 'max_secs':self.max,
+              'p50_secs':self.percentile(0.50), 'p99_secs':self.percentile(0.99),
+              'bytes_sent':self.sent, 'bytes_recvd':self.recvd, 'decode_secs':self.decode_secs}
+
+
 # Simple stackoverflow pretty-printer for big numbers
 def get_human_readable_size(num):
   exp_str = [ (0, 'B'), (10, 'KB'),(20, 'MB'),(30, 'GB'),(40, 'TB'), (50, 'PB'),]               
@@ -25,6 +25,7 @@ b = H2OFrame(remoteFName="smalldata/iris/iris_wheader.csv")[0:4]
 c = a+b
 d = c+c+sum(a)
 e = c+a+1
+e.compute()         # Evaluate all of e's columns in one round trip
 print e
 # Note that "d=c+..." keeps the internal C expressions alive, until "d" goes
 # out of scope even as we nuke "c"
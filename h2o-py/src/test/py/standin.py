@@ -0,0 +1,360 @@
+import cgi, csv, gzip, json, math, os, re, sys, threading, time, urllib, urlparse
+import BaseHTTPServer, SocketServer, StringIO, unittest
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),"..","..","main","py"))
+import h2o
+
+######################################################
+#
+# A stand-in for an H2O cluster's REST API, for testing the client without a
+# cluster.  It keeps its own small store of Vecs, Frames and raw files, runs
+# the subset of Rapids the client emits, and records every request.  Like the
+# real cluster, Frames and DownloadDataset take only Frame keys, Frames
+# rejects unknown arguments, and Frames row offsets count from 1.
+#
+#   srv = standin.start()
+#   conn = srv.connect(page_rows=10)
+#   ...
+#   srv.stop()
+#
+# or, in a test, subclass standin.TestCase.
+
+class Standin(SocketServer.ThreadingMixIn,BaseHTTPServer.HTTPServer):
+  daemon_threads = True
+
+  def __init__(self):
+    BaseHTTPServer.HTTPServer.__init__(self,("localhost",0),Handler)
+    self.lock = threading.RLock()
+    self.calls = []             # Each request: dict of method, endpoint, params, nbytes, headers, client
+    self.vecs = {}              # Vec key -> (list of floats, enum domain or None)
+    self.frames = {}            # Frame key -> (names, columns, domains)
+    self.raws = {}              # Raw key -> CSV text
+    self.disk = {}              # Cluster-side path -> CSV text, for ImportFiles
+    self.delay = {}             # Endpoint -> seconds to stall each reply
+    self.multi = True           # Takes multi-statement Rapids programs, as clusters since they came in
+    self.drop = set()           # Endpoints whose requests are run, then the socket closed unanswered
+    self.conn = None
+
+  # An H2OConnection to this stand-in; made the default connection
+  def connect(self,**kwargs):
+    self.conn = h2o.H2OConnection(port=self.server_address[1],**kwargs)
+    return self.conn
+
+  def stop(self):
+    if self.conn: self.conn.close()
+    h2o.H2OCONN = None
+    h2o.H2OASYNC = None
+    self.shutdown()
+    self.server_close()
+
+  # Recorded requests, optionally just those to one endpoint
+  def requests(self,endpoint=None):
+    with self.lock:
+      return [c for c in self.calls if endpoint is None or c['endpoint']==endpoint]
+
+  def reset(self):
+    with self.lock: del self.calls[:]
+
+  # Load a column straight into the store, as a parse would
+  def put_vec(self,key,data):
+    self.vecs[key] = ([float(x) for x in data],None)
+    return unicode(key)
+
+  def put_frame(self,key,names,cols,domains=None):
+    self.frames[key] = (list(names),[[float(x) for x in c] for c in cols],domains or [None]*len(cols))
+    return unicode(key)
+
+  # Columns of a key, Frame or Vec, as (names, columns, domains)
+  def lookup(self,key):
+    if key in self.frames: return self.frames[key]
+    if key in self.vecs: return (["C1"],[self.vecs[key][0]],[self.vecs[key][1]])
+    raise Failed("Object '"+key+"' not found for argument: key")
+
+
+class Failed(Exception): pass
+
+# Tests against a fresh stand-in each.  The stand-in is self.srv, with the
+# csv text (if any) on its disk as d.csv, parsed into self.fr; self.conn is
+# the default connection, made with the conn_args (None for no connection).
+# load() puts any more data in place; the recorded requests start after it.
+class TestCase(unittest.TestCase):
+  conn_args = {}
+  csv = None
+
+  def setUp(self):
+    self.srv = start()
+    self.addCleanup(self.srv.stop)
+    self.conn = self.srv.connect(**self.conn_args) if self.conn_args is not None else None
+    if self.csv is not None:
+      self.srv.disk['d.csv'] = self.csv
+      self.fr = h2o.H2OFrame(remoteFName="d.csv")
+    self.load()
+    self.srv.reset()
+
+  def load(self): pass
+
+# Tests of the client with no cluster at all
+class LocalTestCase(unittest.TestCase):
+  def setUp(self): h2o.H2OCONN = None
+
+# Start a stand-in on a free local port
+def start():
+  srv = Standin()
+  t = threading.Thread(target=srv.serve_forever)
+  t.daemon = True
+  t.start()
+  return srv
+
+
+class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+  protocol_version = "HTTP/1.1"  # Keep-alive, like the real cluster
+  wbufsize = -1                 # Each reply is written whole, and sent at once:
+  disable_nagle_algorithm = True  # no delayed-ACK stall per keep-alive request
+
+  def do_GET(self):
+    path,_,query = self.path.partition('?')
+    self.dispatch("GET",path,_params(query),len(self.path))
+
+  def do_POST(self):
+    path,_,query = self.path.partition('?')
+    params = _params(query)
+    n = int(self.headers.getheader('Content-Length',0))
+    if self.headers.getheader('Content-Type','').startswith('multipart/form-data'):
+      form = cgi.FieldStorage(fp=self.rfile,headers=self.headers,environ={'REQUEST_METHOD':'POST'})
+      params['file'] = form['file'].value
+    else:
+      body = self.rfile.read(n)
+      if self.headers.getheader('Content-Encoding') == 'gzip':
+        body = gzip.GzipFile(fileobj=StringIO.StringIO(body)).read()
+      params.update(_params(body))
+    self.dispatch("POST",path,params,n)
+
+  def dispatch(self,method,path,params,nbytes):
+    srv = self.server
+    endpoint = re.sub(r"\.json$","",path.strip('/'))
+    route = endpoint.split('/')[0] if not endpoint.startswith("3/") else "/".join(endpoint.split('/')[:2])
+    with srv.lock:
+      srv.calls.append({'method':method,'endpoint':route,'path':endpoint,'params':params,
+                        'nbytes':nbytes,'headers':dict(self.headers.items()),'client':self.client_address})
+    if route in srv.delay: time.sleep(srv.delay[route])
+    fcn = getattr(self,"ep_"+route.replace("3/","").replace("/","_"),None)
+    try:
+      if fcn is None: raise Failed("No stand-in for "+endpoint)
+      with srv.lock: reply = fcn(endpoint,params)
+    except Failed,ex:
+      return self.send(400,"application/json",json.dumps({'errmsg':str(ex)}))
+    if route in srv.drop:
+      self.close_connection = 1
+      return
+    if isinstance(reply,basestring): self.send(200,"text/csv",reply)
+    else: self.send(200,"application/json",json.dumps(reply))
+
+  def send(self,status,ctype,body):
+    self.send_response(status)
+    self.send_header("Content-Type",ctype)
+    self.send_header("Content-Length",str(len(body)))
+    self.end_headers()
+    self.wfile.write(body)
+
+  def log_message(self,*args): pass
+
+  ####################################################
+  # Endpoints
+  def ep_Cloud(self,endpoint,p):
+    return {'cloud_name':'standin','cloud_size':1,'cloud_healthy':True,'consensus':True,
+            'nodes':[{'num_cpus':2,'max_mem':1<<30}]}
+
+  def ep_ImportFiles(self,endpoint,p):
+    srv = self.server
+    files = sorted(f for f in srv.disk if f==p['path'] or f.startswith(p['path'].rstrip('/')+'/'))
+    if not files: return {'files':[],'keys':[],'fails':[p['path']]}
+    keys = []
+    for f in files:
+      srv.raws["nfs:/"+f] = srv.disk[f]
+      keys.append("nfs:/"+f)
+    return {'files':files,'keys':keys,'fails':[]}
+
+  def ep_PostFile(self,endpoint,p):
+    self.server.raws[p['key']] = p['file']
+    return {'destination_key':p['key']}
+
+  def ep_ParseSetup(self,endpoint,p):
+    srcs = _list(p['srcs'])
+    text = self.server.raws.get(srcs[0])
+    if text is None: raise Failed("No raw key "+srcs[0])
+    rows = [r for r in csv.reader(StringIO.StringIO(text)) if r]
+    header = any(_num(v) is None and v for v in rows[0])
+    names = rows[0] if header else ["C"+str(i+1) for i in range(len(rows[0]))]
+    return {'isValid':True,'srcs':[{'name':k} for k in srcs],'ncols':len(rows[0]),'sep':44,
+            'columnNames':names,'pType':'CSV','checkHeader':1 if header else -1,'singleQuotes':False}
+
+  def ep_Parse(self,endpoint,p):
+    srv = self.server
+    text = "".join(srv.raws.pop(k) for k in _list(p['srcs']))
+    rows = [r for r in csv.reader(StringIO.StringIO(text)) if r]
+    if p['checkHeader'] == '1': rows = rows[1:]
+    ncols = int(p['ncols'])
+    cols,domains = [],[]
+    for c in range(ncols):
+      vals = [r[c] if c < len(r) else '' for r in rows]
+      if all(_num(v) is not None or not v for v in vals):
+        cols.append([_num(v) if v else float('nan') for v in vals])
+        domains.append(None)
+      else:
+        dom = sorted(set(vals))
+        cols.append([float(dom.index(v)) for v in vals])
+        domains.append(dom)
+    names = _list(p['columnNames'])
+    vkeys = []
+    for c,col in enumerate(cols):
+      k = "$"+p['hex']+"_"+str(c)
+      srv.vecs[k] = (col,domains[c])
+      vkeys.append({'name':k})
+    if p.get('removeFrame') != 'True': srv.frames[p['hex']] = (names,cols,domains)
+    return {'job':{'status':'DONE','progress':1.0},'rows':len(rows),'columnNames':names,'vecKeys':vkeys}
+
+  def ep_Remove(self,endpoint,p):
+    srv = self.server
+    for store in (srv.vecs,srv.frames,srv.raws): store.pop(p['key'],None)
+    return {}
+
+  def ep_Frames(self,endpoint,p):
+    bad = [k for k in p if k not in ('offset','len','find_compatible_models')]
+    if bad: raise Failed("Unknown argument (not found): "+bad[0])
+    key = endpoint.split('/',2)[2]
+    if key not in self.server.frames:
+      if key in self.server.vecs: raise Failed("Expected a Frame for key argument: key; got a Vec")
+      raise Failed("Object '"+key+"' not found for argument: key")
+    names,cols,domains = self.server.frames[key]
+    off = int(p.get('offset',0)) or 1    # 1-based row-numbering, as FrameV2
+    n = int(p.get('len',0)) or 100
+    rows = len(cols[0]) if cols else 0
+    n = max(0,min(n,rows,rows-(off-1)))
+    columns = [{'label':name,'type':'enum' if dom else 'real','domain':dom,
+                'data':col[off-1:off-1+n],'str_data':None} for name,col,dom in zip(names,cols,domains)]
+    return {'frames':[{'key':{'name':key},'rows':rows,'offset':off-1,'len':n,'columns':columns}]}
+
+  def ep_DownloadDataset(self,endpoint,p):
+    key = p['key']
+    if key not in self.server.frames: raise Failed("Expected a Frame for key argument: key")
+    names,cols,domains = self.server.frames[key]
+    out = StringIO.StringIO()
+    w = csv.writer(out)
+    w.writerow(names)
+    for r in range(len(cols[0]) if cols else 0):
+      w.writerow([_cell(col[r],dom) for col,dom in zip(cols,domains)])
+    return out.getvalue()
+
+  def ep_Rapids(self,endpoint,p):
+    stmts = [s for s in p['ast'].rstrip(';').split(';;') if s.strip()]
+    if len(stmts) > 1 and not self.server.multi:
+      raise Failed("Note that only a single statement can be processed at a time. Junk at the end of the statement: "+p['ast'])
+    keys,rows,ncols,scalars = [],[],[],[]
+    for s in stmts:
+      val = Rapids(self.server,s).run()
+      fr = val if isinstance(val,tuple) else None
+      keys.append(fr[3] if fr else None)
+      rows.append(len(fr[1][0]) if fr else 0)
+      ncols.append(len(fr[1]) if fr else 0)
+      scalars.append(val if isinstance(val,float) else float('nan'))
+    j = {'stmnt_keys':keys,'stmnt_rows':rows,'stmnt_cols':ncols,'stmnt_scalars':scalars,
+         'key':None,'num_rows':0,'num_cols':0,'head':None,'scalar':None,'string':None}
+    if isinstance(val,tuple):
+      names,cols,domains,key = val
+      j.update(key={'name':key} if key else None,num_rows=len(cols[0]),num_cols=len(cols),col_names=names,
+               head=[[_cell(x,dom) for x in col[:100]] for col,dom in zip(cols[:200],domains)])
+    elif isinstance(val,float): j['scalar'] = val
+    else: j['string'] = val
+    return j
+
+
+# The stand-in's Rapids: keys (%), numbers (#), "null", (= !key x), binary
+# ops, ([ x row col), (cbind ...) and the reductions.  Frames are values of
+# (names, columns, domains, key).  As on the cluster, a statement is parsed
+# whole before it runs, %keys are looked up as they are parsed, and an op's
+# operands are evaluated right to left: a key assigned within a statement
+# cannot be read by that statement.
+class Rapids(object):
+  def __init__(self,srv,text):
+    self.srv = srv
+    self.toks = re.findall(r'\(|\)|"[^"]*"|[^\s()]+',text)
+    self.i = 0
+
+  def run(self):
+    ast = self.parse()
+    if self.i != len(self.toks): raise Failed("Trailing Rapids: "+" ".join(self.toks[self.i:]))
+    return self.eval(ast)
+
+  def next(self):
+    if self.i >= len(self.toks): raise Failed("Unexpected end of Rapids")
+    self.i += 1
+    return self.toks[self.i-1]
+
+  # A parse tree: a value, or a call as (op, [args])
+  def parse(self):
+    t = self.next()
+    if t == '(':
+      op = self.next()
+      args = []
+      if op == '=':
+        key = self.next()
+        if key[0] != '!': raise Failed("Bad assignment to "+key)
+        args.append(key[1:])
+      while self.i < len(self.toks) and self.toks[self.i] != ')': args.append(self.parse())
+      self.next()
+      return (op,args)
+    if t[0] == '#': return float(t[1:])
+    if t == '"null"': return None
+    if t == '%TRUE': return True
+    if t[0] == '%':
+      names,cols,domains = self.srv.lookup(t[1:])
+      return (names,cols,domains,None)
+    raise Failed("Bad Rapids token: "+t)
+
+  def eval(self,ast):
+    if not (isinstance(ast,tuple) and len(ast) == 2): return ast  # Parsed value
+    op,args = ast
+    if op == '=':
+      v = self.eval(args[1])
+      if not isinstance(v,tuple): raise Failed("Can only assign frames")
+      names,cols,domains,_ = v
+      self.srv.frames[args[0]] = (names,[list(c) for c in cols],domains)
+      return (names,cols,domains,args[0])
+    a = [self.eval(x) for x in reversed(args)][::-1]
+    if op in h2o._BINOPS: return _binop(op,a[0],a[1])
+    if op == '[':
+      x,r,c = a
+      names,cols,domains,_ = x
+      c = int(c)
+      if r is None: return ([names[c]],[cols[c]],[domains[c]],None)
+      v = cols[c][int(r)]
+      return domains[c][int(v)] if domains[c] else v
+    if op == 'cbind':
+      return (sum([x[0] for x in a],[]),sum([[list(c) for c in x[1]] for x in a],[]),sum([x[2] for x in a],[]),None)
+    if op in h2o._REDUCERS:
+      xs = [v for c in a[0][1] for v in c if v==v]
+      return h2o.PyEngine().reduce(op,xs)
+    raise Failed("No stand-in Rapids for "+op)
+
+def _binop(op,l,r):
+  f = lambda x,y: h2o._div(x,y) if op=='/' else h2o._BINOPS[op](x,y)
+  if isinstance(l,tuple) and isinstance(r,tuple):
+    if len(l[1][0]) != len(r[1][0]): raise Failed("Row mismatch")
+    cols = [[f(x,y) for x,y in zip(a,b)] for a,b in zip(l[1],r[1])]
+    return (l[0],cols,[None]*len(cols),None)
+  if isinstance(l,tuple): return (l[0],[[f(x,r) for x in c] for c in l[1]],[None]*len(l[1]),None)
+  if isinstance(r,tuple): return (r[0],[[f(l,y) for y in c] for c in r[1]],[None]*len(r[1]),None)
+  return f(l,r)
+
+def _params(query):
+  return dict((k,v[0]) for k,v in urlparse.parse_qs(query,keep_blank_values=True).items())
+
+# An array parameter, as the client sends it: [a,b,c]
+def _list(s): return [x for x in s.strip('[]').split(',') if x]
+
+def _num(s):
+  try:    return float(s)
+  except ValueError: return None
+
+def _cell(x,dom):
+  if x != x: return ''
+  return dom[int(x)] if dom else repr(x)
@@ -0,0 +1,104 @@
+import os, sys, time, unittest
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),"..","..","main","py"))
+import h2o, standin
+
+class TestNoConnection(standin.LocalTestCase):
+  def test_needs_connection(self):
+    self.assertRaises(ValueError,h2o.AsyncH2OConnection)
+
+# Overlapping cluster calls through futures
+class TestAsync(standin.TestCase):
+  csv = "x,y\n"+"".join("%d,%d\n" % (i,2*i) for i in range(20))
+
+  def load(self): self.srv.put_frame("f",["x"],[range(5)])
+
+  def test_overlap(self):
+    self.srv.delay['Rapids'] = 0.3
+    ac = h2o.AsyncH2OConnection(max_concurrent=4)
+    start = time.time()
+    futs = [ac.Rapids("(sum %f %TRUE)") for i in range(4)]
+    self.assertEqual([f.result(5)['scalar'] for f in futs],[10.0]*4)
+    self.assertLess(time.time()-start,0.9)
+
+  # No more than max_concurrent at once
+  def test_limit(self):
+    self.srv.delay['3/Frames'] = 0.2
+    ac = h2o.AsyncH2OConnection(max_concurrent=1)
+    start = time.time()
+    futs = [ac.Frame("f",1,2) for i in range(3)]
+    self.assertEqual([f.result(5)['frames'][0]['columns'][0]['data'] for f in futs],[[0.0,1.0]]*3)
+    self.assertGreaterEqual(time.time()-start,0.6)
+
+  # Cluster errors are raised by result()
+  def test_error(self):
+    ac = h2o.AsyncH2OConnection()
+    self.assertRaises(ValueError,ac.Frame("nosuch").result,5)
+
+  # Several compute()s in flight at once, each its own program
+  def test_compute(self):
+    x,y = self.fr[0],self.fr[1]
+    self.srv.delay['Rapids'] = 0.2
+    ac = h2o.AsyncH2OConnection(max_concurrent=4)
+    a,b,c = x+1,y*2,x-y
+    start = time.time()
+    futs = [ac.compute(a),ac.compute(b),ac.compute(c)]
+    for f in futs: f.result(5)
+    self.assertLess(time.time()-start,0.55)
+    self.assertEqual(len(self.srv.requests('Rapids')),3)
+    self.assertEqual((a[0:2],b[0:2],c[0:2]),([1.0,2.0],[0.0,4.0],[0.0,-1.0]))
+
+  # A program reading a key another in-flight program assigns waits for it
+  def test_inflight(self):
+    self.srv.delay['Rapids'] = 0.2
+    ac = h2o.AsyncH2OConnection(max_concurrent=4)
+    a = self.fr[0]+1
+    f1 = ac.compute(a)
+    time.sleep(0.05)            # a's program is on the wire
+    b = a*2
+    f2 = ac.compute(b)
+    f2.result(5)
+    self.assertTrue(f1.done())
+    self.assertEqual(b[0:3],[2.0,4.0,6.0])
+
+  # Shut down, queued calls still run, then the workers end
+  def test_shutdown(self):
+    self.srv.delay['3/Frames'] = 0.1
+    ac = h2o.AsyncH2OConnection(max_concurrent=2)
+    futs = [ac.Frame("f") for i in range(4)]
+    ac.shutdown()
+    self.assertTrue(all(f.done() for f in futs))
+    self.assertFalse(any(t.is_alive() for t in ac._workers))
+    self.assertRaises(ValueError,ac.Frame,"f")
+
+  # Closing the connection shuts down its async front ends
+  def test_close(self):
+    ac = h2o.AsyncH2OConnection(max_concurrent=2)
+    fut = ac.Frame("f")
+    self.conn.close()
+    self.assertTrue(fut.done())
+    self.assertTrue(ac._shut)
+    self.assertFalse(any(t.is_alive() for t in ac._workers))
+
+  # The default async connection is replaced along with H2OCONN; the old
+  # one is shut down
+  def test_replaced(self):
+    old = h2o._async()
+    self.assertIs(h2o._async(),old)
+    self.addCleanup(self.conn.close)
+    self.srv.connect()
+    new = h2o._async()
+    self.assertIsNot(new,old)
+    self.assertIs(new._conn,h2o.H2OCONN)
+    for t in old._workers: t.join(1)
+    self.assertFalse(any(t.is_alive() for t in old._workers))
+
+  # compute_async() resolves to the frame, over the default async connection
+  def test_compute_async(self):
+    m = h2o.H2OFrame(vecs=[self.fr[0]+1])
+    self.assertIs(m.compute_async().result(5),m)
+    self.assertTrue(m[0]._expr.isRemote())
+    self.assertIs(h2o._async(),h2o.H2OASYNC)
+    self.assertIs(h2o._async()._conn,self.conn)
+
+if __name__ == '__main__':
+  unittest.main()
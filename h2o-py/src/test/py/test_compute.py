@@ -0,0 +1,74 @@
+import os, sys, unittest
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),"..","..","main","py"))
+import h2o, standin
+
+# Batched evaluation of many pending Exprs
+class TestLocal(standin.LocalTestCase):
+
+  def test_compute(self):
+    v = h2o.Vec("v",h2o.Expr([1.0,2.0,3.0]))
+    a,b,s = v+1,v*2,v.sum()
+    fr = h2o.H2OFrame(vecs=[a,b])
+    self.assertIs(fr.compute(s),fr)
+    for x in (a._expr,b._expr,s): self.assertTrue(x.isLocal())
+    self.assertEqual(list(a._expr._data),[2.0,3.0,4.0])
+    self.assertEqual(s._data,6.0)
+
+  def test_bad_arg(self):
+    self.assertRaises(ValueError,h2o.compute,[1,2])
+
+class TestRemote(standin.TestCase):
+  csv = "x,y\n"+"".join("%d,%d\n" % (i,2*i) for i in range(20))
+
+  # Every big result, and one scalar, in a single program
+  def test_one_program(self):
+    x,y = self.fr[0],self.fr[1]
+    fr = h2o.H2OFrame(vecs=[x+1,y*2,x-y])
+    s = x.sum()
+    fr.compute(s)
+    asts = [c['params']['ast'] for c in self.srv.requests('Rapids')]
+    self.assertEqual(len(asts),1)
+    self.assertEqual(asts[0].count(";;"),4)   # 4 statements
+    self.assertTrue(asts[0].startswith("(= !") and asts[0].endswith(";;;"))
+    self.assertEqual(s._data,190.0)
+    self.assertEqual(fr[2][0:3],[0.0,-1.0,-2.0])
+    # Reading the results costs no more Rapids
+    self.assertEqual(len(self.srv.requests('Rapids')),1)
+
+  # Only the last statement's value comes back, so each further scalar is
+  # one more program
+  def test_scalars(self):
+    x = self.fr[0]
+    s,m,n = x.sum(),x.max(),x.min()
+    h2o.compute(s,m,n)
+    self.assertEqual(len(self.srv.requests('Rapids')),3)
+    self.assertEqual((s._data,m._data,n._data),(190.0,19.0,0.0))
+
+  # ';;'s in each Rapids program sent
+  def statements(self): return [r['params']['ast'].count(";;") for r in self.srv.requests('Rapids')]
+
+  # A cluster without multi-statement programs rejects the first one unrun;
+  # it is sent each statement in turn from then on
+  def test_single_statements(self):
+    self.srv.multi = False
+    x,y = self.fr[0],self.fr[1]
+    a,b = x+1,y*2
+    h2o.compute(a,b)
+    self.assertEqual(self.statements(),[2,0,0])
+    self.assertEqual((a[0:2],b[0:2]),([1.0,2.0],[0.0,4.0]))
+    self.srv.reset()
+    c,s = x-y,x.sum()
+    h2o.compute(c,s)
+    self.assertEqual(self.statements(),[0,0])
+    self.assertEqual((c[0:2],s._data),([0.0,-1.0],190.0))
+
+  # Already computed Exprs are skipped
+  def test_computed(self):
+    x = self.fr[0]
+    a = x+1
+    h2o.compute(a)
+    h2o.compute(a,x)
+    self.assertEqual(len(self.srv.requests('Rapids')),1)
+
+if __name__ == '__main__':
+  unittest.main()
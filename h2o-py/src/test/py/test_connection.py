@@ -0,0 +1,55 @@
+import os, requests, sys, threading, time, unittest
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),"..","..","main","py"))
+import h2o, standin
+
+# Pooled keep-alive sessions
+class TestConnection(standin.TestCase):
+  conn_args = {'pool_size':4}
+
+  # Back-to-back calls reuse one socket
+  def test_keepalive(self):
+    for i in range(10): self.conn.connect()
+    calls = self.srv.requests('Cloud')
+    self.assertEqual(len(calls),10)
+    self.assertEqual(len(set(c['client'] for c in calls)),1)
+
+  # Concurrent calls each get a pooled socket, and overlap
+  def test_pool(self):
+    self.srv.delay['Cloud'] = 0.3
+    start = time.time()
+    ts = [threading.Thread(target=self.conn.connect) for i in range(4)]
+    for t in ts: t.start()
+    for t in ts: t.join()
+    self.assertLess(time.time()-start,1.0)
+    first = set(c['client'] for c in self.srv.requests('Cloud'))
+    self.assertEqual(len(first),4)
+    # Later calls are on the pooled sockets, not new ones
+    self.srv.reset()
+    del self.srv.delay['Cloud']
+    for i in range(4): self.conn.connect()
+    self.assertTrue(set(c['client'] for c in self.srv.requests('Cloud')) <= first)
+
+  # A request the cluster may have run is not sent again, as a Rapids
+  # assignment or a Parse is not idempotent; failed connects are retried
+  def test_no_resend(self):
+    self.srv.put_frame("f",["x"],[range(3)])
+    self.srv.drop.add('Rapids')
+    self.assertRaises(requests.ConnectionError,self.conn.Rapids,"(= !f (+ %f #1))")
+    self.assertEqual(len(self.srv.requests('Rapids')),1)
+    self.assertEqual(self.srv.frames["f"][1][0],[1.0,2.0,3.0])
+    self.srv.drop.clear()
+    self.conn.Rapids("(= !f (+ %f #1))")
+    self.assertEqual(self.srv.frames["f"][1][0],[2.0,3.0,4.0])
+
+  # Cluster errors come back as ValueErrors
+  def test_errmsg(self):
+    self.assertRaises(ValueError,self.conn.Frame,"nosuchkey")
+
+# Without a connection
+class TestNoConnection(standin.LocalTestCase):
+  def test_remote_needs_connection(self):
+    self.assertRaises(ValueError,h2o.H2OFrame,remoteFName="x.csv")
+    self.assertRaises(ValueError,h2o.import_files,"x.csv")
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,78 @@
+import os, sys, unittest
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),"..","..","main","py"))
+import h2o, standin
+
+# Local engine counting the binary ops it runs
+class CountingEngine(h2o.PyEngine):
+  def __init__(self): self.ops = []
+  def binop(self,op,l,r):
+    self.ops.append(op)
+    return h2o.PyEngine.binop(self,op,l,r)
+
+# Common subexpressions are computed once
+class TestLocal(standin.LocalTestCase):
+  def setUp(self):
+    standin.LocalTestCase.setUp(self)
+    self.engine,h2o.LOCAL_ENGINE = h2o.LOCAL_ENGINE,CountingEngine()
+
+  def tearDown(self): h2o.LOCAL_ENGINE = self.engine
+
+  def test_merge(self):
+    v = h2o.Vec("v",h2o.Expr([1.0,2.0,3.0]))
+    w = (v+1)*(v+1)             # Two distinct, structurally equal (v+1)s
+    self.assertEqual(list(w[0:3]),[4.0,9.0,16.0])
+    self.assertEqual(h2o.LOCAL_ENGINE.ops,['+','*'])
+
+  # Different ops, or different operands, are not merged
+  def test_distinct(self):
+    v = h2o.Vec("v",h2o.Expr([1.0,2.0,3.0]))
+    w = (v+1)*(v+2)-(v*1)
+    self.assertEqual(list(w[0:3]),[5.0,10.0,17.0])
+    self.assertEqual(sorted(h2o.LOCAL_ENGINE.ops),sorted(['+','+','*','*','-']))
+
+class TestRemote(standin.TestCase):
+  csv = "x,y\n"+"".join("%d,%d\n" % (i,2*i) for i in range(20))
+
+  # The shared (x+1) goes to a temp key once, by a statement of its own, and
+  # is read by key after: the cluster looks up a statement's keys as it
+  # parses it, so cannot read a key the same statement assigns
+  def test_merge(self):
+    x = self.fr[0]
+    w = (x+1)*(x+1)
+    self.assertEqual(w[0:4],[1.0,4.0,9.0,16.0])
+    asts = [c['params']['ast'] for c in self.srv.requests('Rapids')]
+    self.assertEqual(len(asts),1)
+    first,second = asts[0].rstrip(";").split(";;")
+    self.assertEqual(asts[0].count("(+ "),1)
+    tmp = first.split(" ")[1][1:]
+    self.assertTrue(first.startswith("(= !"+tmp+" (+ "))
+    self.assertEqual(second.count("%"+tmp),2)
+
+  # Shared frames, as in d = c+c+sum(a); nested shared temps go innermost first
+  def test_merge_frames(self):
+    a = self.fr
+    c = a+a
+    d = c+c+sum(a)
+    self.assertEqual([d[i][0:2] for i in range(2)],[[0.0,7.0],[0.0,11.0]])
+    x = a[0]
+    y = x+1
+    z = (y*y)+(y*y)
+    self.assertEqual(z[0:3],[2.0,8.0,18.0])
+    ast = self.srv.requests('Rapids')[-1]['params']['ast']
+    self.assertEqual(ast.count(";;"),3)
+    self.assertEqual((ast.count("(+ "),ast.count("(* ")),(2,1))
+
+  # Merged across the roots of one batch too
+  def test_merge_batch(self):
+    x = self.fr[0]
+    a = (x*3)+1
+    b = (x*3)-1
+    h2o.compute(a,b)
+    asts = [c['params']['ast'] for c in self.srv.requests('Rapids')]
+    self.assertEqual(len(asts),1)
+    self.assertEqual(asts[0].count("(* "),1)
+    self.assertEqual(a[0:3],[1.0,4.0,7.0])
+    self.assertEqual(b[0:3],[-1.0,2.0,5.0])
+
+if __name__ == '__main__':
+  unittest.main()
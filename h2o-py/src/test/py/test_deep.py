@@ -0,0 +1,56 @@
+import os, re, sys, unittest
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),"..","..","main","py"))
+import h2o, standin
+
+# Deepest paren nesting of Rapids text
+def depth(ast):
+  d = most = 0
+  for c in ast:
+    if c == '(': d += 1; most = max(most,d)
+    elif c == ')': d -= 1
+  return most
+
+# Deep expression chains plan and run without recursion
+class TestLocal(standin.LocalTestCase):
+
+  # Far past the recursion limit; '-' is not rebalanced
+  def test_deep(self):
+    n = 3*sys.getrecursionlimit()
+    v = h2o.Vec("v",h2o.Expr([1.0,2.0]))
+    w = v
+    for i in range(n): w = w-1
+    self.assertEqual([float(x) for x in w[0:2]],[1.0-n,2.0-n])
+    self.assertLessEqual(len(w._name),64)
+
+  def test_sum_of_columns(self):
+    vs = [h2o.Vec("c"+str(i),h2o.Expr([float(i),1.0])) for i in range(2000)]
+    s = vs[0]
+    for v in vs[1:]: s = s+v
+    self.assertEqual([float(x) for x in s[0:2]],[float(sum(range(2000))),2000.0])
+
+class TestRemote(standin.TestCase):
+  # A long '+' chain over many columns is sent as a balanced tree, so the
+  # cluster's recursive parser sees depth log(n), not n
+  def test_balanced(self):
+    n = 1000
+    vs = []
+    for i in range(n):
+      k = self.srv.put_vec("v%d" % i,[i,1])
+      vs.append(h2o.Vec("v%d" % i,h2o.Expr(k,length=2)))
+    s = vs[0]
+    for v in vs[1:]: s = s+v
+    self.assertEqual(s[0:2],[float(sum(range(n))),float(n)])
+    ast = self.srv.requests('Rapids')[0]['params']['ast']
+    self.assertEqual(len(re.findall(r"%v\d+",ast)),n)
+    self.assertLessEqual(depth(ast),14)
+
+  # Short chains keep their grouping
+  def test_short(self):
+    vs = [h2o.Vec("v%d" % i,h2o.Expr(self.srv.put_vec("v%d" % i,[i]*2),length=2)) for i in range(4)]
+    s = vs[0]+vs[1]+vs[2]+vs[3]
+    s._expr.eager()
+    ast = self.srv.requests('Rapids')[0]['params']['ast']
+    self.assertIn("(+ (+ (+ %v0 %v1) %v2) %v3)",ast)
+
+if __name__ == '__main__':
+  unittest.main()
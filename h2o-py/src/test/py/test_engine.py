@@ -0,0 +1,82 @@
+import math, os, sys, unittest, warnings
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),"..","..","main","py"))
+import h2o
+
+nan = float('nan')
+
+def same(a,b):
+  return (a!=a and b!=b) or a==b or abs(a-b) <= 1e-9*max(abs(a),abs(b))
+
+# The local engines agree with each other, and with the cluster's semantics
+class TestEngines(unittest.TestCase):
+  def engines(self):
+    return [h2o.PyEngine()]+([h2o.NumPyEngine()] if h2o.np else [])
+
+  def test_binops(self):
+    l,r = [1.0,-2.0,0.0,nan,5.0],[2.0,0.0,0.0,1.0,-4.0]
+    for op in ('+','-','*','/'):
+      want = None
+      for eng in self.engines():
+        got = [float(x) for x in eng.binop(op,l,r)]
+        if want is None: want = got
+        self.assertTrue(all(same(x,y) for x,y in zip(got,want)),(op,eng,got,want))
+    # Division in doubles, without raising on zero
+    d = [float(x) for x in h2o.PyEngine().binop('/',l,r)]
+    self.assertEqual(d[0],0.5)
+    self.assertEqual(d[1],float('-inf'))
+    self.assertTrue(math.isnan(d[2]) and math.isnan(d[3]))
+
+  def test_scalars(self):
+    for eng in self.engines():
+      self.assertEqual(list(eng.binop('*',[1.0,2.0],3)),[3.0,6.0])
+      self.assertEqual(list(eng.binop('-',10,[1.0,2.0])),[9.0,8.0])
+      self.assertEqual(eng.binop('/',1,4),0.25)
+
+  # Reductions drop NAs, as the cluster's na.rm=TRUE
+  def test_reduce(self):
+    x = [1.0,nan,2.0,6.0]
+    for eng in self.engines():
+      self.assertEqual(eng.reduce('sum',x),9.0)
+      self.assertEqual(eng.reduce('min',x),1.0)
+      self.assertEqual(eng.reduce('max',x),6.0)
+      self.assertEqual(eng.reduce('mean',x),3.0)
+      self.assertTrue(same(eng.reduce('sd',x),math.sqrt(7.0)))
+      self.assertTrue(math.isnan(eng.reduce('mean',[nan])))
+
+  # Empty and all-NA columns, quietly: min/max are +-inf as on the cluster
+  def test_reduce_empty(self):
+    for x in ([],[nan,nan],[4.0]):
+      want = None
+      for eng in self.engines():
+        with warnings.catch_warnings(record=True) as seen:
+          warnings.simplefilter("always")
+          got = [eng.reduce(op,x) for op in ('sum','min','max','mean','sd')]
+        self.assertEqual(seen,[])
+        if want is None: want = got
+        self.assertTrue(all(same(a,b) for a,b in zip(got,want)),(x,eng,got,want))
+    self.assertEqual(want[:3],[4.0,4.0,4.0])
+    for eng in self.engines():
+      self.assertEqual([eng.reduce(op,[nan]) for op in ('sum','min','max')],[0.0,float('inf'),float('-inf')])
+
+  # Columns of different lengths are cut to the shorter
+  def test_lengths(self):
+    for eng in self.engines():
+      self.assertEqual([float(x) for x in eng.binop('+',[1.0,2.0,3.0],[10.0,20.0])],[11.0,22.0])
+      self.assertEqual([float(x) for x in eng.binop('/',[],[1.0])],[])
+
+  # Exprs over local Vecs run on LOCAL_ENGINE
+  def test_swap(self):
+    h2o.H2OCONN = None
+    saved = h2o.LOCAL_ENGINE
+    try:
+      for eng in self.engines():
+        h2o.LOCAL_ENGINE = eng
+        v = h2o.Vec("v",h2o.Expr([1.0,2.0,4.0]))
+        w = (v*2+1)/v
+        self.assertEqual([float(x) for x in w[0:3]],[3.0,2.5,2.25])
+        self.assertEqual((v+v).mean().eager(),14.0/3)
+    finally:
+      h2o.LOCAL_ENGINE = saved
+
+if __name__ == '__main__':
+  unittest.main()
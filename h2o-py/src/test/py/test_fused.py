@@ -0,0 +1,50 @@
+import os, sys, unittest
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),"..","..","main","py"))
+import h2o, standin
+
+def local_frame(*cols):
+  return h2o.H2OFrame(vecs=[h2o.Vec("c"+str(i),h2o.Expr(list(c))) for i,c in enumerate(cols)])
+
+# Local frames go column by column
+class TestLocal(standin.LocalTestCase):
+
+  def test_local(self):
+    fr = local_frame([1.0,2.0],[3.0,4.0])
+    m = fr+fr+1
+    self.assertEqual([list(m[c][0:2]) for c in range(2)],[[3.0,5.0],[7.0,9.0]])
+    self.assertRaises(ValueError,lambda: fr+local_frame([1.0,2.0]))
+
+# Arithmetic on whole cluster frames is one frame-level Rapids op
+class TestRemote(standin.TestCase):
+  csv = "x,y,z\n"+"".join("%d,%d,%d\n" % (i,2*i,3*i) for i in range(20))
+
+  def test_fused(self):
+    m = (self.fr+self.fr)+1
+    self.assertEqual([m[c][0:3] for c in range(3)],[[1.0,3.0,5.0],[1.0,5.0,9.0],[1.0,7.0,13.0]])
+    asts = [c['params']['ast'] for c in self.srv.requests('Rapids')]
+    self.assertEqual(len(asts),1)
+    self.assertEqual(asts[0].count("(+ "),2)  # Two ops, not two per column
+    # The columns are columns of the one result key, read a page for all
+    keys = set(m[c]._expr._data for c in range(3))
+    self.assertEqual(len(keys),1)
+    self.assertEqual([m[c]._expr._col for c in range(3)],[0,1,2])
+    self.assertEqual(len(self.srv.requests('3/Frames')),1)
+
+  # Its columns feed further column ops by column reference
+  def test_column_use(self):
+    m = self.fr+10
+    s = m[2].sum()
+    self.assertEqual(s.eager(),sum(3*i+10 for i in range(20)))
+    self.assertEqual(list(m.rows(0,2)),[[10.0,10.0,10.0],[11.0,12.0,13.0]])
+
+  # A frame with local columns is not fused
+  def test_mixed(self):
+    loc = h2o.Vec("l",h2o.Expr([1.0]*20))
+    mixed = h2o.H2OFrame(vecs=[loc,self.fr[1]])
+    m = mixed+1
+    self.assertEqual(list(m[0][0:2]),[2.0,2.0])
+    self.assertEqual(list(m[1][0:2]),[1.0,3.0])
+    self.assertIsNone(m[1]._expr._col)
+
+if __name__ == '__main__':
+  unittest.main()
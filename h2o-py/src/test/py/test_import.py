@@ -0,0 +1,47 @@
+import os, sys, time, unittest
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),"..","..","main","py"))
+import h2o, standin
+
+# Concurrent import and parse of many cluster files
+class TestImport(standin.TestCase):
+  def load(self):
+    for i in range(4): self.srv.disk["data/f%d.csv" % i] = "x,y\n"+"".join("%d,%d\n" % (i,j) for j in range(i+1))
+    self.srv.disk["data/notes.txt"] = "a\n1\n"
+
+  def test_list(self):
+    futs = h2o.import_files(["data/f2.csv","data/f0.csv"])
+    frs = [f.result(10) for f in futs]
+    self.assertEqual([len(fr[0]) for fr in frs],[3,1])
+    self.assertEqual(frs[0][0][0],2.0)
+
+  # A glob imports the directory once, and drops the raw keys it doesn't want
+  def test_glob(self):
+    futs = h2o.import_files("data/*.csv")
+    self.assertEqual([f.path for f in futs],["data/f%d.csv" % i for i in range(4)])
+    self.assertEqual(sorted(len(f.result(10)[0]) for f in futs),[1,2,3,4])
+    self.assertEqual(len(self.srv.requests('ImportFiles')),1)
+    self.conn.flush_removes()
+    self.assertEqual([c['params']['key'] for c in self.srv.requests('Remove')],["nfs:/data/notes.txt"])
+
+  # Parses overlap, and frames can be taken as they finish
+  def test_overlap(self):
+    self.srv.delay['Parse'] = 0.4
+    start = time.time()
+    futs = h2o.import_files("data/*.csv",workers=4)
+    done = list(h2o.as_completed(futs))
+    self.assertLess(time.time()-start,1.2)
+    self.assertEqual(sorted(id(f) for f in done),sorted(id(f) for f in futs))
+    self.assertTrue(all(f.done() for f in futs))
+
+  # A failed file fails its own future only
+  def test_fail(self):
+    futs = h2o.import_files(["data/f1.csv","nosuch.csv"])
+    self.assertEqual(len(futs[0].result(10)[0]),2)
+    self.assertRaises(ValueError,futs[1].result,10)
+
+  def test_then(self):
+    fut = h2o.import_files("data/f3.csv")[0].then(lambda fr: fr[1].sum().eager())
+    self.assertEqual(fut.result(10),6.0)
+
+if __name__ == '__main__':
+  unittest.main()
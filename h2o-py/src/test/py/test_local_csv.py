@@ -0,0 +1,55 @@
+import math, os, sys, tempfile, unittest
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),"..","..","main","py"))
+import h2o
+
+# Typed columnar reads of local CSVs
+class TestReadCSV(unittest.TestCase):
+  def test_types(self):
+    names,cols = h2o._read_csv(["a, b ,c","1,x,2.5","2,y,","3,x,junk",""])
+    self.assertEqual(names,["a","b","c"])
+    self.assertEqual(list(cols[0]),[1.0,2.0,3.0])
+    self.assertIsInstance(cols[1],h2o._EnumCol)
+    self.assertEqual(list(cols[1]),["x","y","x"])
+    self.assertEqual(cols[1]._domain,["x","y"])
+    self.assertEqual(list(cols[1]._codes),[0,1,0])
+    # 'junk' makes c a string column; the empty value stays in its domain
+    self.assertIsInstance(cols[2],h2o._EnumCol)
+    self.assertEqual(list(cols[2]),["2.5","","junk"])
+
+  # Missing numbers are NaN; short rows are padded, long ones cut
+  def test_missing(self):
+    names,cols = h2o._read_csv(["a,b","1,","","2","3,4,5"])
+    self.assertEqual(list(cols[0]),[1.0,2.0,3.0])
+    self.assertTrue(math.isnan(cols[1][0]) and math.isnan(cols[1][1]))
+    self.assertEqual(cols[1][2],4.0)
+
+  # Types are from the sample; a later junk number is NaN, as the cluster parses it
+  def test_sample(self):
+    lines = ["a"]+[str(i) for i in range(10)]+["oops","11"]
+    names,cols = h2o._read_csv(lines,sample=5,block=3)
+    self.assertEqual(len(cols[0]),12)
+    self.assertTrue(math.isnan(cols[0][10]))
+    self.assertEqual(cols[0][11],11.0)
+
+  def test_enum_slice(self):
+    names,cols = h2o._read_csv(["s","a","b","c","a"])
+    e = cols[0][1:3]
+    self.assertIsInstance(e,h2o._EnumCol)
+    self.assertEqual(list(e),["b","c"])
+    if h2o.np: self.assertEqual(list(cols[0].to_numpy()),["a","b","c","a"])
+
+  def test_frame(self):
+    fd,fname = tempfile.mkstemp(suffix=".csv")
+    with os.fdopen(fd,"w") as f: f.write("x,name\n1,a\n2,b\n3,a\n")
+    try:
+      h2o.H2OCONN = None
+      fr = h2o.H2OFrame(localFName=fname)
+      self.assertEqual(len(fr),2)
+      self.assertEqual(fr.row(1),[2.0,"b"])
+      self.assertEqual(list(fr.rows()),[[1.0,"a"],[2.0,"b"],[3.0,"a"]])
+      self.assertEqual(fr["x"].sum().eager(),6.0)
+    finally:
+      os.remove(fname)
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,53 @@
+import math, os, sys, unittest
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),"..","..","main","py"))
+import h2o, standin
+
+# Frames as NumPy structured arrays
+@unittest.skipIf(h2o.np is None,"needs numpy")
+class TestLocal(standin.LocalTestCase):
+
+  def test_local(self):
+    names,cols = h2o._read_csv(["x,s,x","1,a,","2,b,5"])
+    fr = h2o.H2OFrame(vecs=[h2o.Vec(n,h2o.Expr(c)) for n,c in zip(names,cols)])
+    a = fr.to_numpy()
+    self.assertEqual(a.dtype.names,("x","s","x_1"))
+    self.assertEqual(list(a["x"]),[1.0,2.0])
+    self.assertEqual(list(a["s"]),["a","b"])
+    self.assertTrue(math.isnan(a["x_1"][0]))
+    self.assertEqual(list(fr["s"].to_numpy(nrows=1)),["a"])
+
+@unittest.skipIf(h2o.np is None,"needs numpy")
+class TestRemote(standin.TestCase):
+  csv = "x,s,y\n"+"".join("%d,%s,%s\n" % (i,"ab"[i%2],"" if i==3 else 2*i) for i in range(10))
+
+  # The parsed Vec keys are bound into one temp frame, read and removed
+  def test_remote(self):
+    a = self.fr.to_numpy()
+    self.assertEqual(list(a["x"]),[float(i) for i in range(10)])
+    self.assertEqual(list(a["s"][:3]),["a","b","a"])
+    self.assertEqual(a["s"].dtype,object)
+    self.assertTrue(math.isnan(a["y"][3]))
+    self.assertEqual(a["y"][4],8.0)
+    self.assertEqual(len(self.srv.requests('Rapids')),1)
+    self.assertEqual(len(self.srv.requests('DownloadDataset')),1)
+    key = self.srv.requests('DownloadDataset')[0]['params']['key']
+    self.conn.flush_removes()
+    self.assertNotIn(key,self.srv.frames)
+
+  # Some columns, some rows; pending ones computed first; local ones mixed in
+  def test_mixed(self):
+    loc = h2o.Vec("l",h2o.Expr([float(-i) for i in range(10)]))
+    fr = h2o.H2OFrame(vecs=[self.fr[2]*2,loc,self.fr[1]])
+    a = fr.to_numpy(cols=[2,0,1],nrows=4)
+    self.assertEqual(len(a),4)
+    self.assertEqual(list(a["s"]),["a","b","a","b"])
+    self.assertEqual(list(a["l"]),[0.0,-1.0,-2.0,-3.0])
+    self.assertEqual(list(a[a.dtype.names[1]][:3]),[0.0,4.0,8.0])
+
+  # A column of a frame-level op is read from its frame's key
+  def test_fused(self):
+    m = self.fr[0:1]+1
+    self.assertEqual(list(m[0].to_numpy()[:3]),[1.0,2.0,3.0])
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,72 @@
+import os, sys, unittest
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),"..","..","main","py"))
+import h2o, standin
+
+# Remote rows are read a page at a time, through an LRU page cache
+class TestPaging(standin.TestCase):
+  conn_args = {'page_rows':10,'page_cache':4}
+
+  def load(self):
+    self.srv.put_frame("f",["x","s"],[range(25),[i%2 for i in range(25)]],[None,["a","b"]])
+    self.x = h2o.Expr(u"f",length=25)
+
+  def pages(self):
+    return [(int(c['params']['offset']),int(c['params']['len'])) for c in self.srv.requests('3/Frames')]
+
+  # Offsets count rows from 1, as FrameV2 does
+  def test_pages(self):
+    self.assertEqual(self.x[5:15],[float(i) for i in range(5,15)])
+    self.assertEqual(self.pages(),[(1,10),(11,10)])
+    # Cached
+    self.assertEqual(self.x[12],12.0)
+    self.assertEqual(self.x[-16],9.0)
+    self.assertEqual(len(self.pages()),2)
+    # The short last page
+    self.assertEqual(self.x[20:],[float(i) for i in range(20,25)])
+    self.assertEqual(self.pages()[-1],(21,10))
+    self.assertEqual(self.x[0:25:10],[0.0,10.0,20.0])
+
+  # Least recently used pages are dropped past page_cache (column) pages
+  def test_lru(self):
+    self.srv.put_frame("g",["y"],[range(50)])
+    g = h2o.Expr(u"g",length=50)
+    for i in (0,10,20,30,0,40): g[i]
+    self.assertEqual(len(self.pages()),5)
+    g[0]                        # Kept
+    self.assertEqual(len(self.pages()),5)
+    g[10]                       # Dropped
+    self.assertEqual(len(self.pages()),6)
+
+  # Rewriting a key drops its pages
+  def test_invalidate(self):
+    self.x[0]
+    self.conn.Rapids("(= !f (+ %f #1))")
+    self.assertEqual(self.x[0],1.0)
+    self.assertEqual(len(self.pages()),2)
+
+  # All columns of a page are fetched at once; enums come back as strings
+  def test_columns(self):
+    s = h2o.Expr(u"f",length=25)
+    s._col = 1
+    self.x[0]
+    self.assertEqual(s[0:3],["a","b","a"])
+    self.assertEqual(len(self.pages()),1)
+
+  def test_range(self):
+    self.assertRaises(IndexError,lambda: self.x[25])
+    self.assertRaises(IndexError,lambda: self.x[-26])
+
+  # A bare Vec key is looked up by Rapids, as Frames takes only Frames;
+  # slices go through a temp Frame copy of it
+  def test_vec(self):
+    self.srv.put_vec("v",[3,4,5])
+    v = h2o.Expr(u"v",length=3)
+    v._vec = True
+    self.assertEqual(v[1],4.0)
+    self.assertEqual(self.pages(),[])
+    self.assertEqual(len(self.srv.requests('Rapids')),1)
+    self.assertEqual(v[0:3],[3.0,4.0,5.0])
+    self.assertEqual(self.srv.requests('3/Frames')[0]['path'],"3/Frames/"+v._fkey)
+
+if __name__ == '__main__':
+  unittest.main()
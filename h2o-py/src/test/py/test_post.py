@@ -0,0 +1,39 @@
+import os, sys, unittest
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),"..","..","main","py"))
+import h2o, standin
+
+# Big Rapids programs go in a POST body, gzipped past gzip_min
+class TestPost(standin.TestCase):
+  conn_args = None              # Each test makes its own
+
+  def load(self): self.srv.put_frame("f",["x"],[range(4)])
+
+  # A program of n '+'s
+  def program(self,n): return "(= !g "+"(+ "*n+"%f"+" #1)"*n+")"
+
+  def sent(self):
+    c = self.srv.requests('Rapids')[-1]
+    return c['method'],c['headers'].get('content-encoding')
+
+  def test_sizes(self):
+    conn = self.srv.connect(post_min=200,gzip_min=2000)
+    conn.Rapids(self.program(2))
+    self.assertEqual(self.sent(),("GET",None))
+    conn.Rapids(self.program(20))
+    self.assertEqual(self.sent(),("POST",None))
+    j = conn.Rapids(self.program(200))
+    self.assertEqual(self.sent(),("POST","gzip"))
+    self.assertLess(self.srv.requests('Rapids')[-1]['nbytes'],1000)
+    self.assertEqual(j['num_rows'],4)
+    self.assertEqual(self.srv.frames["g"][1][0],[200.0,201.0,202.0,203.0])
+
+  def test_disabled(self):
+    conn = self.srv.connect(post_min=None)
+    conn.Rapids(self.program(200))
+    self.assertEqual(self.sent(),("GET",None))
+    conn = self.srv.connect(post_min=200,gzip_min=None)
+    conn.Rapids(self.program(200))
+    self.assertEqual(self.sent(),("POST",None))
+
+if __name__ == '__main__':
+  unittest.main()
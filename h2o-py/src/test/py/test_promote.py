@@ -0,0 +1,50 @@
+import gc, os, sys, unittest
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),"..","..","main","py"))
+import h2o, standin
+
+# Ops mixing a local Vec with a cluster one move one operand across
+class TestPromote(standin.TestCase):
+  csv = "x,s\n"+"".join("%d,%s\n" % (i,"ab"[i%2]) for i in range(20))
+
+  def load(self):
+    self.loc = h2o.Vec("l",h2o.Expr([1.0]*20))
+    self.pull = h2o.PULL_ROWS
+
+  def tearDown(self): h2o.PULL_ROWS = self.pull
+
+  # A small cluster Vec is pulled in, through a temp Frame copy of its Vec key
+  def test_pull(self):
+    c = self.loc+self.fr[0]
+    self.assertEqual(list(c[0:3]),[1.0,2.0,3.0])
+    self.assertTrue(c._expr.isLocal())
+    self.assertEqual(len(self.srv.requests('DownloadDataset')),1)
+    self.assertEqual(self.srv.requests('PostFile'),[])
+    fkey = self.fr[0]._expr._fkey
+    self.assertIn(fkey,self.srv.frames)
+    # Pulled once, then reused
+    d = self.loc*self.fr[0]
+    self.assertEqual(list(d[0:3]),[0.0,1.0,2.0])
+    self.assertEqual(len(self.srv.requests('DownloadDataset')),1)
+    # The temp frame goes with the cluster Vec
+    del c,d,self.fr
+    gc.collect()
+    h2o.H2OCONN.flush_removes()
+    self.assertNotIn(fkey,self.srv.frames)
+
+  # Past PULL_ROWS the local side is uploaded as a temp Vec instead
+  def test_upload(self):
+    h2o.PULL_ROWS = 0
+    c = self.loc+self.fr[0]
+    self.assertEqual(list(c[0:3]),[1.0,2.0,3.0])
+    self.assertTrue(c._expr.isRemote())
+    self.assertEqual(len(self.srv.requests('PostFile')),1)
+    self.assertEqual(len(self.srv.requests('Parse')),1)
+    self.assertEqual(self.srv.requests('DownloadDataset'),[])
+
+  # Enum cluster columns pull in as their strings
+  def test_pull_enum(self):
+    x = h2o._download(self.fr[1]._expr)
+    self.assertEqual(list(x._data[0:4]),["a","b","a","b"])
+
+if __name__ == '__main__':
+  unittest.main()
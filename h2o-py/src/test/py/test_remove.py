@@ -0,0 +1,69 @@
+import gc, os, sys, time, unittest, weakref
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),"..","..","main","py"))
+import h2o, standin
+
+# Dead temp keys are queued and removed in the background
+class TestRemove(standin.TestCase):
+  conn_args = {'remove_batch':5,'remove_secs':60}
+
+  def load(self):
+    for i in range(5): self.srv.put_frame("k%d" % i,["x"],[[i]])
+
+  def removed(self): return sorted(c['params']['key'] for c in self.srv.requests('Remove'))
+
+  # Dying Exprs make no request themselves
+  def test_later(self):
+    es = [h2o.Expr(u"k%d" % i,length=1) for i in range(4)]
+    del es
+    gc.collect()
+    time.sleep(0.3)
+    self.assertEqual(self.removed(),[])
+    self.conn.flush_removes()
+    self.assertEqual(self.removed(),["k0","k1","k2","k3"])
+
+  # The reaper goes once remove_batch keys are queued
+  def test_batch(self):
+    es = [h2o.Expr(u"k%d" % i,length=1) for i in range(5)]
+    del es
+    gc.collect()
+    for i in range(20):
+      if len(self.removed()) == 5: break
+      time.sleep(0.1)
+    self.assertEqual(self.removed(),["k%d" % i for i in range(5)])
+
+  # Closing drains the queue
+  def test_close(self):
+    self.conn.RemoveLater(u"k1")
+    self.conn.close()
+    self.assertEqual(self.removed(),["k1"])
+    self.assertNotIn("k1",self.srv.frames)
+
+  # Closing ends the reaper and drops the connection from the exit drain;
+  # a connection dropped unclosed is collected, and its reaper ends too
+  def test_reaper_ends(self):
+    reaper = self.conn._reaper
+    self.conn.close()
+    self.assertFalse(reaper.is_alive())
+    self.assertNotIn(self.conn,h2o._OPEN)
+    conn = h2o.H2OConnection(port=self.srv.server_address[1])
+    ref,reaper = weakref.ref(conn),conn._reaper
+    self.assertIn(conn,h2o._OPEN)
+    h2o.H2OCONN = None
+    del conn
+    gc.collect()
+    self.assertIsNone(ref())
+    reaper.join(1)
+    self.assertFalse(reaper.is_alive())
+
+  # Without a connection there's nothing to remove through
+  def test_no_connection(self):
+    e = h2o.Expr(u"k0",length=1)
+    h2o.H2OCONN = None
+    del e
+    gc.collect()
+    h2o._release_dying()
+    self.conn.flush_removes()
+    self.assertEqual(self.removed(),[])
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,64 @@
+import gc, os, sys, unittest
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),"..","..","main","py"))
+import h2o, standin
+
+# The opt-in memo of Rapids results by canonical computation
+class TestResultCache(standin.TestCase):
+  conn_args = {'cache_results':2}
+
+  def load(self):
+    self.srv.put_frame("f",["x"],[range(10)])
+    self.x = h2o.Vec("x",h2o.Expr(u"f",length=10))
+
+  def rapids(self): return len(self.srv.requests('Rapids'))
+
+  # The same computation, built again, is answered from the cache
+  def test_hit(self):
+    a = (self.x+1)*2
+    self.assertEqual(a[0:2],[2.0,4.0])
+    b = (self.x+1)*2
+    self.assertEqual(b[0:2],[2.0,4.0])
+    self.assertEqual(self.rapids(),1)
+    self.assertEqual(b._expr._data,a._expr._data)
+    s1 = self.x.sum().eager()
+    s2 = self.x.sum().eager()
+    self.assertEqual((s1,s2),(45.0,45.0))
+    self.assertEqual(self.rapids(),2)
+    self.assertEqual(self.conn._results.hits,2)
+
+  # Rewriting an input key drops what was computed from it
+  def test_invalidate(self):
+    self.x.sum().eager()
+    self.conn.Rapids("(= !f (+ %f #1))")
+    self.assertEqual(self.x.sum().eager(),55.0)
+
+  # A cached key outlives the Exprs holding it, until it's evicted
+  def test_evict(self):
+    a = self.x+1
+    a._expr.eager()
+    key = a._expr._data
+    del a
+    gc.collect()
+    self.conn.flush_removes()
+    self.assertIn(key,self.srv.frames)
+    for k in (2,3):
+      v = self.x+k
+      v._expr.eager()
+    self.conn.flush_removes()
+    self.assertNotIn(key,self.srv.frames)
+
+  # Local columns are not cached
+  def test_local(self):
+    loc = h2o.Vec("l",h2o.Expr([1.0]*10))
+    h2o.PULL_ROWS,pull = 0,h2o.PULL_ROWS
+    try:
+      for i in range(2):
+        v = self.x+loc
+        v._expr.eager()
+    finally:
+      h2o.PULL_ROWS = pull
+    self.assertEqual(len(self.srv.requests('PostFile')),1)
+    self.assertEqual(self.conn._results.hits,0)
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,58 @@
+import os, sys, unittest
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),"..","..","main","py"))
+import h2o, standin
+
+class TestLocal(unittest.TestCase):
+  def test_endpoint(self):
+    self.assertEqual(h2o._endpoint("http://h:1/Cloud.json"),"Cloud")
+    self.assertEqual(h2o._endpoint("http://h:1/Rapids.json?ast=x"),"Rapids")
+    self.assertEqual(h2o._endpoint("http://h:1/3/Frames/key.hex?offset=1"),"3/Frames")
+    self.assertEqual(h2o._endpoint("http://h:1/DownloadDataset"),"DownloadDataset")
+
+  def test_percentiles(self):
+    st = h2o._EndpointStats()
+    for i in range(99): st.record(0.01,10,100)
+    st.record(1.0,10,100)
+    s = st.summary()
+    self.assertEqual((s['calls'],s['bytes_sent'],s['bytes_recvd']),(100,1000,10000))
+    self.assertEqual((s['min_secs'],s['max_secs']),(0.01,1.0))
+    self.assertTrue(0.01 <= s['p50_secs'] <= 0.01*1.19)
+    self.assertTrue(0.01 <= s['p99_secs'] <= 0.01*1.19)
+    self.assertEqual(st.percentile(1.0),1.0)
+
+# Per-endpoint counters and the per-request hook
+class TestRemote(standin.TestCase):
+  def setUp(self):
+    self.seen = []
+    self.conn_args = {'hook':lambda *args: self.seen.append(args)}
+    standin.TestCase.setUp(self)
+
+  def load(self):
+    self.srv.put_frame("f",["x"],[range(10)])
+    self.conn.stats(reset=True)
+    del self.seen[:]
+
+  def test_stats(self):
+    for i in range(3): self.conn.Frame("f")
+    self.conn.Rapids("(= !g (+ %f #1))")
+    self.assertEqual(list(self.conn.DownloadLines("g"))[:2],["x","1.0"])
+    st = self.conn.stats()
+    self.assertEqual(sorted(st),["3/Frames","DownloadDataset","Rapids"])
+    self.assertEqual(st['3/Frames']['calls'],3)
+    self.assertGreater(st['3/Frames']['bytes_recvd'],0)
+    self.assertEqual(st['DownloadDataset']['calls'],1)
+    self.assertEqual(st['DownloadDataset']['decode_secs'],0.0)
+    self.assertEqual(self.conn.stats(reset=True),st)
+    self.assertEqual(self.conn.stats(),{})
+
+  def test_hook(self):
+    self.conn.Frame("f")
+    self.assertRaises(ValueError,self.conn.Frame,"nosuch")
+    self.assertEqual([(s[0],s[4]) for s in self.seen],[("3/Frames",200),("3/Frames",400)])
+    endpoint,secs,nsent,nrecv,status = self.seen[0]
+    self.assertGreater(secs,0)
+    self.assertGreater(nsent,0)
+    self.assertGreater(nrecv,0)
+
+if __name__ == '__main__':
+  unittest.main()
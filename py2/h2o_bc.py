@@ -492,6 +492,8 @@ def tear_down_cloud(nodeList=None, sandboxIgnoreErrors=False, force=False):
     check_sandbox_for_errors(sandboxIgnoreErrors=sandboxIgnoreErrors, python_test_name=h2o_args.python_test_name)
     # get rid of all those pesky line marker files. Unneeded now
     clean_sandbox_doneToLine()
+    for n in nodeList:
+        n.close_session()
     nodeList[:] = []
     h2o_nodes.nodes = []
     # we can't destroy the copy in h2o.nodes? (circular). He's responsible for that
@@ -35,6 +35,13 @@ def runExec(node=None, **kwargs):
     return a
 
 
+# returns the 'byteSize' freed, if the key was a frame
+def runRemove(node=None, key=None, **kwargs):
+    if not key: raise Exception('No key for Remove')
+    if not node: node = h2o_nodes.nodes[0]
+    a = node.remove_key(key, **kwargs)
+    return a
+
 def runInspect(node=None, key=None, verbose=False, **kwargs):
     if not key: raise Exception('No key for Inspect')
     if not node: node = h2o_nodes.nodes[0]
@@ -43,6 +50,13 @@ def runInspect(node=None, key=None, verbose=False, **kwargs):
         print "inspect of %s:" % key, dump_json(a)
     return a
 
+# one column, offset/len pages its rows (1-based offset)
+def runColumn(node=None, key=None, column=None, **kwargs):
+    if not key: raise Exception('No key for Column')
+    if not node: node = h2o_nodes.nodes[0]
+    a = node.column(key, column, **kwargs)
+    return a
+
 #************************************************************************
 def infoFromParse(parse):
     if not parse:
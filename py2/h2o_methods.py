@@ -171,7 +171,7 @@ def csv_download(self, key, csvPathname, timeoutSecs=60, **kwargs):
     log('Start ' + url + paramsStr, comment=csvPathname)
 
     # do it (absorb in 1024 byte chunks)
-    r = requests.get(url, params=params, timeout=timeoutSecs)
+    r = self.session().get(url, params=params, timeout=timeoutSecs)
     print "csv_download r.headers:", r.headers
     if r.status_code == 200:
         f = open(csvPathname, 'wb')
@@ -191,7 +191,7 @@ def log_download(self, logDir=None, timeoutSecs=30, **kwargs):
     url = self.url('LogDownload.json')
     log('Start ' + url);
     print "\nDownloading h2o log(s) using:", url
-    r = requests.get(url, timeout=timeoutSecs, **kwargs)
+    r = self.session().get(url, timeout=timeoutSecs, **kwargs)
     if not r or not r.ok:
         raise Exception("Maybe bad url? no r in log_download %s in %s:" % inspect.stack()[1][3])
 
@@ -1,10 +1,46 @@
-import sys, getpass, os, psutil, time, requests, errno, threading, inspect, shlex
+import sys, getpass, os, psutil, time, requests, errno, threading, inspect, shlex, weakref
 import h2o_os_util, h2o_print as h2p, h2o_args
 import h2o_nodes
 from h2o_test import \
     tmp_dir, tmp_file, flatfile_pathname, spawn_cmd, find_file, verboseprint, \
     dump_json, log, check_sandbox_for_errors
-import json, platform, re
+import json, platform, re, gzip, urllib, StringIO
+
+# Form-encoded POSTs at least this long, params included (e.g. big Rapids ASTs), are sent
+# gzip-compressed. None sends them plain.
+gzip_post_min = 1 << 16
+
+# Each H2O node object gets a requests Session, so its requests (polls, inspects..)
+# reuse keep-alive connections from a pool, instead of a new connection each.
+# Pool sizes: hosts kept, and connections kept per host (threads talking to a node at once)
+session_pool_connections = 4
+session_pool_maxsize = 10
+
+# node -> its Session. Not an attribute of the node: the node's __dict__ is written
+# to h2o-nodes.json, and read back by ExternalH2O
+node_sessions = weakref.WeakKeyDictionary()
+
+# Returns (data, params, headers) for requests.post: the form dict and the URL params
+# as they are when small. Past gzip_post_min bytes, the params are folded into the
+# form, so long parameter lists don't hit URL limits, and the encoded body is sent
+# gzipped, with its Content-Encoding header
+def post_body(postData, params=None):
+    if (not postData and not params) or gzip_post_min is None:
+        return postData, params, None
+    items = []
+    for k, v in dict(params or {}, **(postData or {})).items():
+        if v is None:
+            continue
+        for x in (v if isinstance(v, (list, tuple)) else [v]):
+            items.append((k, x.encode('utf-8') if isinstance(x, unicode) else x))
+    body = urllib.urlencode(items)
+    if len(body) < gzip_post_min:
+        return postData, params, None
+    buf = StringIO.StringIO()
+    with gzip.GzipFile(fileobj=buf, mode='wb') as f:
+        f.write(body)
+    headers = {'Content-Type': 'application/x-www-form-urlencoded', 'Content-Encoding': 'gzip'}
+    return buf.getvalue(), None, headers
 
 # print "h2o_objects"
 
@@ -169,6 +205,36 @@ class H2O(object):
         return u
 
 
+    # the node's pooled Session, made on first use
+    def session(self):
+        s = node_sessions.get(self)
+        if s is None:
+            s = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=session_pool_connections, pool_maxsize=session_pool_maxsize)
+            s.mount('http://', adapter)
+            s.mount('https://', adapter)
+            node_sessions[self] = s
+        return s
+
+    # requests sent by the node's Session, connections it opened, and requests that reused one
+    def session_stats(self):
+        stats = {'requests': 0, 'connections': 0}
+        s = node_sessions.get(self)
+        if s is not None:
+            for adapter in set(s.adapters.values()):
+                pools = adapter.poolmanager.pools
+                for key in pools.keys():
+                    stats['requests'] += pools[key].num_requests
+                    stats['connections'] += pools[key].num_connections
+        stats['reused'] = stats['requests'] - stats['connections']
+        return stats
+
+    def close_session(self):
+        if self in node_sessions:
+            verboseprint("session_stats:", self, self.session_stats())
+            node_sessions.pop(self).close()
+
     def do_json_request(self, jsonRequest=None, fullUrl=None, timeout=10, params=None, postData=None, returnFast=False,
         cmd='get', extraComment=None, ignoreH2oError=False, noExtraErrorCheck=False, **kwargs):
         # if url param is used, use it as full url. otherwise crate from the jsonRequest
@@ -208,11 +274,17 @@ class H2O(object):
                 # r = requests.post(url, timeout=timeout, params=params, data=json.dumps(postData), **kwargs)
                 # 
                 # This does form-encoded, which doesn't allow POST of nested structures
-                r = requests.post(url, timeout=timeout, params=params, data=postData, **kwargs)
+                # 
+                # Big ones (params too) go as a gzipped body, unless uploading a file.
+                if 'files' in kwargs:
+                    data, headers = postData, None
+                else:
+                    data, params, headers = post_body(postData, params)
+                r = self.session().post(url, timeout=timeout, params=params, data=data, headers=headers, **kwargs)
             elif 'delete' == cmd:
-                r = requests.delete(url, timeout=timeout, params=params, **kwargs)
+                r = self.session().delete(url, timeout=timeout, params=params, **kwargs)
             elif 'get' == cmd:
-                r = requests.get(url, timeout=timeout, params=params, **kwargs)
+                r = self.session().get(url, timeout=timeout, params=params, **kwargs)
             else:
                 raise ValueError("Unknown HTTP command (expected 'get', 'post' or 'delete'): " + cmd)
 
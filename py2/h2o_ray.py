@@ -238,8 +238,8 @@ def frames(self, key=None, timeoutSecs=10, **kwargs):
 
     params_dict = {
         'find_compatible_models': 0,
-        'offset': 0, # is offset working yet?
-        'len': 5,
+        'offset': 0, # 1-based. 0 is the first row
+        'len': 100, # what Frames gave back before it honored len
     }
     '''
     Return a single Frame or all of the Frames in the h2o cluster.  The
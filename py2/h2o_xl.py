@@ -1,6 +1,8 @@
 import h2o_exec as h2e, h2o_print as h2p, h2o_cmd
-import re, math
+import re, math, itertools
 from copy import copy
+from weakref import WeakSet
+from h2o_test import dump_json
 # from h2o_xl import Fcn, Seq, Cbind, Colon, Assign, Item, Exec, KeyIndexed, Cut
 
 # can set this in a test to disable the actual exec, just debugprint()
@@ -18,20 +20,153 @@ def debugprint(*args, **kwargs):
         print
 
 def checkAst(expected):
-    ast = h2o_xl.Xbase.lastExecResult['ast']
-    ast = re.sub('knon_0x[0-9a-fA-F]+', 'knon_0x...', ast)
-    expected  = re.sub('knon_0x[0-9a-fA-F]+', 'knon_0x...', expected)
-    # remove the id suffix for knon_ created keys, before comparing
-    # knon_0x1a34250
-    assert ast==expected, 'Actual: "%s"    Expected: "%s"' % (ast, expected)
+    import h2o_xl_parse
+    ast = Xbase.lastExecResult['ast']
+    # compares structure, with the knon_ created keys renumbered in order of use
+    assert h2o_xl_parse.astEqual(ast, expected), 'Actual: "%s"    Expected: "%s"' % (ast, expected)
     print "----------------------------------------------------------------\n"
 
+# Open Batch'es, innermost last. .do() queues statements on the innermost
+batchStack = []
+
+# _do_result() returns this if the statement gave nothing (no key, no scalar)
+noResult = object()
+
+# hybrid mode: set to an h2o_xl_local.Env() (numpy) to run statements whose keys
+# are all small frames held there locally, instead of at h2o.
+# Keys written locally are put to h2o (csv upload + parse) when an h2o statement reads them.
+localEnv = None
+localMaxRows = 10000
+# keys the localEnv has, that h2o doesn't have yet. Add keys you only loaded locally
+localOnly = set()
+
+# keys a Rapids statement reads
+def keysRead(execExpr):
+    return set(re.findall(r"%([^ );]+)", execExpr))
+
+# put a localEnv key to h2o, so h2o statements can read it
+def uploadLocal(key):
+    import h2o_import as h2i, tempfile, os
+    csvPathname = os.path.join(tempfile.mkdtemp(), "%s.csv" % key)
+    localEnv.saveCsv(key, csvPathname)
+    h2p.green_print("Putting local key %s to h2o" % key)
+    h2i.import_parse(path=csvPathname, schema='put', hex_key=key, checkHeader=-1)
+    localOnly.discard(key)
+    if isTempKey(key):
+        tempWritten.add(key)
+
+# Temp key gc. Keys h2o_xl names itself (knon_...) are only reachable thru the nodes
+# that have them as .frame. Once those nodes are all gone (Python's refcounts, seen thru
+# weakrefs), nothing can read the key again, so it's removed at h2o.
+# (the node .refcnt counts parents at construction, and is never decremented, so it
+# can't say that)
+# collectKeys() runs at statement boundaries (.do() and Batch flush). It removes the
+# dead keys together, once there are gcMinKeys of them
+gcEnable = True
+gcMinKeys = 16
+# temp key name -> WeakSet of the nodes that have it as .frame
+tempKeys = {}
+# temp keys written at h2o
+tempWritten = set()
+# never removed. Def bodies use them (hoisted invariants)
+pinnedKeys = set()
+# totals, for reporting
+gcStats = {'keys': 0, 'bytes': 0}
+# numbers the knon_ names. Never reused, unlike id()'s, so a removed key's name can't come back
+knonCount = itertools.count(1)
+
+def isTempKey(frame):
+    return isinstance(frame, basestring) and frame.startswith('knon_')
+
+# a Rapids statement that writes a key
+def noteWrite(execExpr):
+    Xbase.keyWriteHistoryList.append(execExpr)
+    m = re.match(r"\(= !([^ )]+)", execExpr)
+    if m and isTempKey(m.group(1)):
+        tempWritten.add(m.group(1))
+
+# Lazy scalars. A statement that gives a scalar (a reduction) writes no key at h2o.
+# The scalar is kept here, with the statement that would put it in the key.
+# That's sent in front of the first statement that reads the key, in the same request,
+# so a reduction only costs its own round trip. materializeScalars() sends them now,
+# for reads that aren't Rapids: ResultIter does that itself, other reads of the key
+# (runInspect, runSummary, csv_download..) have to call it first
+# A store stays pending till the request with it succeeds, so a failed one loses nothing
+# key -> Rapids statement storing the scalar
+pendingScalars = {}
+
+# the pending scalar stores a statement needs first, as (key, store)
+# skip: keys a queued Batch statement already stores or writes
+def scalarStores(execExpr, skip=()):
+    return [(k, pendingScalars[k]) for k in sorted(keysRead(execExpr))
+        if k in pendingScalars and k not in skip]
+
+# the stores ran at h2o, so they're no longer pending. Neither are the scalars of keys
+# the statement wrote (writes)
+def storesDone(stores, writes=()):
+    for k, execExpr2 in stores:
+        pendingScalars.pop(k, None)
+        noteWrite(execExpr2)
+    for k in writes:
+        pendingScalars.pop(k, None)
+
+def materializeScalars(keys=None):
+    if keys is None:
+        keys = pendingScalars.keys()
+    stores = [(k, pendingScalars[k]) for k in keys if k in pendingScalars]
+    if not stores:
+        return
+    if not debugNoH2O:
+        execResult = h2o_cmd.runExec(ast=rapidsProgram([execExpr2 for k, execExpr2 in stores]))
+        for i in range(len(stores)):
+            assert execResult['stmnt_keys'][i] is not None, dump_json(execResult)
+    storesDone(stores)
+
+# remove the temp keys no live node has. Returns the bytes freed at h2o
+def collectKeys(force=False):
+    if not gcEnable:
+        return 0
+    dead = [k for k in tempWritten | localOnly | set(pendingScalars)
+        if isTempKey(k) and k not in pinnedKeys and not tempKeys.get(k)]
+    if not dead or (len(dead) < gcMinKeys and not force):
+        return 0
+
+    freed = 0
+    for key in dead:
+        tempKeys.pop(key, None)
+        if localEnv is not None:
+            localEnv.frames.pop(key, None)
+        localOnly.discard(key)
+        pendingScalars.pop(key, None)
+        if key in tempWritten:
+            tempWritten.discard(key)
+            if not debugNoH2O:
+                removeResult = h2o_cmd.runRemove(key=key)
+                freed += removeResult.get('byteSize') or 0
+    # names that were never written (an Assign renamed to its lhs key), once their nodes are gone
+    for key in [k for k, nodes in tempKeys.items() if not nodes and k not in tempWritten and k not in localOnly]:
+        del tempKeys[key]
+    gcStats['keys'] += len(dead)
+    gcStats['bytes'] += freed
+    h2p.green_print("collectKeys: removed %s dead temp keys, %s bytes. Total %s keys, %s bytes" % \
+        (len(dead), freed, gcStats['keys'], gcStats['bytes']))
+    return freed
+
+# join statements into one Rapids program
+def rapidsProgram(statements):
+    if len(statements)==1:
+        return statements[0]
+    return ";;".join(statements) + ";;;"
+
 # we init to 1 row/col. (-1) can't figure how how to init to no rows in a single expression
 def astForInit(frame):
     return '(= !%s (c {#-1}))' % frame
     # will this work?
     # return '(= !%s "null")' % frame
 
+# id(node) -> Rapids text, while an outermost str() is building a tree's text (see Xbase.__str__)
+astMemo = None
+
 class Xbase(object):
     lastExecResult = {}
     lastResult = None
@@ -101,12 +236,36 @@ class Xbase(object):
         self.rhs = None
         self.lhs = None
 
+    # Nodes naming a temp key keep it alive (see collectKeys)
+    def __setattr__(self, name, value):
+        if name=='frame' and isTempKey(value):
+            tempKeys.setdefault(value, WeakSet()).add(self)
+        object.__setattr__(self, name, value)
+
+    # The outermost str() builds the text of the subtrees bottom up, each once, so big
+    # generated programs serialize in linear time, and deep ones don't hit the recursion limit.
+    # The texts are only kept for that one str(), so edits to nodes are always seen.
     def __str__(self):
-        # this should always be overwritten by the other classes"
-        return Xbase.defaultAst
+        global astMemo
+        if astMemo is not None:
+            text = astMemo.get(id(self))
+            if text is None:
+                text = astMemo[id(self)] = self.buildAst()
+            return text
+        astMemo = {}
+        try:
+            for node in postOrder(self):
+                str(node)
+            return astMemo[id(self)]
+        finally:
+            astMemo = None
 
     __repr__ = __str__
 
+    def buildAst(self):
+        # this should always be overwritten by the other classes"
+        return Xbase.defaultAst
+
     def __getitem__(self, items):
         debugprint("\n%s __getitem__ start" % type(self))
         # If self is anything other a Key, means it was from a pending eval with no Assign.
@@ -367,6 +526,9 @@ class Xbase(object):
         self.execResult = None
         self.result = None
 
+        if simplifyEnable:
+            simplify(self)
+
         if self.funs:
             execExpr1 = "[%s]" % self
         else:
@@ -374,83 +536,191 @@ class Xbase(object):
         # self.check_do_against_ast()
 
         h2p.green_print("%s .do() ast: %s" % (type(self), execExpr1))
+        if localEnv is not None:
+            if self._do_local(execExpr1):
+                if not batchStack:
+                    collectKeys()
+                return
+            for key in keysRead(execExpr1) & localOnly:
+                uploadLocal(key)
+            # h2o will write the key. Any local copy is stale
+            if isinstance(self, Assign) and not self.funs:
+                localEnv.frames.pop(self.frame, None)
+                localOnly.discard(self.frame)
+
+        # scalars this reads go in their keys first. Then a whole key write replaces any pending one
+        if self.funs:
+            materializeScalars(keysRead(execExpr1))
+
+        # inside a Batch, just queue the statement. The Batch sends it (and its stores) later
+        if batchStack and not self.funs:
+            self.execExpr = execExpr1
+            batchStack[-1].add(self)
+            return
+
+        stores = [] if self.funs else scalarStores(execExpr1)
+        writes = [self.frame] if isinstance(self, Assign) else []
         if not debugNoH2O:
             # functions can be multiple statements in Rapids, need []
-            execResult1, result1 = h2e.exec_expr(execExpr=execExpr1, doFuns=self.funs, timeoutSecs=timeoutSecs)
-            # look at our secret stash in the base class
-            if execResult1['key'] is not None:
-                Xbase.keyWriteHistoryList.append(execExpr1)
-
-            # remember the num_rows/num_cols (maybe update the saved col names
-            # this could update to None for scalar/string
-            # (temporary till we assign to key next in those cases)
-            self.numRows = execResult1['num_rows']
-            self.numCols = execResult1['num_cols']
-            self.scalar = execResult1['scalar']
-
-            # Deal with h2o weirdness.
-            # If it gave a scalar result and didn't create a key, put that scalar in the key
-            # with another assign. Why should I deal with another type that "depends" if the key existed already?
-            if self.funs or isinstance(self, (If, IfElse, Return)):
-                returnResult = None
-
-            elif execResult1['key'] is None:
-                debugprint("Hacking scalar result %s into a key. %s" % (self.scalar, self.frame))
-                if self.scalar is None: # this shouldn't happen? h2o should be giving a scalar result?
-                    debugprint("WARNING: %.do() is creating a one-row/oneCol result key, for %s" % (type(self)))
-                    assert self.numRows==0 and self.numCols==0, "%s %s" % (self.numRows, self.numCols)
-                    # make it match what we're doing
-                    execExpr2 = astForInit(self.frame)
-                else:
-                    print "Hack scalar to int for new key for scalar, because rapids doesn't take reals yet"
-                    # doesn't like 0.0?
-                    # we always want a key for the result, regardless of what h2o does.
-                    # what if self.scalar is NaN
-                    if math.isnan(float(self.scalar)):
-                        print "Rapids returned scalar result that's NaN. Using -1 instead: %s" % self.scalar
-                        execExpr2 = '(= !%s (c {#-1}))' % self.frame
-                    else:
-                        execExpr2 = "(= !%s (c {#%s}))" % (self.frame, int(self.scalar))
-
-                self.numRows = 1
-                self.numCols = 1
-
-                execResult2, result2 = h2e.exec_expr(execExpr=execExpr2)
-                assert execResult2['key'] is not None, dump_json(execResult2)
-                assert self.numRows==execResult2['num_rows'], "%s %s" % (self.numRows, execResult2['num_rows'])
-                assert self.numCols==execResult2['num_cols'], "%s %s" % (self.numCols, execResult2['num_cols'])
-
-                Xbase.keyWriteHistoryList.append(execExpr2)
-                returnResult = self.scalar
-
-            elif self.numCols==1:
-                if self.numRows<=1024:
-                    co = h2o_cmd.runSummary(key=self.frame, column=0, noPrint=True)
-                    # data json
-                    returnResult = co.data
-                else:
-                    raise Exception("Expr-caused Assign.do() wants to return a key with num_rows>1024\n" + \
-                        "Did you really mean it?. frame: %s numRows: %s numCols %s" %\
-                         (self.frame, self.numRows, self.numCols))
-            else:
-                if self.numCols==0 and self.numRows==0:
-                    return None # both assignDisable or not
-                elif self.assignDisable: # Expr modifies Assign with this
-                    if self.numCols>1:
-                        h2p.red_print("Expr-caused Assign.do()  wants to return a key with num_cols>1\n" + \
-                            "not supported. frame: %s numRows: %s numCols %s" % \
-                            (self.frame, self.numRows, self.numCols))
-                    # return a nice clean Key that points to the frame
-                    returnResult = Key(key=self.frame)
-                else:
-                    returnResult = Key(key=self.frame)
+            # h2o describes the last statement of a program, so the stores can go in front
+            execResult1, result1 = h2e.exec_expr(
+                execExpr=rapidsProgram([execExpr2 for k, execExpr2 in stores] + [execExpr1]),
+                doFuns=self.funs, timeoutSecs=timeoutSecs)
+            storesDone(stores, writes)
+            if stores:
+                execResult1['ast'] = execExpr1
+            returnResult = self._do_result(execExpr1, execResult1)
+            if returnResult is noResult:
+                if not batchStack:
+                    collectKeys()
+                return None # both assignDisable or not
 
         if debugNoH2O:
+            storesDone(stores, writes)
             execResult1 = {'debug': True}
             returnResult = None
 
+        self._do_done(execExpr1, execResult1, returnResult)
+        if not batchStack:
+            collectKeys()
+        return
+
+    # hybrid mode: eval at the localEnv if it has every key read, and they're small.
+    # Gets the same numRows/numCols/scalar/result h2o would give. False if h2o should do it
+    def _do_local(self, execExpr1):
+        import h2o_xl_local
+        if self.funs:
+            # local calls need the function too. h2o still gets it
+            localEnv.eval(self)
+            return False
+
+        for key in keysRead(execExpr1):
+            if key in h2o_xl_local.constants and key not in localEnv:
+                continue
+            if key not in localEnv:
+                return False
+            value = localEnv[key]
+            if h2o_xl_local.isFrame(value) and value.shape[0] > localMaxRows:
+                return False
+
+        try:
+            value = localEnv.eval(self)
+        except Exception, e:
+            # something the local interpreter doesn't do. h2o can
+            debugprint("Local eval failed, using h2o: %s %s" % (execExpr1, e))
+            return False
+
+        if isinstance(self, Assign):
+            # like the h2o scalar hack, Expr results get a key too
+            if self.assignDisable:
+                localEnv.root()[self.frame] = value
+            localOnly.add(self.frame)
+            pendingScalars.pop(self.frame, None)
+
+        if h2o_xl_local.isFrame(value):
+            self.numRows, self.numCols = h2o_xl_local.asFrame(value).shape
+            self.scalar = None
+        else:
+            self.numRows, self.numCols = 1, 1
+            self.scalar = value
+
+        if isinstance(self, (If, IfElse, Return)):
+            returnResult = None
+        elif self.scalar is not None:
+            returnResult = self.scalar
+        elif self.numCols==1 and self.numRows<=1024:
+            returnResult = list(h2o_xl_local.asFrame(value)[:, 0])
+        elif isinstance(self, Key):
+            returnResult = Key(key=self.frame)
+        else:
+            returnResult = value
+
+        execResult1 = {
+            'ast': execExpr1,
+            'local': True,
+            'key': self.frame if isinstance(self, Assign) else None,
+            'num_rows': self.numRows,
+            'num_cols': self.numCols,
+            'scalar': self.scalar,
+        }
+        self._do_done(execExpr1, execResult1, returnResult)
+        return True
+
+    # look at a statement's Rapids result: 'key', 'num_rows', 'num_cols', 'scalar'
+    # returns what .result should be, or noResult if there's nothing
+    # the scalar result gets put in a key by a 2nd statement. That's left in pendingScalars,
+    # and sent with the first statement that reads the key
+    def _do_result(self, execExpr1, execResult1, batched=False):
+        # look at our secret stash in the base class
+        if execResult1['key'] is not None:
+            noteWrite(execExpr1)
+
+        # remember the num_rows/num_cols (maybe update the saved col names
+        # this could update to None for scalar/string
+        # (temporary till we assign to key next in those cases)
+        self.numRows = execResult1['num_rows']
+        self.numCols = execResult1['num_cols']
+        self.scalar = execResult1['scalar']
+
+        # Deal with h2o weirdness.
+        # If it gave a scalar result and didn't create a key, put that scalar in the key
+        # with another assign. Why should I deal with another type that "depends" if the key existed already?
+        if self.funs or isinstance(self, (If, IfElse, Return)):
+            returnResult = None
+
+        elif execResult1['key'] is None:
+            debugprint("Hacking scalar result %s into a key. %s" % (self.scalar, self.frame))
+            if self.scalar is None: # this shouldn't happen? h2o should be giving a scalar result?
+                debugprint("WARNING: %.do() is creating a one-row/oneCol result key, for %s" % (type(self)))
+                assert self.numRows==0 and self.numCols==0, "%s %s" % (self.numRows, self.numCols)
+                # make it match what we're doing
+                execExpr2 = astForInit(self.frame)
+            else:
+                print "Hack scalar to int for new key for scalar, because rapids doesn't take reals yet"
+                # doesn't like 0.0?
+                # we always want a key for the result, regardless of what h2o does.
+                # what if self.scalar is NaN
+                if math.isnan(float(self.scalar)):
+                    print "Rapids returned scalar result that's NaN. Using -1 instead: %s" % self.scalar
+                    execExpr2 = '(= !%s (c {#-1}))' % self.frame
+                else:
+                    execExpr2 = "(= !%s (c {#%s}))" % (self.frame, int(self.scalar))
+
+            self.numRows = 1
+            self.numCols = 1
+            pendingScalars[self.frame] = execExpr2
+            returnResult = self.scalar
+
+        elif self.numCols==1:
+            if self.numRows<=1024:
+                if not batched:
+                    returnResult = list(ResultIter(self.frame, column=0, chunkRows=1024, numRows=self.numRows))
+                else:
+                    # batched: fetch the data when .result is first used
+                    self.resultFrame = self.frame
+                    returnResult = None
+            else:
+                # big: the column's values, paged from h2o as they're used
+                returnResult = ResultIter(self.frame, column=0, numRows=self.numRows)
+        else:
+            if self.numCols==0 and self.numRows==0:
+                return noResult
+            elif self.assignDisable: # Expr modifies Assign with this
+                if self.numCols>1:
+                    h2p.red_print("Expr-caused Assign.do()  wants to return a key with num_cols>1\n" + \
+                        "not supported. frame: %s numRows: %s numCols %s" % \
+                        (self.frame, self.numRows, self.numCols))
+                # return a nice clean Key that points to the frame
+                returnResult = Key(key=self.frame)
+            else:
+                returnResult = Key(key=self.frame)
+        return returnResult
+
+    def _do_done(self, execExpr1, execResult1, returnResult):
         self.execResult = execResult1
-        self.result = returnResult
+        # always replace it, so nothing from an earlier .do() is left. A resultFrame
+        # _do_result() just set for a batched statement is kept, and fetched on first use
+        self.__dict__['_result'] = returnResult
 
         self.execExpr = execExpr1
         Xbase.lastExecResult = copy(execResult1)
@@ -460,7 +730,20 @@ class Xbase(object):
         if isinstance(self, Assign):
             self.assignDone = True
 
-        return
+    # .result of a small one-col result is its data. Batched statements just
+    # remember the resultFrame, and get the data when .result is first used
+    def _get_result(self):
+        frame = self.__dict__.get('resultFrame')
+        if frame is not None:
+            self.__dict__['resultFrame'] = None
+            self.__dict__['_result'] = list(ResultIter(frame, column=0, chunkRows=1024, numRows=self.numRows))
+        return self.__dict__.get('_result')
+
+    def _set_result(self, result):
+        self.__dict__['resultFrame'] = None
+        self.__dict__['_result'] = result
+
+    result = property(_get_result, _set_result)
 
     # from http://stackoverflow.com/questions/1500718/what-is-the-right-way-to-override-the-copy-deepcopy-operations-on-an-object-in-p
     def __copy__(self):
@@ -470,6 +753,8 @@ class Xbase(object):
         cls = self.__class__
         result = cls.__new__(cls)
         result.__dict__.update(self.__dict__)
+        if isTempKey(result.__dict__.get('frame')):
+            tempKeys.setdefault(result.frame, WeakSet()).add(result)
         return result
 
     def __deepcopy__(self, memo):
@@ -487,6 +772,453 @@ class Xbase(object):
     # __call__ = __init__
     # __call__ = do
 
+#********************************************************************************
+# Lazy reader for a key's data. Rows are paged from h2o (Frames offset/len) as they're
+# used, chunkRows at a time. All the columns come in one request per page. With cols
+# (indices or names), each of those columns is paged on its own, so a few columns of a
+# wide frame is cheap.
+#     for row in Key('r1').iterRows(chunkRows=50000): ...    # lists, a value per col
+#     for v in Key('r1').iterColumn(2): ...                  # values
+# cache=True keeps every page, so iterating again or it[i] doesn't go back to h2o.
+# Otherwise just the current page is kept. Enum columns give their level strings
+resultChunkRows = 10000
+
+class ResultIter(object):
+    def __init__(self, frame, chunkRows=None, cols=None, column=None, cache=False, numRows=None):
+        self.frame = frame
+        self.chunkRows = chunkRows or resultChunkRows
+        self.column = column
+        self.cols = [column] if column is not None else cols
+        self.cache = cache
+        self.pages = {}
+        self.numRows = numRows
+        self.names = None
+
+    # the first page says how many rows there are
+    def __len__(self):
+        if self.numRows is None:
+            self.fetchPage(0)
+        return self.numRows
+
+    def fetchPage(self, page):
+        if page in self.pages:
+            return self.pages[page]
+        # a lazy scalar has to be in its key before the key is read
+        materializeScalars([self.frame])
+        # h2o offsets are 1-based
+        offset = page * self.chunkRows + 1
+        byIndex = self.cols is not None and not all(isinstance(c, basestring) for c in self.cols)
+        if self.cols is None or (byIndex and self.names is None):
+            # the whole page. With col indices, it's also how we learn the col names
+            inspect = h2o_cmd.runInspect(key=self.frame, offset=offset, len=self.chunkRows)
+            self.numRows = inspect['frames'][0]['rows']
+            columns = inspect['frames'][0]['columns']
+            self.names = [c['label'] for c in columns]
+            if self.cols is not None:
+                columns = [columns[self.names.index(c) if isinstance(c, basestring) else c] for c in self.cols]
+        else:
+            columns = []
+            for c in self.cols:
+                if not isinstance(c, basestring):
+                    c = self.names[c]
+                result = h2o_cmd.runColumn(key=self.frame, column=c, offset=offset, len=self.chunkRows)
+                self.numRows = result['frames'][0]['rows']
+                columns.append(result['frames'][0]['columns'][0])
+
+        data = []
+        for c in columns:
+            if c.get('str_data') is not None:
+                data.append(c['str_data'])
+                continue
+            # h2o json has NaN and the infinities as strings
+            values = [float(v) if isinstance(v, basestring) else v for v in c['data']]
+            if c.get('domain'):
+                domain = c['domain']
+                values = [None if v is None or math.isnan(v) else domain[int(v)] for v in values]
+            data.append(values)
+
+        if not self.cache:
+            self.pages = {}
+        self.pages[page] = data
+        return data
+
+    def __iter__(self):
+        for page in xrange((len(self) + self.chunkRows - 1) // self.chunkRows):
+            data = self.fetchPage(page)
+            if self.column is not None:
+                for v in data[0]:
+                    yield v
+            else:
+                for row in zip(*data):
+                    yield list(row)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("ResultIter row %s, %s has %s rows" % (i, self.frame, len(self)))
+        data = self.fetchPage(i // self.chunkRows)
+        if self.column is not None:
+            return data[0][i % self.chunkRows]
+        return [d[i % self.chunkRows] for d in data]
+
+#********************************************************************************
+# with h2o_xl.Batch():
+#     ...
+# The Assign/Expr .do()'s in the block are queued, then sent as one multi-statement
+# Rapids program when the block ends (or at flush(), or every maxStatements).
+# Each statement still gets its own numRows/numCols/scalar/result.
+# Scalar results are left pending (pendingScalars), like outside a Batch.
+# A statement reading a key that a queued statement may set to a scalar
+# (a reduction) flushes the batch first, since the store can't be known till then.
+class Batch(object):
+    def __init__(self, timeoutSecs=30, maxStatements=500):
+        self.timeoutSecs = timeoutSecs
+        self.maxStatements = maxStatements
+        self.statements = []
+        self.scalarKeys = set()
+        # keys a queued statement stores or writes. Later ones don't store them again
+        self.storedKeys = set()
+
+    def __enter__(self):
+        batchStack.append(self)
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        batchStack.remove(self)
+        if excType is None:
+            self.flush()
+        return False
+
+    def add(self, stmnt):
+        reads = keysRead(stmnt.execExpr)
+        if reads & self.scalarKeys:
+            self.flush()
+        # after the flush, so a scalar it just gave is stored too
+        stmnt.scalarStores = scalarStores(stmnt.execExpr, skip=self.storedKeys)
+        self.storedKeys.update(k for k, execExpr2 in stmnt.scalarStores)
+        if isinstance(stmnt, Assign):
+            self.storedKeys.add(stmnt.frame)
+        self.statements.append(stmnt)
+        if mayBeScalar(stmnt):
+            self.scalarKeys.add(stmnt.frame)
+        if len(self.statements) >= self.maxStatements:
+            self.flush()
+
+    def flush(self):
+        statements = self.statements
+        self.statements = []
+        self.scalarKeys = set()
+        self.storedKeys = set()
+        if not statements:
+            return
+
+        # each statement goes after the pending scalar stores it reads
+        program = []
+        for x in statements:
+            program.extend(execExpr2 for k, execExpr2 in x.scalarStores)
+            x.stmntIndex = len(program)
+            program.append(x.execExpr)
+        execExpr = rapidsProgram(program)
+        h2p.green_print("Batch .flush() %s statements: %s" % (len(statements), execExpr))
+        if debugNoH2O:
+            for x in statements:
+                storesDone(x.scalarStores, [x.frame] if isinstance(x, Assign) else [])
+                x._do_done(x.execExpr, {'debug': True}, None)
+            return
+
+        execResult = h2o_cmd.runExec(timeoutSecs=self.timeoutSecs, ast=execExpr)
+        for x in statements:
+            i = x.stmntIndex
+            # what h2o would have said, if the statement was sent alone
+            execResult1 = {
+                'ast': x.execExpr,
+                'key': execResult['stmnt_keys'][i],
+                'num_rows': execResult['stmnt_rows'][i],
+                'num_cols': execResult['stmnt_cols'][i],
+                'scalar': execResult['stmnt_scalars'][i],
+            }
+            # in order, so a later statement's write replaces an earlier one's scalar
+            storesDone(x.scalarStores, [x.frame] if isinstance(x, Assign) else [])
+            returnResult = x._do_result(x.execExpr, execResult1, batched=True)
+            if returnResult is not noResult:
+                x._do_done(x.execExpr, execResult1, returnResult)
+        collectKeys()
+
+# Rapids reductions. An Assign of one of these gives a scalar, not a key
+xFcnScalarSet = set([
+'min', 'max', 'sum', 'sd', 'mean', 'xorsum', 'var',
+'nrow', 'ncol', 'length', 'is.factor', 'any.factor', 'any.na',
+])
+
+def mayBeScalar(stmnt):
+    rhs = stmnt.rhs.item if isinstance(stmnt.rhs, Item) else stmnt.rhs
+    if isinstance(rhs, (int, float)):
+        return True
+    return isinstance(rhs, Fcn) and (rhs.function in xFcnScalarSet or rhs.function in xFcnUser)
+
+#********************************************************************************
+# Simplify a tree in place before .do() sends it. Each thing removed would be a pass
+# over a frame at h2o:
+#   constant-only arithmetic/compares fold to a number: (+ #1 #2) -> #3
+#   identities inside an expression drop: (* (+ %a #0) #1) -> %a
+#       not at the root of an Assign: (= !b %a) would make b share a's vecs
+#   (not (not x)) -> x, if x is a compare or logical (so already 1/0/NA)
+#   adjacent numbers/ranges in a Seq merge: {#0;#1;(: #2 #5)} -> {(: #0 #5)}
+#   Def bodies: loop-invariant subexpressions (reading no params or locals) are
+#       evaluated once, when the Def is .do()'ed, and replaced by their value/key
+simplifyEnable = True
+hoistEnable = True
+
+# compare and logical functions. Their result is 1/0/NA
+xFcnBoolSet = set([
+'g', 'G', 'l', 'L', 'n', 'N', 'lt', 'le', 'gt', 'ge', 'eq', 'ne',
+'&', '|', '&&', '||', 'and', 'or', 'la', 'lo', 'not', 'is.na',
+])
+
+# not hoisted out of a Def: a different result each time
+xFcnVolatileSet = set(['runif', 'ls', 'apply', 'sapply', 'ddply', 'reduce'])
+
+# Rapids names that aren't keys
+constantNames = set(['TRUE', 'FALSE', 'T', 'F', 'NA', 'Inf'])
+
+foldOps = {
+    '+': lambda a, b: a + b, 'plus': lambda a, b: a + b,
+    '-': lambda a, b: a - b, 'sub': lambda a, b: a - b,
+    '*': lambda a, b: a * b, 'mul': lambda a, b: a * b,
+    '/': lambda a, b: a / b, 'div': lambda a, b: a / b,
+    '**': lambda a, b: a ** b, 'pow': lambda a, b: a ** b,
+    'g': lambda a, b: float(a > b), 'G': lambda a, b: float(a >= b),
+    'l': lambda a, b: float(a < b), 'L': lambda a, b: float(a <= b),
+    'n': lambda a, b: float(a == b), 'N': lambda a, b: float(a != b),
+    'not': lambda a: float(a == 0),
+}
+
+# (function, which operand is the constant, its value): keep the other operand
+identityOps = [
+    ('+', 1, 0), ('+', 0, 0), ('plus', 1, 0), ('plus', 0, 0),
+    ('-', 1, 0), ('sub', 1, 0),
+    ('*', 1, 1), ('*', 0, 1), ('mul', 1, 1), ('mul', 0, 1),
+    ('/', 1, 1), ('div', 1, 1),
+    ('**', 1, 1), ('pow', 1, 1),
+]
+
+# the attributes of a node that hold subtrees
+def childFields(node):
+    if isinstance(node, Item):
+        return ['item']
+    if isinstance(node, (Fcn, Seq)):
+        return ['operandList']
+    if isinstance(node, Colon):
+        return ['a', 'b']
+    if isinstance(node, Assign):
+        return ['rhs']
+    if isinstance(node, KeyIndexed):
+        return ['row', 'col']
+    if isinstance(node, Return):
+        return ['expr']
+    if isinstance(node, If):
+        return ['exprList']
+    if isinstance(node, IfElse):
+        return ['ifExprList', 'elseExprList']
+    if isinstance(node, Def):
+        return ['exprList']
+    return []
+
+# the nodes of a tree, children before their parents. Not recursive, so deep trees are fine
+def postOrder(node):
+    nodes = []
+    todo = [(node, False)]
+    seen = set()
+    while todo:
+        x, childrenDone = todo.pop()
+        if childrenDone:
+            nodes.append(x)
+        elif id(x) not in seen:
+            seen.add(id(x))
+            todo.append((x, True))
+            for name in childFields(x):
+                value = getattr(x, name, None)
+                for child in (value if isinstance(value, (list, tuple)) else [value]):
+                    if isinstance(child, Xbase):
+                        todo.append((child, False))
+    return nodes
+
+# rewrite bottom up: f(node) returns node, or what replaces it
+def mapTree(node, f):
+    for name in childFields(node):
+        value = getattr(node, name)
+        if isinstance(value, list):
+            new = [mapTree(x, f) if isinstance(x, Xbase) else x for x in value]
+            if any(a is not b for a, b in zip(new, value)):
+                setattr(node, name, new)
+        elif isinstance(value, Xbase):
+            new = mapTree(value, f)
+            if new is not value:
+                setattr(node, name, new)
+    return f(node)
+
+def walkTree(node):
+    yield node
+    for name in childFields(node):
+        value = getattr(node, name)
+        for x in (value if isinstance(value, list) else [value]):
+            if isinstance(x, Xbase):
+                for y in walkTree(x):
+                    yield y
+
+# the number an Item holds, or None
+def constantOf(node):
+    while isinstance(node, Item):
+        node = node.item
+    if isinstance(node, bool):
+        return None
+    if isinstance(node, (int, long, float)):
+        return float(node)
+    if isinstance(node, basestring) and re.match(r"#-?[0-9.]+(e[-+]?[0-9]+)?$", node):
+        return float(node[1:])
+    return None
+
+def numberItem(value):
+    if value==int(value) and abs(value) < 2**53:
+        value = int(value)
+    return Item(value, noRefCnt=True)
+
+def isBool(node):
+    while isinstance(node, Item):
+        node = node.item
+    return isinstance(node, Fcn) and node.function in xFcnBoolSet
+
+def foldFcn(fcn):
+    op = foldOps.get(fcn.function)
+    values = [constantOf(x) for x in fcn.operandList]
+    if op is None or None in values or op.func_code.co_argcount!=len(values):
+        return None
+    try:
+        value = op(*values)
+    except (ZeroDivisionError, OverflowError, ValueError):
+        return None
+    if math.isnan(value) or math.isinf(value):
+        return None
+    return numberItem(value)
+
+def identityOf(fcn):
+    if len(fcn.operandList)!=2:
+        return None
+    for function, i, value in identityOps:
+        if fcn.function==function and constantOf(fcn.operandList[i])==value:
+            return fcn.operandList[1-i]
+    return None
+
+def dropIdentities(fcn):
+    operands = list(fcn.operandList)
+    for i, x in enumerate(operands):
+        if isinstance(x, Item) and isinstance(x.item, Fcn):
+            same = identityOf(x.item)
+            if same is not None:
+                operands[i] = same
+    if any(a is not b for a, b in zip(operands, fcn.operandList)):
+        fcn.operandList = operands
+    return operands
+
+def simplifyNode(node):
+    if isinstance(node, Item):
+        # Item(Item(x)) from a replaced subtree
+        if isinstance(node.item, Item):
+            node.item = node.item.item
+        return node
+
+    if isinstance(node, Fcn):
+        operands = dropIdentities(node)
+
+        if node.function=='not' and len(operands)==1:
+            inner = operands[0].item if isinstance(operands[0], Item) else operands[0]
+            if isinstance(inner, Fcn) and inner.function=='not' and len(inner.operandList)==1 and \
+                    isBool(inner.operandList[0]):
+                return inner.operandList[0]
+
+        folded = foldFcn(node)
+        return node if folded is None else folded
+
+    if isinstance(node, Seq):
+        spans = []
+        for x in node.operandList:
+            item = x.item if isinstance(x, Item) else x
+            if isinstance(item, Colon):
+                span = (constantOf(item.a), constantOf(item.b))
+            else:
+                span = (constantOf(x), constantOf(x))
+            if None in span or span[0] < 0 or span[0]!=int(span[0]) or span[1]!=int(span[1]):
+                return node
+            if spans and spans[-1][1] + 1==span[0]:
+                spans[-1] = (spans[-1][0], span[1])
+            else:
+                spans.append(span)
+        if len(spans)==len(node.operandList):
+            return node
+        node.operandList = [numberItem(a) if a==b else Item(Colon(int(a), int(b)), noRefCnt=True) for a, b in spans]
+        return node
+
+    if isinstance(node, (If, IfElse)):
+        # the clause itself has to stay an expression, just its operands
+        clause = node.clause.item if isinstance(node.clause, Item) else node.clause
+        if isinstance(clause, Fcn):
+            for x in clause.operandList:
+                mapTree(x, simplifyNode)
+            dropIdentities(clause)
+        return node
+
+    return node
+
+# Def: evaluate loop-invariant subexpressions once, now, instead of on every call
+def hoistInvariants(fcnDef):
+    variant = set(str(p) for p in fcnDef.paramList)
+    for x in walkTree(fcnDef):
+        if isinstance(x, Assign):
+            variant.add(x.frame)
+
+    def invariant(fcn):
+        reads = keysRead(str(fcn)) - constantNames
+        if not reads or reads & variant:
+            return False
+        for x in walkTree(fcn):
+            if isinstance(x, Assign) or \
+                    (isinstance(x, Fcn) and (x.function in xFcnUser or x.function in xFcnVolatileSet)):
+                return False
+        return True
+
+    def hoisted(fcn):
+        a = Assign(None, fcn, noRefCnt=True)
+        if batchStack:
+            batchStack[-1].flush()
+        debugprint("Def %s: hoisted %s to %s" % (fcnDef.function, fcn, a.frame))
+        pinnedKeys.add(a.frame)
+        if a.scalar is not None and not math.isnan(float(a.scalar)):
+            return Item(a.scalar)
+        return Key(a.frame, noRefCnt=True)
+
+    def hoistIn(node):
+        for name in childFields(node):
+            value = getattr(node, name)
+            children = value if isinstance(value, list) else [value]
+            changed = False
+            for i, x in enumerate(children):
+                if isinstance(x, Fcn) and invariant(x):
+                    children[i] = hoisted(x)
+                    changed = True
+                elif isinstance(x, Xbase):
+                    hoistIn(x)
+            if changed:
+                setattr(node, name, children if isinstance(value, list) else children[0])
+
+    hoistIn(fcnDef)
+
+def simplify(node):
+    mapTree(node, simplifyNode)
+    if isinstance(node, Def) and hoistEnable and not debugNoH2O:
+        hoistInvariants(node)
+    return node
+
 #********************************************************************************
 def translateValue(item="F"):
     # translate any common text abbreviations to the required long form
@@ -538,7 +1270,7 @@ class Item(Xbase):
                 self.assignIfRoot()
 
 
-    def __str__(self):
+    def buildAst(self):
         item = self.item
         # debugprint("Item:", item)
         # xItem can't be used for lhs
@@ -577,9 +1309,10 @@ class Item(Xbase):
                 itemStr = "#%s" % item # good number!
             else: # not number
                 # if it's just [a-zA-Z0-9_], tack on the % for probable initial key reference
-                itemStr = "%s" % item
+                # (itemStr is already str(item). Don't str a node item again: each level
+                # of nested Items would double the work)
                 if re.match(r"[a-zA-Z0-9_]+$", itemStr):
-                    itemStr = "%{}".format(item)
+                    itemStr = "%{}".format(itemStr)
 
         return itemStr
 
@@ -589,8 +1322,6 @@ class Item(Xbase):
     def __setitem__(self, items, rhs):
         raise Exception("trying to __setitem__ index an Item? doesn't make sense? %s %s" % (self, items))
 
-    __repr__ = __str__
-
 
 #********************************************************************************
 
@@ -667,7 +1398,7 @@ def unpackOperands(operands, parent=None, toItem=True):
         raise Exception("%s unpackOperands operandList is None or empty: %s" % (parent, operandList))
 
     if parent:
-        debugprint("%s: %s" % (parent, map(str,operandList)))
+        debugprint("%s:" % parent, operandList)
 
     # always returns a list, even if one thing
     return operandList
@@ -694,12 +1425,10 @@ class Seq(Xbase):
         self.operandList = operandList
         # FIX! should we do more type checking on operands?
 
-    def __str__(self):
+    def buildAst(self):
         oprString = ";".join(map(str, self.operandList))
         return "{%s}" % oprString
 
-    __repr__ = __str__
-
     def __getitem__(self, items):
         raise Exception("trying to __getitem__ index a Seq? doesn't make sense? %s %s" % (self, items))
     def __setitem__(self, items, rhs):
@@ -715,7 +1444,7 @@ class Colon(Xbase):
         # FIX! should we do more type checking on operands?
 
 
-    def __str__(self):
+    def buildAst(self):
         # no colon if both None
         if str(self.a) in  ['"null"', None] and str(self.b) in ['"null"', None]:
             return '"null"'
@@ -738,7 +1467,7 @@ class Key(Xbase):
     def __init__(self, key=None, noRefCnt=False):
         if key is None:
             # no h2o name? give it one that's unique for the instance
-            key = "knon_" + hex(id(self))
+            key = "knon_0x%x" % next(knonCount)
             debugprint("Key creating h2o key name for the instance, none provided: %s" % key)
 
         # to date, have been passing strings
@@ -766,13 +1495,22 @@ class Key(Xbase):
         # FIX! should make this a weak dictionary reference? don't want to affect python GC?
         # xKeyIndexedList.append(frame)
 
-    def __str__(self):
+    def buildAst(self):
         frame = self.frame
         if not re.match('\%', frame):
             frame = "%{}".format(self.frame)
         return '%s' % frame
 
-    __repr__ = __str__
+    # lazy readers for the key's data, paged from h2o as they're used (see ResultIter)
+    def iterRows(self, chunkRows=None, cols=None, cache=False):
+        if isinstance(self, KeyIndexed):
+            raise Exception("iterRows on a KeyIndexed. Assign it to a key first %s" % self)
+        return ResultIter(self.frame, chunkRows=chunkRows, cols=cols, cache=cache)
+
+    def iterColumn(self, column=0, chunkRows=None, cache=False):
+        if isinstance(self, KeyIndexed):
+            raise Exception("iterColumn on a KeyIndexed. Assign it to a key first %s" % self)
+        return ResultIter(self.frame, chunkRows=chunkRows, column=column, cache=cache)
 
     # slicing
     # this is used on lhs and rhs? we never use a[0] = ... Just a[0] <== ...
@@ -888,7 +1626,7 @@ class KeyIndexed(Key):
             self.refcntInc()
             self.assignIfRoot()
 
-    def __str__(self):
+    def buildAst(self):
         frame = self.frame
         row = self.row
         col = self.col
@@ -922,8 +1660,6 @@ class KeyIndexed(Key):
         else:
             return '([ %s %s %s)' % (frame, row, col)
 
-    __repr__ = __str__
-
 # slicing/indexing magic methods
 # http://www.siafoo.net/article/57
 
@@ -945,7 +1681,7 @@ class KeyInit(Xbase):
             self.refcntInc()
             self.assignIfRoot()
 
-    def __str__(self):
+    def buildAst(self):
         # This should give zero row key result. Does that result in Scalar?
         # return "(= !%s %s)" % (self.frame, '(is.na (c {#0}))' )
         return astForInit(self.frame)
@@ -967,7 +1703,7 @@ class DF(Key):
         self.refcntInc()
         self.assignIfRoot()
 
-    def __str__(self):
+    def buildAst(self):
         frame = self.frame
         # no % prefix
         return '%s' % frame
@@ -1011,16 +1747,15 @@ class Fcn(Xbase):
         self.operandList = operandList
         self.function = function
         # can I do a str() here before everything has been initted?
-        debugprint("Fcn:", str(self))
+        # debugprint does the str(), only if it prints. A long chain of Fcns is quadratic otherwise
+        debugprint("Fcn:", self)
 
         self.refcntInc()
         self.assignIfRoot()
 
-    def __str__(self):
+    def buildAst(self):
         return "(%s %s)" % (self.function, " ".join(map(str, self.operandList)))
 
-    __repr__ = __str__
-
     def __getitem__(self, items):
         raise Exception("trying to __getitem__ index a Seq? doesn't make sense? %s %s" % (self, items))
     def __setitem__(self, items, rhs):
@@ -1036,17 +1771,14 @@ class Return(Xbase):
         self.refcntInc(expr)
         self.assignIfRoot()
 
-    def __str__(self):
+    def buildAst(self):
         return "%s" % self.expr
 
-    __repr__ = __str__
-
     def __getitem__(self, items):
         raise Exception("trying to __getitem__ index a Return? doesn't make sense? %s %s" % (self, items))
     def __setitem__(self, items, rhs):
         raise Exception("trying to __setitem__ index a Return? doesn't make sense? %s %s" % (self, items))
 
-from weakref import WeakSet
 # always does a .do() on init
 class Assign(Key):
 
@@ -1125,7 +1857,7 @@ class Assign(Key):
     # leading % is illegal on lhs
     # could check that it's a legal key name
     # FIX! what about checking rhs references have % for keys.
-    def __str__(self):
+    def buildAst(self):
         if self.assignDisable:
             return "%s" % self.rhs
         else:
@@ -1213,15 +1945,13 @@ class Def(Xbase):
         # how do I know all references to me have done their refcntInc?
         self.assignIfRoot()
 
-    def __str__(self):
+    def buildAst(self):
         # could check that it's a legal key name
         # FIX! what about checking rhs references have % for keys.
         paramStr = " ".join(map(str, self.paramList))
         exprStr = ";;".join(map(str, self.exprList))
         return "(def %s {%s} %s;;;)" % (self.function, paramStr, exprStr)
 
-    __repr__ = __str__
-
 class If(Xbase):
     def __init__(self, clause, *exprs): # don't need noRefCnt here
         super(If, self).__init__()
@@ -1241,14 +1971,12 @@ class If(Xbase):
         self.refcntInc(clause, exprs)
         self.assignIfRoot()
 
-    def __str__(self):
+    def buildAst(self):
         exprStr = ";;".join(map(str, self.exprList))
         if len(self.exprList)>1:
             exprStr += ";;;"
         return "(if (%s) %s)" % (self.clause, exprStr)
 
-    __repr__ = __str__
-
 
 # can only text Expr or a Expr List for ifExpr/ElseExpr
 class IfElse(Xbase):
@@ -1263,7 +1991,7 @@ class IfElse(Xbase):
         self.refcntInc(clause, ifExpr, elseExpr)
         self.assignIfRoot()
 
-    def __str__(self):
+    def buildAst(self):
         ifExprStr = ";;".join(map(str, self.ifExprList))
         if len(self.ifExprList)>1:
             ifExprStr += ";;;"
@@ -1274,8 +2002,6 @@ class IfElse(Xbase):
 
         return "(if (%s) %s) (else %s)" % (self.clause, ifExprStr, elseExprStr)
 
-    __repr__ = __str__
-
 
 # 'c' can only have one operand? And it has to be a string or number
 # have this because it's so common as a function
@@ -0,0 +1,412 @@
+import re, math
+import numpy as np
+import h2o_xl
+from h2o_xl import Xbase, Item, Seq, Colon, Key, KeyIndexed, KeyInit, Fcn, Return, Assign, Def, If, IfElse
+
+# Local interpreter for h2o_xl trees, over NumPy arrays. No h2o needed.
+# Frames are 2d float arrays (rows x cols), with NaN for NA. Scalars are floats.
+#
+#    env = h2o_xl_local.Env()
+#    env.loadCsv('r1', 'smalldata/iris/iris_wheader.csv')
+#    env.run(Assign('b', Fcn('+', Key('r1'), 1), do=False))
+#    print env['b']
+#
+# Used by h2o_xl for hybrid mode (h2o_xl.localEnv: small frames run here, skipping
+# the round trip to h2o), and by tests as an offline oracle for Rapids results.
+# Indexing follows Rapids: 0-based, (: a b) spans include b, negative indices select out.
+
+# constants Rapids knows by name
+constants = {
+    'TRUE': 1.0, 'T': 1.0, 'FALSE': 0.0, 'F': 0.0,
+    'NA': float('nan'), 'Inf': float('inf'),
+}
+
+class Span(object):
+    def __init__(self, a, b):
+        self.a = a
+        self.b = b
+
+    def indices(self):
+        return range(int(self.a), int(self.b) + 1)
+
+# Return inside a Def body
+class ReturnValue(Exception):
+    def __init__(self, value):
+        self.value = value
+
+#********************************************************************************
+def isFrame(v):
+    return isinstance(v, np.ndarray)
+
+# any value as a 2d frame
+def asFrame(v):
+    if isFrame(v):
+        return v if v.ndim==2 else v.reshape(-1, 1)
+    return np.array([[float(v)]])
+
+# 1x1 frames are used like scalars
+def asScalar(v):
+    if isFrame(v):
+        if v.size!=1:
+            raise Exception("h2o_xl_local: expected a scalar, got a %s frame" % (v.shape,))
+        return float(v.flat[0])
+    return float(v)
+
+def truthy(v):
+    v = asScalar(v)
+    return not math.isnan(v) and v!=0
+
+# R/Rapids comparisons: 1/0, NaN if either side is NaN
+def compare(op):
+    def f(a, b):
+        with np.errstate(invalid='ignore'):
+            r = op(a, b).astype(float)
+        nan = np.isnan(a) | np.isnan(b)
+        return np.where(nan, np.nan, r) if isFrame(r) else (np.nan if nan else float(r))
+    return f
+
+def logical(op):
+    def f(a, b):
+        return compare(lambda x, y: op(x!=0, y!=0))(a, b)
+    return f
+
+def notOp(a):
+    with np.errstate(invalid='ignore'):
+        r = (a==0)
+    return np.where(np.isnan(a), np.nan, r.astype(float)) if isFrame(a) else (np.nan if math.isnan(a) else float(r))
+
+def xorsum(a):
+    bits = np.ascontiguousarray(a, dtype=np.float64).ravel().view(np.int64)
+    return float(np.array([np.bitwise_xor.reduce(bits) if len(bits) else 0], dtype=np.int64).view(np.float64)[0])
+
+binaryOps = {
+    '+': np.add, 'plus': np.add,
+    '-': np.subtract, 'sub': np.subtract,
+    '*': np.multiply, 'mul': np.multiply,
+    '/': np.true_divide, 'div': np.true_divide,
+    '**': np.power, 'pow': np.power,
+    '%': np.mod, 'mod': np.mod,
+    'g': compare(np.greater), 'gt': compare(np.greater),
+    'G': compare(np.greater_equal), 'ge': compare(np.greater_equal),
+    'l': compare(np.less), 'lt': compare(np.less),
+    'L': compare(np.less_equal), 'le': compare(np.less_equal),
+    'n': compare(np.equal), 'eq': compare(np.equal),
+    'N': compare(np.not_equal), 'ne': compare(np.not_equal),
+    '&': logical(np.logical_and), 'and': logical(np.logical_and), '&&': logical(np.logical_and), 'la': logical(np.logical_and),
+    '|': logical(np.logical_or), 'or': logical(np.logical_or), '||': logical(np.logical_or), 'lo': logical(np.logical_or),
+}
+
+unaryOps = {
+    'not': notOp, '!': notOp,
+    'abs': np.abs, 'sign': np.sign, 'sqrt': np.sqrt,
+    'ceiling': np.ceil, 'floor': np.floor, 'trunc': np.trunc,
+    'log': np.log, 'exp': np.exp,
+    'cos': np.cos, 'sin': np.sin, 'tan': np.tan,
+    'acos': np.arccos, 'asin': np.arcsin, 'atan': np.arctan,
+    'cosh': np.cosh, 'sinh': np.sinh, 'tanh': np.tanh,
+    'is.na': lambda a: np.isnan(a).astype(float) if isFrame(a) else float(math.isnan(a)),
+    'factor': lambda a: a,
+}
+
+# reductions over all the values of their args. A trailing TRUE/FALSE is na.rm
+reduceOps = {
+    'sum': (np.sum, np.nansum),
+    'min': (np.min, np.nanmin),
+    'max': (np.max, np.nanmax),
+    'mean': (np.mean, np.nanmean),
+    'sd': (lambda a: np.std(a, ddof=1), lambda a: np.nanstd(a, ddof=1)),
+    'var': (lambda a: np.var(a, ddof=1), lambda a: np.nanvar(a, ddof=1)),
+    'xorsum': (xorsum, lambda a: xorsum(a[~np.isnan(a)])),
+}
+
+#********************************************************************************
+class Env(object):
+    def __init__(self, frames=None, parent=None):
+        self.parent = parent
+        self.frames = {}
+        self.funcs = {}
+        for key, value in (frames or {}).items():
+            self[key] = value
+
+    def root(self):
+        return self if self.parent is None else self.parent.root()
+
+    def __contains__(self, key):
+        return key in self.frames or (self.parent is not None and key in self.parent)
+
+    def __getitem__(self, key):
+        if key in self.frames:
+            return self.frames[key]
+        if self.parent is not None:
+            return self.parent[key]
+        if key in constants:
+            return constants[key]
+        raise KeyError("h2o_xl_local: no key %s" % key)
+
+    def __setitem__(self, key, value):
+        self.frames[key] = asFrame(np.asarray(value, dtype=float)) if isinstance(value, (list, tuple, np.ndarray)) else value
+
+    def function(self, name):
+        env = self
+        while env is not None:
+            if name in env.funcs:
+                return env.funcs[name]
+            env = env.parent
+        raise Exception("h2o_xl_local: unknown function %s" % name)
+
+    # numeric csv columns. Anything that's not a number (enums) is NaN
+    def loadCsv(self, key, csvPathname, header=True):
+        data = np.genfromtxt(csvPathname, delimiter=',', skip_header=1 if header else 0, dtype=float)
+        self[key] = data
+        return self[key]
+
+    # no header. NaN is written as an empty field, which h2o parses as NA
+    def saveCsv(self, key, csvPathname):
+        with open(csvPathname, 'w') as f:
+            for row in asFrame(self[key]):
+                f.write(",".join('' if math.isnan(v) else repr(float(v)) for v in row) + "\n")
+
+    # run statements in order, returning the last one's value
+    def run(self, *stmnts):
+        value = None
+        for s in stmnts:
+            value = self.eval(s)
+        return value
+
+    #********************************************************************************
+    def eval(self, node):
+        if isinstance(node, (list, tuple)):
+            return self.run(*node)
+        if isinstance(node, (int, long, float)):
+            return float(node)
+        if isinstance(node, basestring):
+            return self.evalToken(h2o_xl.translateValue(node))
+        if isinstance(node, np.ndarray):
+            return node
+
+        if isinstance(node, Item):
+            item = node.item
+            if isinstance(item, Xbase):
+                return self.eval(item)
+            return self.evalToken(str(node))
+
+        # subclasses before their bases: KeyIndexed and Assign are Keys
+        if isinstance(node, KeyIndexed):
+            return self.evalSlice(node)
+        if isinstance(node, Assign):
+            return self.evalAssign(node)
+        if isinstance(node, Key):
+            return self[node.frame.lstrip('%')]
+        if isinstance(node, KeyInit):
+            self.root()[node.frame] = [[-1]]
+            return self[node.frame]
+        if isinstance(node, Seq):
+            values = []
+            for x in node.operandList:
+                v = self.eval(x)
+                values.extend(v.indices() if isinstance(v, Span) else [asScalar(v)])
+            return values
+        if isinstance(node, Colon):
+            a = self.eval(node.a)
+            b = self.eval(node.b)
+            if a is None and b is None:
+                return None
+            return Span(asScalar(a), asScalar(b))
+        if isinstance(node, Fcn):
+            return self.evalFcn(node.function, node.operandList)
+        if isinstance(node, Def):
+            self.root().funcs[node.function] = node
+            return None
+        if isinstance(node, Return):
+            raise ReturnValue(self.eval(node.expr))
+        if isinstance(node, IfElse):
+            return self.run(*(node.ifExprList if truthy(self.eval(node.clause)) else node.elseExprList))
+        if isinstance(node, If):
+            return self.run(*node.exprList) if truthy(self.eval(node.clause)) else None
+        raise Exception("h2o_xl_local: can't eval %s %s" % (type(node), node))
+
+    # one Rapids token: #number, %key, "string"
+    def evalToken(self, tok):
+        tok = str(tok)
+        if tok=='"null"':
+            return None
+        if tok[0]=='#':
+            return float(tok[1:])
+        if tok[0] in '%$!':
+            return self[tok[1:]]
+        if tok[0] in '"\'':
+            return tok[1:-1]
+        if re.match(r"[-+.0-9]", tok):
+            return float(tok)
+        return self[tok]
+
+    #********************************************************************************
+    # rows/cols selected from n by a Rapids index: None (all), number, Span, list, or 0/1 column
+    def select(self, sel, n):
+        if sel is None:
+            return slice(None)
+        if isFrame(sel):
+            col = asFrame(sel)[:, 0]
+            if len(col)==n and np.all((col==0) | (col==1)):
+                return col==1
+            return [int(i) for i in col]
+        if isinstance(sel, Span):
+            sel = sel.indices()
+        elif not isinstance(sel, list):
+            sel = [asScalar(sel)]
+        sel = [int(i) for i in sel]
+        if sel and all(i < 0 for i in sel):
+            # negatives select out (-1 is the first)
+            out = set(-i - 1 for i in sel)
+            return [i for i in range(n) if i not in out]
+        if any(i < 0 for i in sel):
+            raise Exception("h2o_xl_local: Cannot mix negative and positive array selection. %s" % sel)
+        return sel
+
+    def evalSlice(self, node):
+        fr = asFrame(self[node.frame.lstrip('%')])
+        rows = self.eval(node.row)
+        cols = 0.0 if node.dim==1 else self.eval(node.col)
+        # a single number for both is a scalar in Rapids
+        if isinstance(rows, float) and isinstance(cols, float) and rows >= 0 and cols >= 0:
+            return float(fr[int(rows), int(cols)])
+        c = self.select(cols, fr.shape[1])
+        r = self.select(rows, fr.shape[0])
+        return fr[:, c][r, :]
+
+    def evalAssign(self, node):
+        value = self.eval(node.rhs)
+        if node.assignDisable:
+            return value
+        lhs = node.lhs
+        if not isinstance(lhs, KeyIndexed):
+            self.root()[node.frame] = value
+            return self[node.frame]
+
+        # slice assign: set into a copy, so other references to the old frame don't see it
+        fr = asFrame(self[lhs.frame.lstrip('%')]).copy()
+        rows = self.eval(lhs.row)
+        cols = 0.0 if lhs.dim==1 else self.eval(lhs.col)
+        c = self.select(cols, fr.shape[1])
+        # writing just past the last col appends it
+        if isinstance(c, list) and c and max(c)==fr.shape[1]:
+            fr = np.hstack([fr, np.full((fr.shape[0], 1), np.nan)])
+        r = self.select(rows, fr.shape[0])
+        rowIdx = np.arange(fr.shape[0])[r]
+        colIdx = np.arange(fr.shape[1])[c]
+        fr[np.ix_(rowIdx, colIdx)] = value if not isFrame(value) else asFrame(value)
+        self.root()[lhs.frame.lstrip('%')] = fr
+        return fr
+
+    #********************************************************************************
+    def evalFcn(self, function, operandList):
+        args = [self.eval(x) for x in operandList]
+        if function in h2o_xl.xFcnUser:
+            return self.call(function, args)
+        if function in binaryOps and len(args)==2:
+            a, b = args
+            with np.errstate(divide='ignore', invalid='ignore'):
+                r = binaryOps[function](a if isFrame(a) else float(a), b if isFrame(b) else float(b))
+            return r if isFrame(r) else float(r)
+        if function in unaryOps:
+            a = args[0]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                r = unaryOps[function](a if isFrame(a) else float(a))
+            return r if isFrame(r) else float(r)
+        if function in reduceOps:
+            naRm = False
+            if len(args) > 1 and not isFrame(args[-1]):
+                naRm = truthy(args.pop())
+            values = np.concatenate([asFrame(a).ravel() for a in args])
+            return float(reduceOps[function][1 if naRm else 0](values))
+
+        if function=='c':
+            a = args[0] if len(args)==1 else [asScalar(x) for x in args]
+            return asFrame(np.array(a if isinstance(a, list) else [asScalar(a)], dtype=float))
+        if function=='cbind':
+            frames = [asFrame(a) for a in args]
+            rows = max(f.shape[0] for f in frames)
+            return np.hstack([np.repeat(f, rows, axis=0) if f.shape[0]==1 else f for f in frames])
+        if function=='rbind':
+            return np.vstack([asFrame(a) for a in args])
+        if function=='nrow':
+            return float(asFrame(args[0]).shape[0])
+        if function=='ncol':
+            return float(asFrame(args[0]).shape[1])
+        if function=='length':
+            return float(asFrame(args[0]).shape[0])
+        if function=='any.na':
+            return float(np.isnan(asFrame(args[0])).any())
+        if function in ('is.factor', 'any.factor'):
+            return 0.0
+        if function=='ifelse':
+            test, yes, no = args
+            r = np.where(asFrame(test)!=0, yes, no)
+            return np.where(np.isnan(asFrame(test)), np.nan, r)
+        if function=='round':
+            return np.round(args[0], int(asScalar(args[1])) if len(args) > 1 else 0)
+        if function=='signif':
+            digits = int(asScalar(args[1])) if len(args) > 1 else 6
+            a = asFrame(args[0])
+            with np.errstate(divide='ignore', invalid='ignore'):
+                mag = np.where(a==0, 0, np.floor(np.log10(np.abs(a))))
+            scale = 10.0 ** (digits - 1 - mag)
+            return np.round(a * scale) / scale
+        if function=='seq_len':
+            return asFrame(np.arange(1, int(asScalar(args[0])) + 1, dtype=float))
+        if function=='seq':
+            start, stop = asScalar(args[0]), asScalar(args[1])
+            by = asScalar(args[2]) if len(args) > 2 else 1.0
+            return asFrame(np.arange(start, stop + by / 2.0, by, dtype=float))
+        if function=='rep_len':
+            return asFrame(np.resize(asFrame(args[0])[:, 0], int(asScalar(args[1]))))
+        if function=='cut':
+            return self.cut(*args)
+        raise Exception("h2o_xl_local: function %s not supported" % function)
+
+    # (cut vector breaks labels include.lowest right dig.lab), as h2o does it.
+    # Gives the 0-based bin of each value
+    def cut(self, vector, breaks, labels=None, include_lowest=0.0, right=1.0, dig_lab=3.0):
+        x = asFrame(vector)
+        if x.shape[1]!=1:
+            raise Exception("h2o_xl_local: First argument must be a numeric column vector")
+        x = x[:, 0]
+        cuts = list(breaks) if isinstance(breaks, list) else [asScalar(breaks)]
+        fmin, fmax = np.nanmin(x), np.nanmax(x)
+        nbins = len(cuts) - 1
+        if nbins==0:
+            if cuts[0] < 2:
+                raise Exception("h2o_xl_local: The number of cuts must be >= 2. Got: %s" % cuts[0])
+            nbins = int(math.floor(cuts[0]))
+            width = (fmax - fmin) / nbins
+            cuts = [fmin - 0.001 * (fmax - fmin)]
+            for i in range(1, nbins):
+                cuts.append(fmax + 0.001 * (fmax - fmin) if i==nbins - 1 else fmin + i * width)
+        diglab = min(asScalar(dig_lab), 12)
+        cuts = [math.floor(c * 10 ** diglab + 0.5) / 10 ** diglab for c in cuts]
+        incLow = truthy(include_lowest)
+        right = truthy(right)
+
+        out = np.full(len(x), np.nan)
+        for r, v in enumerate(x):
+            if math.isnan(v) or (incLow and v < cuts[0]) or (not incLow and v <= cuts[0]) or \
+                    (right and v > cuts[-1]) or (not right and v >= cuts[-1]):
+                continue
+            for i in range(1, len(cuts)):
+                if (right and v <= cuts[i]) or (not right and v < cuts[i]):
+                    out[r] = i - 1
+                    break
+        return asFrame(out)
+
+    # call a Def'ed function: params bound in a new scope, value of the last expr or a Return
+    def call(self, name, args):
+        fcn = self.function(name)
+        if len(args)!=len(fcn.paramList):
+            raise Exception("h2o_xl_local: %s takes %s args, got %s" % (name, len(fcn.paramList), len(args)))
+        env = Env(parent=self)
+        for p, a in zip(fcn.paramList, args):
+            env.frames[str(p)] = a
+        try:
+            return env.run(*fcn.exprList)
+        except ReturnValue, r:
+            return r.value
@@ -0,0 +1,268 @@
+import re
+import h2o_xl
+from h2o_xl import Seq, Colon, Key, KeyIndexed, Fcn, Assign, Def, If, IfElse
+
+# Rapids text -> h2o_xl node trees. The reverse of str(node).
+#
+#    stmnts = h2o_xl_parse.parseProgram('(= !b (+ %r1 #1));;(= !s (sum %b));;;')
+#    a = h2o_xl_parse.parseExpr('(= !b (+ %r1 #1))')
+#    a.do()
+#
+# Parsing is two steps. The text is scanned into nested tuples, which are cached by text,
+# then node trees are built from those (cheap, and fresh every time, since .do() and
+# simplify() change nodes). So a program loaded from a file (loadProgram) doesn't run any
+# of the Python that built it, and doesn't rescan the text if it's loaded again.
+#
+# astEqual() compares two Rapids texts by structure: whitespace, $ vs % and the ids of
+# h2o_xl's temp keys (knon_0x..) don't matter, but which temp key is used where does.
+
+# the tuples:
+#   ('num', '#3') ('str', '"null"') ('ref', 'r1') ('set', 'b') ('name', 'x')
+#   ('seq', [items]) ('call', function, [args])
+#   ('def', function, [params], [stmnts]) ('if', clause, [stmnts]) ('else', [stmnts])
+
+# text -> tuples
+parseCache = {}
+parseCacheMax = 10000
+
+tokenRe = re.compile(r"[^\s();{}\[\]]+")
+
+class Scanner(object):
+    def __init__(self, text):
+        self.text = text
+        self.i = 0
+
+    def error(self, msg):
+        raise Exception("h2o_xl_parse: %s at %s: %s" % (msg, self.i, self.text[max(0, self.i-40):self.i+40]))
+
+    def skipWS(self):
+        text = self.text
+        while self.i < len(text) and text[self.i] in ' \t\r\n':
+            self.i += 1
+        return self
+
+    def peek(self):
+        return self.text[self.i] if self.i < len(self.text) else None
+
+    def expect(self, c):
+        self.skipWS()
+        if self.peek()!=c:
+            self.error("expected '%s'" % c)
+        self.i += 1
+
+    def token(self):
+        m = tokenRe.match(self.text, self.i)
+        if not m:
+            self.error("expected a token")
+        self.i = m.end()
+        return m.group(0)
+
+    def expr(self):
+        self.skipWS()
+        c = self.peek()
+        if c is None:
+            self.error("unexpected end")
+        if c=='(':
+            return self.call()
+        if c=='{':
+            return self.seq()
+        if c in '"\'':
+            end = self.text.find(c, self.i + 1)
+            if end < 0:
+                self.error("unterminated string")
+            s = self.text[self.i:end + 1]
+            self.i = end + 1
+            return ('str', s)
+        tok = self.token()
+        if tok[0]=='#':
+            return ('num', tok)
+        if tok[0] in '%$':
+            return ('ref', tok[1:])
+        if tok[0]=='!':
+            return ('set', tok[1:])
+        return ('name', tok)
+
+    # {a;b;...}. Def params are space separated
+    def seq(self):
+        self.expect('{')
+        items = []
+        while True:
+            self.skipWS()
+            c = self.peek()
+            if c=='}':
+                self.i += 1
+                return ('seq', items)
+            if c==';':
+                self.i += 1
+                continue
+            items.append(self.expr())
+
+    # statements separated by ;; and ended by ;;; (or just the closing paren)
+    def stmnts(self, end):
+        stmnts = []
+        while True:
+            self.skipWS()
+            c = self.peek()
+            if c is None or c==end:
+                return stmnts
+            if c in ')]}':
+                self.error("unbalanced '%s'" % c)
+            if c==';':
+                while self.peek()==';':
+                    self.i += 1
+                continue
+            stmnts.append(self.expr())
+
+    def call(self):
+        self.expect('(')
+        # Rapids wants the function right after the paren
+        if self.peek() is None or self.peek() in ' \t\r\n':
+            self.error("space after '('")
+        function = self.token() if self.peek()!='[' else self.text[self.i]
+        if function=='[':
+            self.i += 1
+        if function=='def':
+            name = self.skipWS().token()
+            params = [p[1] for p in self.seq()[1]]
+            body = self.stmnts(')')
+            self.expect(')')
+            return ('def', name, params, body)
+        if function=='if':
+            self.expect('(')
+            clause = self.expr()
+            self.expect(')')
+            body = self.stmnts(')')
+            self.expect(')')
+            return ('if', clause, body)
+        if function=='else':
+            body = self.stmnts(')')
+            self.expect(')')
+            return ('else', body)
+        args = []
+        while True:
+            self.skipWS()
+            if self.peek()==')':
+                self.i += 1
+                return ('call', function, args)
+            args.append(self.expr())
+
+def parse(text):
+    tree = parseCache.get(text)
+    if tree is None:
+        s = Scanner(text)
+        s.skipWS()
+        # h2o_xl sends Def's as [...]
+        if s.peek()=='[':
+            s.i += 1
+            tree = s.stmnts(']')
+            s.expect(']')
+        else:
+            tree = s.stmnts(None)
+        if s.skipWS().peek() is not None:
+            s.error("trailing text")
+        if len(parseCache) >= parseCacheMax:
+            parseCache.clear()
+        parseCache[text] = tree
+    return tree
+
+#********************************************************************************
+# tuples -> nodes
+nullArg = ('str', '"null"')
+
+# KeyIndexed prints all rows and cols as just the key, so leave that a Fcn
+def isIndexed(t):
+    return t[0]=='call' and t[1]=='[' and len(t[2])==3 and t[2][0][0]=='ref' and t[2][1:]!=[nullArg, nullArg]
+
+def build(t):
+    kind = t[0]
+    if kind in ('num', 'str', 'name'):
+        return t[1]
+    if kind=='ref':
+        # TRUE/FALSE/NA.. aren't keys
+        if t[1] in h2o_xl.constantNames:
+            return '%' + t[1]
+        return Key(t[1], noRefCnt=True)
+    if kind=='set':
+        raise Exception("h2o_xl_parse: !%s outside of (= ..)" % t[1])
+    if kind=='seq':
+        return Seq(*[build(x) for x in t[1]])
+    if kind=='def':
+        return Def(t[1], t[2], *buildStmnts(t[3]))
+    if kind=='if':
+        return If(build(t[1]), *buildStmnts(t[2]))
+    if kind=='else':
+        raise Exception("h2o_xl_parse: (else ..) without (if ..)")
+
+    function, args = t[1], t[2]
+    if function==':' and len(args)==2:
+        return Colon(build(args[0]), build(args[1]))
+    if isIndexed(t):
+        return KeyIndexed(args[0][1], build(args[1]), build(args[2]), noRefCnt=True)
+    # Assign can't index an expression, (= ([ (+ ..) ..) ..) stays a Fcn
+    if function=='=' and len(args)==2 and (args[0][0]=='set' or isIndexed(args[0])):
+        lhs = args[0][1] if args[0][0]=='set' else build(args[0])
+        return Assign(lhs, build(args[1]), do=False, noRefCnt=True)
+    return Fcn(function, *[build(x) for x in args])
+
+# (if ..) (else ..) pairs become IfElse
+def buildStmnts(ts):
+    stmnts = []
+    i = 0
+    while i < len(ts):
+        t = ts[i]
+        if t[0]=='if' and i+1 < len(ts) and ts[i+1][0]=='else':
+            stmnts.append(IfElse(build(t[1]), buildStmnts(t[2]), buildStmnts(ts[i+1][1])))
+            i += 2
+        else:
+            stmnts.append(build(t))
+            i += 1
+    return stmnts
+
+def parseProgram(text):
+    return buildStmnts(parse(text))
+
+def parseExpr(text):
+    stmnts = parseProgram(text)
+    if len(stmnts)!=1:
+        raise Exception("h2o_xl_parse: expected one statement, got %s: %s" % (len(stmnts), text))
+    return stmnts[0]
+
+# one statement per line
+def saveProgram(pathname, stmnts):
+    with open(pathname, 'w') as f:
+        for s in stmnts:
+            f.write("%s\n" % s)
+
+def loadProgram(pathname):
+    with open(pathname) as f:
+        return parseProgram(f.read())
+
+#********************************************************************************
+# the tuples, with temp key ids numbered in order of first use
+def canonical(text):
+    ids = {}
+    def rename(name):
+        if not h2o_xl.isTempKey(name):
+            return name
+        return ids.setdefault(name, 'knon_%s' % len(ids))
+
+    def canon(t):
+        kind = t[0]
+        if kind in ('ref', 'set'):
+            return (kind, rename(t[1]))
+        if kind in ('num', 'str', 'name'):
+            return t
+        if kind=='seq':
+            return (kind, [canon(x) for x in t[1]])
+        if kind=='call':
+            return (kind, t[1], [canon(x) for x in t[2]])
+        if kind=='def':
+            return (kind, t[1], t[2], [canon(x) for x in t[3]])
+        if kind=='if':
+            return (kind, canon(t[1]), [canon(x) for x in t[2]])
+        return (kind, [canon(x) for x in t[1]])
+
+    return [canon(t) for t in parse(str(text))]
+
+def astEqual(a, b):
+    return canonical(a)==canonical(b)
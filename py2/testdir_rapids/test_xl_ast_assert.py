@@ -30,9 +30,13 @@ class Basic(unittest.TestCase):
         global SEED
         SEED = h2o.setup_random_seed()
         h2o.init()
+        # these check the literal translation, before simplify()
+        cls.simplifyEnable = h2o_xl.simplifyEnable
+        h2o_xl.simplifyEnable = False
 
     @classmethod
     def tearDownClass(cls):
+        h2o_xl.simplifyEnable = cls.simplifyEnable
         h2o.tear_down_cloud()
 
     def test_xl_ast_assert_ZZ(self):
@@ -0,0 +1,47 @@
+import unittest, random, sys, time
+sys.path.extend(['.','..','../..','py'])
+import h2o, h2o_xl
+
+from h2o_xl import Key, Item, Fcn, Seq
+
+# building and printing asts doesn't talk to h2o
+class Basic(unittest.TestCase):
+    def test_xl_ast_str_edits(self):
+        a = Key('a')
+        i = Item(3)
+        f = Fcn('*', i, a)
+        assert str(f)=='(* #3 %a)', f
+        # the text isn't kept between str()'s, so every kind of edit shows up
+        i.item = 4
+        assert str(f)=='(* #4 %a)', f
+        f.operandList[0] = Item(5)
+        assert str(f)=='(* #5 %a)', f
+        f.function = '+'
+        assert str(f)=='(+ #5 %a)', f
+
+        s = Seq([1, 2, 3])
+        g = Fcn('c', s)
+        assert str(g)=='(c {#1;#2;#3})', g
+        s.operandList.append(Item(4))
+        assert str(g)=='(c {#1;#2;#3;#4})', g
+
+    def test_xl_ast_str_deep(self):
+        # a long generated chain builds and prints in linear time, and its depth
+        # isn't limited by python's recursion limit
+        k = Key('x')
+        times = []
+        for n in (1000, 4000):
+            start = time.time()
+            e = k[0]
+            for i in range(n):
+                e = e + k[i % 3]
+            s = str(e)
+            times.append(time.time() - start)
+            assert s.count('(+ ')==n, n
+            assert s.startswith('(+ ' * n + '([ %x #0 #0)'), s[:100]
+        # 4x the nodes. quadratic would be 16x
+        assert times[1] < 8 * times[0] + 0.5, times
+
+
+if __name__ == '__main__':
+    h2o.unit_main()
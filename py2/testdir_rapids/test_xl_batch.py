@@ -0,0 +1,63 @@
+import unittest, random, sys, time
+sys.path.extend(['.','..','../..','py'])
+import h2o, h2o_cmd, h2o_import as h2i, h2o_xl
+
+from h2o_xl import DF, Key, Assign, Fcn, Batch
+from h2o_test import dump_json, verboseprint
+
+class Basic(unittest.TestCase):
+    def tearDown(self):
+        h2o.check_sandbox_for_errors()
+
+    @classmethod
+    def setUpClass(cls):
+        global SEED
+        SEED = h2o.setup_random_seed()
+        h2o.init()
+
+    @classmethod
+    def tearDownClass(cls):
+        h2o.tear_down_cloud()
+
+    def test_xl_batch(self):
+        bucket = 'smalldata'
+        csvPathname = 'iris/iris_wheader.csv'
+        hexKey = 'r1'
+        parseResult = h2i.import_parse(bucket=bucket, path=csvPathname, schema='put', hex_key=hexKey)
+        r1 = Key(hexKey)
+
+        # the same statements, one request each, then batched
+        unbatched = []
+        for i in range(4):
+            unbatched.append(Assign('u%s' % i, r1[:, i] + i))
+
+        with Batch() as batch:
+            batched = []
+            for i in range(4):
+                batched.append(Assign('b%s' % i, r1[:, i] + i))
+            # nothing sent yet
+            assert len(batch.statements)==4, batch.statements
+            for b in batched:
+                assert not b.execDone
+
+            # reads a key a queued reduction may set to a scalar: flushes first
+            s = Assign('s1', Fcn('sum', r1[:, 0]))
+            t = Assign('t1', Fcn('+', Key('s1'), 1))
+            assert len(batch.statements)==1, batch.statements
+
+        # each statement still gets its own results
+        for u, b in zip(unbatched, batched):
+            assert b.execDone
+            assert (b.numRows, b.numCols)==(u.numRows, u.numCols), "%s %s" % (dump_json(b.execResult), dump_json(u.execResult))
+            inspect = h2o_cmd.runInspect(key=b.frame)
+            assert inspect['frames'][0]['rows']==u.numRows
+
+        assert s.scalar is not None and s.numRows==1 and s.numCols==1
+        assert t.execDone and t.numRows==1 and t.numCols==1
+        print "s1:", s.scalar, "t1:", t.result
+
+        h2o.check_sandbox_for_errors()
+
+
+if __name__ == '__main__':
+    h2o.unit_main()
@@ -0,0 +1,53 @@
+import unittest, random, sys, time
+sys.path.extend(['.','..','../..','py'])
+import h2o, h2o_cmd, h2o_import as h2i, h2o_xl
+
+from h2o_xl import DF, Key, Assign, Fcn
+from h2o_test import dump_json, verboseprint
+
+class Basic(unittest.TestCase):
+    def tearDown(self):
+        h2o.check_sandbox_for_errors()
+
+    @classmethod
+    def setUpClass(cls):
+        global SEED
+        SEED = h2o.setup_random_seed()
+        h2o.init()
+
+    @classmethod
+    def tearDownClass(cls):
+        h2o.tear_down_cloud()
+
+    def test_xl_gc(self):
+        bucket = 'smalldata'
+        csvPathname = 'iris/iris_wheader.csv'
+        hexKey = 'r1'
+        parseResult = h2i.import_parse(bucket=bucket, path=csvPathname, schema='put', hex_key=hexKey)
+        r1 = Key(hexKey)
+
+        h2o_xl.gcMinKeys = 4
+        keysBefore = len(h2o_cmd.runStoreView()['keys'])
+        removedBefore = h2o_xl.gcStats['keys']
+        keep = Assign(None, r1[:, 0] + 1)
+
+        # each temp is dead once the next one replaces it
+        for i in range(20):
+            a = Assign(None, r1[:, 0] * i)
+        del a
+        h2o_xl.collectKeys(force=True)
+
+        keys = h2o_cmd.runStoreView()['keys']
+        assert keep.frame in keys, keys
+        # just keep (and r1) are left
+        assert len(keys) <= keysBefore + 1, "%s %s" % (keysBefore, keys)
+        # every temp has its own name, so all 20 were removed
+        assert h2o_xl.gcStats['keys'] - removedBefore==20, "%s %s" % (removedBefore, h2o_xl.gcStats)
+        assert h2o_xl.gcStats['bytes'] > 0, h2o_xl.gcStats
+        print "gc:", h2o_xl.gcStats
+
+        h2o.check_sandbox_for_errors()
+
+
+if __name__ == '__main__':
+    h2o.unit_main()
@@ -0,0 +1,81 @@
+import unittest, random, sys, time
+sys.path.extend(['.','..','../..','py'])
+import h2o, h2o_cmd, h2o_import as h2i, h2o_xl
+
+from h2o_xl import DF, Key, Assign, Fcn, Batch
+from h2o_test import dump_json, verboseprint
+
+class Basic(unittest.TestCase):
+    def tearDown(self):
+        h2o.check_sandbox_for_errors()
+
+    @classmethod
+    def setUpClass(cls):
+        global SEED
+        SEED = h2o.setup_random_seed()
+        h2o.init()
+
+    @classmethod
+    def tearDownClass(cls):
+        h2o.tear_down_cloud()
+
+    def test_xl_lazy_scalar(self):
+        bucket = 'smalldata'
+        csvPathname = 'iris/iris_wheader.csv'
+        hexKey = 'r1'
+        parseResult = h2i.import_parse(bucket=bucket, path=csvPathname, schema='put', hex_key=hexKey)
+        r1 = Key(hexKey)
+
+        # a reduction doesn't write its key at h2o, till something reads it
+        s = Assign('s1', Fcn('sum', r1[:, 0]))
+        assert s.scalar is not None and s.numRows==1 and s.numCols==1
+        assert 's1' in h2o_xl.pendingScalars, h2o_xl.pendingScalars
+
+        # the store goes with the statement that reads it
+        t = Assign('t1', Fcn('+', Key('s1'), 1))
+        assert 's1' not in h2o_xl.pendingScalars, h2o_xl.pendingScalars
+        assert t.execResult['ast']==t.execExpr, dump_json(t.execResult)
+        # the store truncates to int, like before
+        assert t.result==[int(s.scalar) + 1], "%s %s" % (t.result, s.scalar)
+
+        # overwritten before it's read: never sent
+        u = Assign('u1', Fcn('max', r1[:, 1]))
+        assert 'u1' in h2o_xl.pendingScalars
+        Assign('u1', r1[:, 1] + 1)
+        assert 'u1' not in h2o_xl.pendingScalars
+        assert h2o_cmd.runInspect(key='u1')['frames'][0]['rows']==150
+
+        # batched reads get their stores in the same program
+        v = Assign('v1', Fcn('min', r1[:, 2]))
+        with Batch():
+            w = Assign('w1', Fcn('+', Key('v1'), 2))
+            x = Assign('x1', r1[:, 2] * 2)
+        assert w.result==[int(v.scalar) + 2], "%s %s" % (w.result, v.scalar)
+        assert x.numRows==150
+
+        # other reads of the key store it first: ResultIter by itself, the rest explicitly
+        y = Assign('y1', Fcn('mean', r1[:, 3]))
+        assert 'y1' in h2o_xl.pendingScalars
+        assert list(Key('y1').iterColumn())==[int(y.scalar)]
+        assert 'y1' not in h2o_xl.pendingScalars
+        z = Assign('z1', Fcn('max', r1[:, 3]))
+        assert 'z1' in h2o_xl.pendingScalars
+        h2o_xl.materializeScalars(['z1'])
+        assert 'z1' not in h2o_xl.pendingScalars
+        assert h2o_cmd.runInspect(key='z1')['frames'][0]['rows']==1
+        h2o_cmd.runSummary(key='z1', column=0)
+
+        # a failed request leaves its stores pending
+        q = Assign('q1', Fcn('sum', r1[:, 0]))
+        try:
+            Assign('q2', Fcn('+', Key('q1'), Key('doesnt_exist')))
+        except Exception:
+            pass
+        assert 'q1' in h2o_xl.pendingScalars, h2o_xl.pendingScalars
+        assert Assign('q3', Fcn('+', Key('q1'), 1)).result==[int(q.scalar) + 1]
+
+        h2o.check_sandbox_for_errors()
+
+
+if __name__ == '__main__':
+    h2o.unit_main()
@@ -0,0 +1,64 @@
+import unittest, random, sys, time
+sys.path.extend(['.','..','../..','py'])
+import h2o, h2o_cmd, h2o_import as h2i, h2o_xl, h2o_xl_local
+
+from h2o_xl import DF, Key, Assign, Fcn, Expr
+from h2o_test import dump_json, verboseprint
+
+class Basic(unittest.TestCase):
+    def tearDown(self):
+        h2o.check_sandbox_for_errors()
+
+    @classmethod
+    def setUpClass(cls):
+        global SEED
+        SEED = h2o.setup_random_seed()
+        h2o.init()
+
+    @classmethod
+    def tearDownClass(cls):
+        h2o_xl.localEnv = None
+        h2o.tear_down_cloud()
+
+    def test_xl_local(self):
+        bucket = 'smalldata'
+        csvPathname = 'iris/iris_wheader.csv'
+        hexKey = 'r1'
+        parseResult = h2i.import_parse(bucket=bucket, path=csvPathname, schema='put', hex_key=hexKey)
+        r1 = Key(hexKey)
+
+        env = h2o_xl_local.Env()
+        env.loadCsv(hexKey, h2i.find_folder_and_filename(bucket, csvPathname, returnFullPath=True))
+
+        # the local interpreter as an oracle for h2o
+        for i in range(4):
+            for f in ['sum', 'min', 'max', 'mean']:
+                a = Assign('s%s' % i, Fcn(f, r1[:, i]))
+                expected = env.run(Fcn(f, r1[:, i]))
+                assert abs(a.scalar - expected) < 1e-6 * max(1, abs(expected)), "%s %s %s" % (f, a.scalar, expected)
+
+            b = Assign('b%s' % i, Fcn('sum', r1[r1[:, i] > 3, i]))
+            expected = env.run(Fcn('sum', r1[r1[:, i] > 3, i]))
+            assert abs(b.scalar - expected) < 1e-6 * max(1, abs(expected)), "%s %s" % (b.scalar, expected)
+
+        # hybrid: these run locally, no h2o round trip
+        h2o_xl.localEnv = env
+        h2o_xl.localOnly.clear()
+        c = Assign('c1', r1[:, 0] * 2)
+        assert c.execResult.get('local'), dump_json(c.execResult)
+        assert (c.numRows, c.numCols)==(150, 1)
+
+        # reads a key h2o doesn't have yet: it's put to h2o first, then h2o does it
+        h2o_xl.localMaxRows = 100
+        d = Assign('d1', Fcn('+', Key('c1'), r1[:, 1]))
+        assert not d.execResult.get('local'), dump_json(d.execResult)
+        assert 'c1' not in h2o_xl.localOnly
+        inspect = h2o_cmd.runInspect(key='d1')
+        assert inspect['frames'][0]['rows']==150
+
+        h2o_xl.localEnv = None
+        h2o.check_sandbox_for_errors()
+
+
+if __name__ == '__main__':
+    h2o.unit_main()
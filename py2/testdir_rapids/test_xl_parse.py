@@ -0,0 +1,67 @@
+import unittest, random, sys, time
+sys.path.extend(['.','..','../..','py'])
+import h2o, h2o_cmd, h2o_import as h2i, h2o_xl, h2o_xl_parse
+
+from h2o_xl import DF, Key, Assign, Fcn, Def, IfElse
+from h2o_test import dump_json, verboseprint
+
+class Basic(unittest.TestCase):
+    def tearDown(self):
+        h2o.check_sandbox_for_errors()
+
+    @classmethod
+    def setUpClass(cls):
+        global SEED
+        SEED = h2o.setup_random_seed()
+        h2o.init()
+
+    @classmethod
+    def tearDownClass(cls):
+        h2o.tear_down_cloud()
+
+    def test_xl_parse(self):
+        bucket = 'smalldata'
+        csvPathname = 'iris/iris_wheader.csv'
+        hexKey = 'r1'
+        parseResult = h2i.import_parse(bucket=bucket, path=csvPathname, schema='put', hex_key=hexKey)
+        r1 = Key(hexKey)
+
+        # built in python
+        built = [
+            Def('addone', 'x', Fcn('+', Key('x'), 1)),
+            Assign('a1', r1[0:9, [0, 2]], do=False),
+            Assign('a2', Fcn('sum', Fcn('addone', r1[:, 1])), do=False),
+            Assign('a3', Fcn('ifelse', Fcn('>', r1[:, 0], 5), 1, 0), do=False),
+        ]
+        # printing gives the same ast back
+        for b in built:
+            p = h2o_xl_parse.parseExpr(str(b))
+            assert str(p)==str(b), "%s %s" % (p, b)
+            assert type(p)==type(b), "%s %s" % (type(p), type(b))
+
+        ifElse = IfElse(Fcn('>', r1[0, 0], 1), Assign('z1', 3, do=False), Assign('z1', 4, do=False))
+        p = h2o_xl_parse.parseProgram(str(ifElse))
+        assert len(p)==1 and str(p[0])==str(ifElse), p
+
+        # the saved program runs without the python that built it
+        pathname = h2o.make_syn_dir() + '/xl_parse.rapids'
+        h2o_xl_parse.saveProgram(pathname, built)
+        for b in built:
+            b.do()
+        loaded = h2o_xl_parse.loadProgram(pathname)
+        for b, l in zip(built, loaded):
+            l.do()
+            assert l.execExpr==b.execExpr, "%s %s" % (l.execExpr, b.execExpr)
+            assert (l.numRows, l.numCols, l.scalar)==(b.numRows, b.numCols, b.scalar), \
+                "%s %s" % (dump_json(l.execResult), dump_json(b.execResult))
+
+        # structure, not text
+        assert h2o_xl_parse.astEqual('(= !knon_0x1 (+ $knon_0x2  #1))', '(= !knon_0xa (+ %knon_0xb #1))')
+        assert not h2o_xl_parse.astEqual('(= !knon_0x1 (+ %knon_0x1 #1))', '(= !knon_0xa (+ %knon_0xb #1))')
+        assert not h2o_xl_parse.astEqual('(= !a (+ %b #1))', '(= !a (+ %b #2))')
+
+        h2o.check_sandbox_for_errors()
+
+
+if __name__ == '__main__':
+    h2o.unit_main()
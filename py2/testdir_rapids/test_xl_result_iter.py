@@ -0,0 +1,56 @@
+import unittest, random, sys, time
+sys.path.extend(['.','..','../..','py'])
+import h2o, h2o_cmd, h2o_import as h2i, h2o_xl
+
+from h2o_xl import DF, Key, Assign, Fcn, ResultIter
+from h2o_test import dump_json, verboseprint
+
+class Basic(unittest.TestCase):
+    def tearDown(self):
+        h2o.check_sandbox_for_errors()
+
+    @classmethod
+    def setUpClass(cls):
+        global SEED
+        SEED = h2o.setup_random_seed()
+        h2o.init()
+
+    @classmethod
+    def tearDownClass(cls):
+        h2o.tear_down_cloud()
+
+    def test_xl_result_iter(self):
+        bucket = 'smalldata'
+        csvPathname = 'iris/iris_wheader.csv'
+        hexKey = 'r1'
+        parseResult = h2i.import_parse(bucket=bucket, path=csvPathname, schema='put', hex_key=hexKey)
+        r1 = Key(hexKey)
+
+        # more than 1024 rows: .result pages the column instead of raising
+        tall = Assign('tall', Fcn('rbind', *([r1[:, 0]] * 8)))
+        big = Assign('big', tall + 1)
+        assert big.numRows==1200, big.numRows
+        assert isinstance(big.result, ResultIter)
+        values = list(big.result)
+        assert len(values)==1200
+
+        # rows, paged 64 at a time, agree with the column sums
+        s0 = Assign('s0', Fcn('sum', r1[:, 0]))
+        s3 = Assign('s3', Fcn('sum', r1[:, 3]))
+        rows = list(r1.iterRows(chunkRows=64))
+        assert len(rows)==150
+        assert abs(sum(r[0] for r in rows) - s0.scalar) < 1e-6, "%s %s" % (sum(r[0] for r in rows), s0.scalar)
+        # enum column gives the level strings
+        assert isinstance(rows[0][4], basestring), rows[0]
+
+        # a column by index, cached: indexing doesn't go back to h2o
+        col = r1.iterColumn(3, chunkRows=50, cache=True)
+        assert abs(sum(col) - s3.scalar) < 1e-6
+        assert col[149]==rows[149][3]
+        assert len(col.pages)==3
+
+        h2o.check_sandbox_for_errors()
+
+
+if __name__ == '__main__':
+    h2o.unit_main()
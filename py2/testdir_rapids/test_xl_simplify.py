@@ -0,0 +1,60 @@
+import unittest, random, sys, time
+sys.path.extend(['.','..','../..','py'])
+import h2o, h2o_cmd, h2o_import as h2i, h2o_xl
+
+from h2o_xl import DF, Key, Assign, Fcn, Def, Col, Seq
+from h2o_test import dump_json, verboseprint
+
+class Basic(unittest.TestCase):
+    def tearDown(self):
+        h2o.check_sandbox_for_errors()
+
+    @classmethod
+    def setUpClass(cls):
+        global SEED
+        SEED = h2o.setup_random_seed()
+        h2o.init()
+        cls.simplifyEnable = h2o_xl.simplifyEnable
+
+    @classmethod
+    def tearDownClass(cls):
+        h2o_xl.simplifyEnable = cls.simplifyEnable
+        h2o.tear_down_cloud()
+
+    def test_xl_simplify(self):
+        bucket = 'smalldata'
+        csvPathname = 'iris/iris_wheader.csv'
+        hexKey = 'r1'
+        parseResult = h2i.import_parse(bucket=bucket, path=csvPathname, schema='put', hex_key=hexKey)
+        r1 = Key(hexKey)
+
+        # (ast after simplify, expression)
+        cases = [
+            ("(= !s%s (sum (+ ([ %%r1 \"null\" #0) ([ %%r1 \"null\" #1))))", lambda: Fcn('sum', Fcn('*', Fcn('+', r1[:, 0], 0), 1) + r1[:, 1])),
+            ("(= !s%s (sum (* ([ %%r1 \"null\" #1) #12)))", lambda: Fcn('sum', r1[:, 1] * Fcn('*', 3, Fcn('-', 5, 1)))),
+            ("(= !s%s (sum (g ([ %%r1 \"null\" #2) #1)))", lambda: Fcn('sum', Fcn('not', Fcn('not', Fcn('>', r1[:, 2], 1))))),
+            ("(= !s%s (sum ([ %%r1 {(: #0 #2);(: #5 #6)} #3)))", lambda: Fcn('sum', r1[[0, 1, 2, 5, 6], 3])),
+        ]
+        for i, (expected, expr) in enumerate(cases):
+            h2o_xl.simplifyEnable = False
+            try:
+                a = Assign('u%s' % i, expr())
+            finally:
+                h2o_xl.simplifyEnable = True
+            b = Assign('s%s' % i, expr())
+            assert b.execExpr==expected % i, "%s %s" % (b.execExpr, expected % i)
+            assert a.scalar==b.scalar, "%s %s %s" % (b.execExpr, a.scalar, b.scalar)
+
+        # the mean is done once, at the def, not on every call
+        d = Def('addmean', 'x', Fcn('+', Key('x'), Fcn('mean', r1[:, 0])))
+        d.do()
+        assert '(mean' not in d.execExpr, d.execExpr
+        c = Assign('c1', Fcn('sum', Fcn('addmean', r1[:, 0])))
+        e = Assign('e1', Fcn('sum', r1[:, 0] + Fcn('mean', r1[:, 0])))
+        assert abs(c.scalar - e.scalar) < 1e-6 * abs(e.scalar), "%s %s" % (c.scalar, e.scalar)
+
+        h2o.check_sandbox_for_errors()
+
+
+if __name__ == '__main__':
+    h2o.unit_main()